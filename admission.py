@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Admission control for the Vuetify RAG API
+Concurrency limit and bounded wait queue for the LLM path, with fast
+rejection when saturated and a signal for degraded (search-only) mode
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted in time"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded concurrency plus a bounded, deadline-limited wait queue"""
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 16,
+                 queue_timeout: float = 10.0, degrade_queue_depth: int = 8):
+        """
+        Initialize admission control.
+
+        Args:
+            max_concurrent: Requests allowed on the LLM path at once
+            max_queue: Requests allowed to wait for a slot; more are rejected
+            queue_timeout: Longest a request may wait for a slot (seconds)
+            degrade_queue_depth: Queue depth at which new requests should be
+                served in degraded (search-only) mode instead of queueing
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.degrade_queue_depth = degrade_queue_depth
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted_count = 0
+        self.rejected_count = 0
+        self.timeout_count = 0
+        self.degraded_count = 0
+
+        # Smoothed time a request holds a slot, used for Retry-After
+        self._service_time = 2.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Requests currently waiting for a slot"""
+        return self.waiting
+
+    def should_degrade(self) -> bool:
+        """True when the queue is long enough to serve search-only responses"""
+        return self.waiting >= self.degrade_queue_depth
+
+    def record_degraded(self):
+        """Count a response actually served in degraded mode"""
+        self.degraded_count += 1
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait before retrying"""
+        backlog = (self.waiting + self.active) / max(self.max_concurrent, 1)
+        return max(1, min(60, math.ceil(backlog * self._service_time)))
+
+    async def acquire(self) -> float:
+        """Wait for a slot; raises Overloaded when the queue is full or too slow
+
+        Returns the acquisition time, to be passed back to release().
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected_count += 1
+            raise Overloaded("LLM queue full", self.retry_after())
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timeout_count += 1
+            raise Overloaded("Timed out waiting for LLM capacity", self.retry_after())
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted_count += 1
+        return time.perf_counter()
+
+    def release(self, acquired_at: float):
+        """Free a slot and update the service time estimate"""
+        elapsed = time.perf_counter() - acquired_at
+        self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self.active -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold an LLM slot for the duration of the block"""
+        acquired_at = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(acquired_at)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current queue state and counters"""
+        return {
+            'active': self.active,
+            'queue_depth': self.waiting,
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted_count,
+            'rejected': self.rejected_count,
+            'timed_out': self.timeout_count,
+            'degraded': self.degraded_count,
+        }
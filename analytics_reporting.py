@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+RAG Analytics Reporting
+HTML and JSON reports built from the analytics rollups; loaded on demand
+so the query logging path (rag_analytics) stays cheap to import
+
+Reports are generated as a stream of text chunks with table rows read a
+page at a time from SQLite cursors, so memory stays flat however many
+components and distinct queries the window covers.
+"""
+
+import argparse
+import html
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+REPORT_FORMATS = {
+    'html': 'text/html; charset=utf-8',
+    'json': 'application/json',
+}
+
+
+def _fmt_seconds(value: Optional[float]) -> str:
+    """Latency cell for reports ('-' when there is no data)"""
+    return f"{value:.3f}s" if value is not None else "-"
+
+
+def _cells(*values: Any) -> str:
+    """One HTML table row with escaped cells"""
+    return "<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in values) + "</tr>\n"
+
+
+def iter_html_report(analytics, days: int = 30, page_size: int = 500) -> Iterator[str]:
+    """Generate the HTML report as a stream of text chunks
+
+    Args:
+        analytics: RAGAnalytics instance to read from
+        days: Report window in days
+        page_size: Rows fetched from SQLite per page
+    """
+    summary = analytics.get_performance_summary(days)
+    latency = summary['latency_percentiles']
+    component_latency = analytics.get_latency_percentiles(days, 'component')
+
+    yield f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Vuetify RAG Analytics Report</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; }}
+        .header {{ background: #1976D2; color: white; padding: 20px; border-radius: 8px; }}
+        .metric {{ background: #f5f5f5; padding: 15px; margin: 10px 0; border-radius: 5px; }}
+        table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
+        th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
+        th {{ background-color: #f2f2f2; }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>🎯 Vuetify RAG Analytics Report</h1>
+        <p>Performance insights for your documentation RAG system</p>
+        <p>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+    </div>
+
+    <h2>📊 Performance Summary ({summary['period']})</h2>
+    <div class="metric">
+        <strong>Total Queries:</strong> {summary['total_queries']}
+    </div>
+    <div class="metric">
+        <strong>Average Response Time:</strong> {summary['avg_response_time']}s
+    </div>
+    <div class="metric">
+        <strong>Response Time Percentiles:</strong>
+        p50 {_fmt_seconds(latency['p50'])} ·
+        p90 {_fmt_seconds(latency['p90'])} ·
+        p99 {_fmt_seconds(latency['p99'])}
+    </div>
+    <div class="metric">
+        <strong>Average Similarity Score:</strong> {summary['avg_similarity']:.3f}
+    </div>
+
+    <h2>📈 Query Type Distribution</h2>
+    <table>
+        <tr><th>Query Type</th><th>Count</th><th>Percentage</th><th>p50</th><th>p90</th><th>p99</th></tr>
+"""
+
+    total_typed_queries = sum(summary['query_types'].values())
+    for query_type, count in summary['query_types'].items():
+        percentage = (count / total_typed_queries * 100) if total_typed_queries > 0 else 0
+        type_latency = summary['query_type_latency'].get(query_type, {})
+        yield _cells(query_type, count, f"{percentage:.1f}%",
+                     _fmt_seconds(type_latency.get('p50')),
+                     _fmt_seconds(type_latency.get('p90')),
+                     _fmt_seconds(type_latency.get('p99')))
+
+    yield """    </table>
+
+    <h2>🏆 Components</h2>
+    <table>
+        <tr><th>Component</th><th>Queries</th><th>Avg Response Time</th><th>p50</th><th>p90</th><th>p99</th><th>Avg Similarity</th><th>Last Queried</th></tr>
+"""
+
+    for comp in analytics.iter_component_stats(days, page_size):
+        comp_latency = component_latency.get(comp['component'], {})
+        yield _cells(comp['component'], comp['queries'],
+                     _fmt_seconds(comp['avg_response_time']),
+                     _fmt_seconds(comp_latency.get('p50')),
+                     _fmt_seconds(comp_latency.get('p90')),
+                     _fmt_seconds(comp_latency.get('p99')),
+                     f"{comp['avg_similarity']:.3f}", comp['last_queried'] or '-')
+
+    yield """    </table>
+
+    <h2>🔥 Queries</h2>
+    <table>
+        <tr><th>Query</th><th>Frequency</th><th>Avg Response Time</th><th>Avg Similarity</th></tr>
+"""
+
+    for query in analytics.iter_query_stats(days, page_size=page_size):
+        yield _cells(query['query'], query['frequency'],
+                     _fmt_seconds(query['avg_response_time']),
+                     f"{query['avg_similarity']:.3f}")
+
+    yield """    </table>
+
+    <h2>📅 Daily Activity</h2>
+    <table>
+        <tr><th>Date</th><th>Queries</th><th>Avg Response Time</th><th>Avg Similarity</th><th>New Components</th></tr>
+"""
+
+    for day in analytics.iter_daily_stats(days, page_size):
+        yield _cells(day['date'], day['queries'], _fmt_seconds(day['avg_response_time']),
+                     f"{day['avg_similarity']:.3f}", day['unique_components'])
+
+    yield """    </table>
+</body>
+</html>
+"""
+
+
+def _json_array(items: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    """Stream items as a JSON array, one element per chunk"""
+    yield "["
+    separator = "\n  "
+    for item in items:
+        yield separator + json.dumps(item)
+        separator = ",\n  "
+    yield "\n]"
+
+
+def iter_json_report(analytics, days: int = 30, page_size: int = 500) -> Iterator[str]:
+    """Generate the JSON export as a stream of text chunks
+
+    One object with the performance summary followed by 'components',
+    'queries' and 'daily' arrays, streamed row by row.
+    """
+    summary = analytics.get_performance_summary(days)
+    summary['component_latency'] = analytics.get_latency_percentiles(days, 'component')
+
+    yield '{"generated": ' + json.dumps(datetime.now().isoformat())
+    yield ',\n"days": ' + json.dumps(days)
+    yield ',\n"summary": ' + json.dumps(summary)
+    yield ',\n"components": '
+    yield from _json_array(analytics.iter_component_stats(days, page_size))
+    yield ',\n"queries": '
+    yield from _json_array(analytics.iter_query_stats(days, page_size=page_size))
+    yield ',\n"daily": '
+    yield from _json_array(analytics.iter_daily_stats(days, page_size))
+    yield "}\n"
+
+
+REPORT_GENERATORS = {
+    'html': iter_html_report,
+    'json': iter_json_report,
+}
+
+
+def write_report(analytics, output_file: str, format: str = 'html', days: int = 30,
+                 page_size: int = 500) -> str:
+    """Stream a report into output_file
+
+    The report is written to a temporary file next to output_file and moved
+    into place when complete, so readers never see a partial report.
+    """
+    generate = REPORT_GENERATORS[format]
+    directory = os.path.dirname(os.path.abspath(output_file))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.report-', suffix=f'.{format}')
+    try:
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for chunk in generate(analytics, days, page_size):
+                f.write(chunk)
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return output_file
+
+
+def generate_report(analytics, output_file: str = "rag_analytics_report.html",
+                    days: int = 30) -> str:
+    """Generate comprehensive analytics report
+
+    Args:
+        analytics: RAGAnalytics instance to read from
+        output_file: Path of the HTML file to write
+        days: Report window in days
+    """
+    write_report(analytics, output_file, 'html', days)
+    print(f"📄 Analytics report generated: {output_file}")
+    return output_file
+
+
+class ReportCache:
+    """Generated report files, rebuilt only when the analytics data changed
+
+    Reports read the rollups that every log write already updates, so a
+    rebuild costs the same after months of logs as after a day. A report
+    is served as-is until new logs arrive (RAGAnalytics.data_version()),
+    and rebuilt at most once per min_interval seconds; concurrent requests
+    for the same report wait for a single rebuild.
+    """
+
+    def __init__(self, analytics, directory: str, min_interval: float = 60.0):
+        """
+        Args:
+            analytics: RAGAnalytics instance to read from
+            directory: Where report files are kept
+            min_interval: Minimum seconds between rebuilds of one report
+        """
+        self.analytics = analytics
+        self.directory = directory
+        self.min_interval = min_interval
+        self.builds = 0
+        # (format, days) -> (data version, date, build time)
+        self._built: Dict[tuple, tuple] = {}
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, format: str, days: int) -> str:
+        """File a report is cached in"""
+        return os.path.join(self.directory, f"analytics_report_{days}d.{format}")
+
+    def _lock(self, key: tuple) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def version(self, format: str = 'html', days: int = 30) -> Optional[str]:
+        """Data version and date the cached report was built from (None before
+        the first build); changes exactly when the report is rebuilt for new
+        data, so it can serve as an HTTP validator
+        """
+        built = self._built.get((format, days))
+        return f"{built[0]}-{built[1]}" if built is not None else None
+
+    def get(self, format: str = 'html', days: int = 30) -> str:
+        """Path of an up-to-date report, rebuilding it when stale"""
+        key = (format, days)
+        path = self.path(format, days)
+
+        with self._lock(key):
+            built = self._built.get(key)
+            if built is not None and os.path.exists(path):
+                version, date, built_at = built
+                if time.monotonic() - built_at < self.min_interval:
+                    return path
+                # The window moves at midnight even without new logs
+                if (version == self.analytics.data_version()
+                        and date == datetime.now().strftime('%Y-%m-%d')):
+                    self._built[key] = (version, date, time.monotonic())
+                    return path
+
+            version = self.analytics.data_version()
+            date = datetime.now().strftime('%Y-%m-%d')
+            write_report(self.analytics, path, format, days)
+            self._built[key] = (version, date, time.monotonic())
+            self.builds += 1
+            return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a Vuetify RAG analytics report')
+    parser.add_argument('--db-path', default='vuetify_rag_analytics.db',
+                       help='Analytics database')
+    parser.add_argument('--format', choices=sorted(REPORT_FORMATS), default='html',
+                       help='Report format (json is a machine-readable export)')
+    parser.add_argument('--days', type=int, default=30,
+                       help='Report window in days')
+    parser.add_argument('--page-size', type=int, default=500,
+                       help='Rows fetched from SQLite per page')
+    parser.add_argument('--output', '-o', default=None,
+                       help='Report file to write (default: rag_analytics_report.<format>)')
+
+    args = parser.parse_args()
+    output = args.output or f"rag_analytics_report.{args.format}"
+
+    from rag_analytics import RAGAnalytics
+    analytics = RAGAnalytics(args.db_path, async_writes=False)
+    write_report(analytics, output, args.format, args.days, args.page_size)
+    print(f"📄 Analytics report generated: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Analytics write stress test for Vuetify RAG
+Several worker processes (like API workers), each with several threads,
+log queries into one analytics database at the same time and report the
+sustained insert rate, write latency and lock errors
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from rag_analytics import RAGAnalytics, QueryLog
+
+COMPONENTS = ['v-btn', 'v-card', 'v-text-field', 'v-data-table', 'v-form', 'v-dialog']
+QUERY_TYPES = ['api_reference', 'code_example', 'styling', 'component_usage']
+
+
+def make_log() -> QueryLog:
+    """A random query log entry"""
+    component = random.choice(COMPONENTS)
+    return QueryLog(
+        timestamp=datetime.now().isoformat(),
+        query=f"How to use {component} with custom styling?",
+        query_type=random.choice(QUERY_TYPES),
+        components=[component],
+        response_time=random.uniform(0.05, 2.0),
+        num_results=5,
+        similarity_scores=[random.uniform(0.6, 0.95) for _ in range(5)]
+    )
+
+
+def worker(db_path: str, mode: str, threads: int, duration: float, results):
+    """One process: `threads` threads logging queries for `duration` seconds"""
+    analytics = RAGAnalytics(db_path, async_writes=(mode == 'async'))
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run():
+        nonlocal errors
+        local_latencies, local_errors = [], 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                analytics.log_query(make_log())
+            except sqlite3.OperationalError:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    analytics.close()
+    dropped = analytics.writer.dropped_count if analytics.writer else 0
+    failed = analytics.writer.failed_count if analytics.writer else 0
+    results.put((len(latencies), errors + failed, dropped, latencies))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress test concurrent analytics writes')
+    parser.add_argument('--db-path', default=None,
+                       help='Analytics database (a temporary file by default)')
+    parser.add_argument('--processes', type=int, default=4,
+                       help='Writer processes')
+    parser.add_argument('--threads', type=int, default=4,
+                       help='Writer threads per process')
+    parser.add_argument('--duration', type=float, default=10.0,
+                       help='Seconds to write for')
+    parser.add_argument('--mode', choices=['sync', 'async'], default='sync',
+                       help='sync: one transaction per log_query(); '
+                            'async: buffered background writer (API default)')
+
+    args = parser.parse_args()
+    db_path = args.db_path or os.path.join(tempfile.mkdtemp(), 'analytics_stress.db')
+
+    # Create the schema once up front
+    RAGAnalytics(db_path, async_writes=False).close()
+    conn = sqlite3.connect(db_path)
+    before = conn.execute('SELECT COUNT(*) FROM query_logs').fetchone()[0]
+
+    print(f"🧪 {args.processes} processes x {args.threads} threads, "
+          f"{args.mode} writes, {args.duration:.0f}s -> {db_path}")
+    print("=" * 60)
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker, args=(db_path, args.mode, args.threads,
+                                                     args.duration, results))
+        for _ in range(args.processes)
+    ]
+    start = time.time()
+    for process in processes:
+        process.start()
+    outcomes = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.time() - start
+
+    rows = conn.execute('SELECT COUNT(*) FROM query_logs').fetchone()[0] - before
+    conn.close()
+    calls = sum(outcome[0] for outcome in outcomes)
+    errors = sum(outcome[1] for outcome in outcomes)
+    dropped = sum(outcome[2] for outcome in outcomes)
+    latencies = sorted(latency for outcome in outcomes for latency in outcome[3])
+
+    print(f"log_query calls: {calls}")
+    print(f"Rows written:    {rows} ({rows / elapsed:,.0f} inserts/s)")
+    print(f"Lock errors:     {errors}")
+    print(f"Dropped:         {dropped}")
+    if latencies:
+        p99 = latencies[int(0.99 * (len(latencies) - 1))]
+        print(f"log_query latency: p50 {statistics.median(latencies) * 1000:.2f}ms, "
+              f"p99 {p99 * 1000:.2f}ms, max {latencies[-1] * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for Vuetify RAG modules
+Imports each module in a fresh interpreter and reports wall time, peak
+memory and any heavy dependencies it pulled in; exits non-zero when a
+module goes over budget so startup regressions are caught
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Modules that must not be loaded just to log a query
+HEAVY_MODULES = ('pandas', 'matplotlib', 'numpy', 'chromadb', 'openai')
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    """Median import time and peak RSS of a module over fresh interpreters"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        'ms': statistics.median(sample['seconds'] for sample in samples) * 1000,
+        'maxrss_mb': statistics.median(sample['maxrss_kb'] for sample in samples) / 1024,
+        'heavy': samples[0]['heavy'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark module import time')
+    parser.add_argument('modules', nargs='*', default=['rag_analytics'],
+                       help='Modules to import (default: rag_analytics)')
+    parser.add_argument('--runs', type=int, default=5,
+                       help='Fresh interpreters per module')
+    parser.add_argument('--max-ms', type=float, default=100.0,
+                       help='Fail when the median import takes longer')
+    parser.add_argument('--allow-heavy', action='store_true',
+                       help='Do not fail when heavy dependencies are imported')
+
+    args = parser.parse_args()
+    failed = False
+
+    print(f"🧪 Import benchmark ({args.runs} runs, budget {args.max_ms:.0f}ms)")
+    print("=" * 60)
+    for module in args.modules:
+        result = measure(module, args.runs)
+        over_budget = result['ms'] > args.max_ms
+        heavy = result['heavy'] and not args.allow_heavy
+        failed = failed or over_budget or heavy
+
+        status = '❌' if over_budget or heavy else '✅'
+        print(f"{status} {module}: {result['ms']:.1f}ms, peak RSS {result['maxrss_mb']:.1f} MB")
+        if result['heavy']:
+            print(f"   heavy imports: {', '.join(result['heavy'])}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
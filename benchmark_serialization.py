@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the Vuetify RAG API
+Measures per-request cost of encoding /search payloads: the default FastAPI
+path (jsonable_encoder + stdlib JSON) against the fast path (cached chunk
+fragments) and gzip/brotli compression on top of it
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from serialization import (
+    FragmentCache, ORJSON_AVAILABLE, BROTLI_AVAILABLE, compress, dumps, encode_payload
+)
+
+
+def load_results(chunks_file: str) -> List[Dict[str, Any]]:
+    """Search-result shaped dicts built from the chunk corpus"""
+    with open(chunks_file, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+
+    return [
+        {
+            'id': chunk.get('id', f"chunk_{i}"),
+            'content': chunk.get('text', ''),
+            'metadata': chunk.get('metadata', {}),
+            'similarity_score': random.random(),
+            'distance': random.random(),
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def make_payload(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """A /search response body"""
+    return {
+        'query': 'How do I create a button with custom colors?',
+        'num_results': len(results),
+        'response_time': 0.0123,
+        'timestamp': datetime.now().isoformat(),
+        'results': results,
+    }
+
+
+def fastapi_default(payload: Dict[str, Any]) -> bytes:
+    """What FastAPI does for a dict returned from an endpoint"""
+    return json.dumps(jsonable_encoder(payload), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def time_per_call(func: Callable[[], Any], iterations: int) -> float:
+    """Mean wall time per call in microseconds"""
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API payload serialization')
+    parser.add_argument('--chunks-file', '-f',
+                       default='vuetify_chunks_embedding_ready.json',
+                       help='Path to chunks JSON file')
+    parser.add_argument('--sizes', default='5,20,50',
+                       help='Comma-separated n_results values')
+    parser.add_argument('--iterations', type=int, default=500,
+                       help='Requests timed per measurement')
+
+    args = parser.parse_args()
+    random.seed(0)
+    corpus = load_results(args.chunks_file)
+    cache = FragmentCache()
+
+    print(f"🧪 Serialization benchmark ({len(corpus)} chunks, "
+          f"orjson={'yes' if ORJSON_AVAILABLE else 'no'}, "
+          f"brotli={'yes' if BROTLI_AVAILABLE else 'no'})")
+    print("=" * 72)
+    print(f"{'n':>4} {'size':>9} {'default':>10} {'fast':>10} {'fragments':>10} "
+          f"{'+gzip':>10} {'+br':>10}")
+
+    for n_results in [int(size) for size in args.sizes.split(',')]:
+        payload = make_payload(random.sample(corpus, min(n_results, len(corpus))))
+        body = encode_payload(payload, 'results', cache, version=1)
+
+        default_us = time_per_call(lambda: fastapi_default(payload), args.iterations)
+        fast_us = time_per_call(lambda: dumps(payload), args.iterations)
+        fragments_us = time_per_call(
+            lambda: encode_payload(payload, 'results', cache, version=1), args.iterations
+        )
+        gzip_us = time_per_call(lambda: compress(body, 'gzip'), args.iterations)
+        gzip_size = len(compress(body, 'gzip')[0])
+
+        if BROTLI_AVAILABLE:
+            br_us = time_per_call(lambda: compress(body, 'br'), args.iterations)
+            br = f"{br_us:>8.0f}us"
+            br_size = f", br {len(compress(body, 'br')[0]) / 1024:.1f} KB"
+        else:
+            br, br_size = f"{'-':>10}", ""
+
+        print(f"{n_results:>4} {len(body) / 1024:>6.1f} KB {default_us:>8.0f}us "
+              f"{fast_us:>8.0f}us {fragments_us:>8.0f}us {gzip_us:>8.0f}us {br}")
+        print(f"{'':>4} compressed: gzip {gzip_size / 1024:.1f} KB{br_size}")
+
+    print("\n💡 'fragments' is the /search fast path once chunk bodies are cached; "
+          "compression time is added on top of it.")
+
+
+if __name__ == "__main__":
+    main()
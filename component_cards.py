@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Component Card Builder for Vuetify RAG
+Precomputes a structured card (props, examples, usage, slots, events) for
+every component in the chunk corpus so component lookups are a dictionary
+hit instead of a vector search.
+"""
+
+import json
+import os
+import re
+import argparse
+from typing import List, Dict, Any, Optional
+
+# Maximum entries kept per card section
+SECTION_LIMITS = {
+    'props': 2,
+    'examples': 3,
+    'slots': 2,
+    'events': 2,
+}
+
+# Explicit chunk content types and the card section they feed
+CONTENT_TYPE_SECTIONS = {
+    'api_reference': 'props',
+    'code_example': 'examples',
+    'slots_reference': 'slots',
+    'events_reference': 'events',
+}
+
+
+def _chunk_text(chunk: Dict[str, Any]) -> str:
+    """Chunk body without the embedding header"""
+    return chunk.get('display_content') or chunk.get('text', '')
+
+
+def _classify(chunk: Dict[str, Any]) -> Optional[str]:
+    """Card section for a chunk, mirroring the /component/{name} heuristics"""
+    metadata = chunk.get('metadata', {})
+    section = CONTENT_TYPE_SECTIONS.get(metadata.get('content_type'))
+    if section:
+        return section
+
+    content = _chunk_text(chunk)
+    content_lower = content.lower()
+    if 'props' in content_lower or 'properties' in content_lower:
+        return 'props'
+    elif 'example' in content_lower or '<template>' in content:
+        return 'examples'
+    elif 'usage' in content_lower or metadata.get('content_type') == 'usage_guide':
+        return 'usage'
+    return None
+
+
+def _alias_strength(alias: str, component: str, overview: str) -> int:
+    """How clearly a card's overview claims a backticked `v-*` name
+
+    3 when the card is the alias's plural (v-alert -> v-alerts); otherwise
+    one point each for the card name starting with the alias and for the
+    overview introducing it as "The `v-x` component". 0 means a passing
+    mention ("a modified `v-dialog`"), which never makes an alias.
+    """
+    if component.startswith(alias) and component[len(alias):] in ('s', 'es'):
+        return 3
+    strength = 0
+    if component.startswith(alias):
+        strength += 1
+    if re.search(rf'(?:^|[.!?]\s+)The `{re.escape(alias)}` component', overview, re.MULTILINE):
+        strength += 1
+    return strength
+
+
+def build_component_cards(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Build one card per component from embedding-ready chunks"""
+    cards = {}
+    # alias -> {component: strength} for every card claiming the alias
+    claims = {}
+
+    for chunk in chunks:
+        metadata = chunk.get('metadata', {})
+        component = metadata.get('component')
+        if not component:
+            continue
+
+        card = cards.setdefault(component, {
+            'component': component,
+            'overview': '',
+            'props': [],
+            'examples': [],
+            'usage': '',
+            'slots': [],
+            'events': [],
+            'found_chunks': 0,
+        })
+        card['found_chunks'] += 1
+        content = _chunk_text(chunk)
+
+        if metadata.get('content_type') == 'component_overview':
+            if not card['overview']:
+                card['overview'] = content
+                for alias in set(re.findall(r'`(v-[a-z-]+)`', content)) - {component}:
+                    strength = _alias_strength(alias, component, content)
+                    if strength:
+                        claims.setdefault(alias, {})[component] = strength
+            continue
+
+        section = _classify(chunk)
+        if section == 'usage':
+            if not card['usage']:
+                card['usage'] = content
+        elif section and len(card[section]) < SECTION_LIMITS[section]:
+            card[section].append(content)
+
+    # The strongest claim wins; ties are ambiguous and dropped. Aliases
+    # never shadow a real component.
+    aliases = {}
+    for alias, claimants in claims.items():
+        if alias in cards:
+            continue
+        best = max(claimants.values())
+        winners = [component for component, strength in claimants.items() if strength == best]
+        if len(winners) == 1:
+            aliases[alias] = winners[0]
+
+    return {'components': cards, 'aliases': aliases}
+
+
+class ComponentCardStore:
+    """In-memory component cards keyed by component name"""
+
+    def __init__(self, cards: Optional[Dict[str, Any]] = None):
+        """Initialize from a build_component_cards() result"""
+        cards = cards or {}
+        self.cards = cards.get('components', {})
+        self.aliases = cards.get('aliases', {})
+
+    @classmethod
+    def load(cls, cards_file: str = "component_cards.json",
+             chunks_file: str = "vuetify_chunks_embedding_ready.json") -> 'ComponentCardStore':
+        """Load prebuilt cards, building them from the chunks file if missing"""
+        if os.path.exists(cards_file):
+            with open(cards_file, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+
+        if os.path.exists(chunks_file):
+            print(f"💡 {cards_file} not found, building cards from {chunks_file}")
+            with open(chunks_file, 'r', encoding='utf-8') as f:
+                return cls(build_component_cards(json.load(f)))
+
+        return cls()
+
+    def get(self, component_name: str) -> Optional[Dict[str, Any]]:
+        """Card for a component name or alias"""
+        name = component_name.lower()
+        return self.cards.get(name) or self.cards.get(self.aliases.get(name, ''))
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute Vuetify component cards')
+    parser.add_argument('--chunks-file', '-f',
+                       default='vuetify_chunks_embedding_ready.json',
+                       help='Path to chunks JSON file')
+    parser.add_argument('--output', '-o',
+                       default='component_cards.json',
+                       help='Where to write the component cards')
+
+    args = parser.parse_args()
+
+    print(f"📄 Loading chunks from: {args.chunks_file}")
+    with open(args.chunks_file, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+
+    cards = build_component_cards(chunks)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(cards, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Built {len(cards['components'])} component cards "
+          f"({len(cards['aliases'])} aliases) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
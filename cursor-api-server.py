@@ -5,6 +5,7 @@ Turns your Vuetify RAG into a coding assistant API
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
@@ -15,8 +16,11 @@ import time
 # Import your existing RAG system
 try:
     from simple_rag_interface import VuetifyRAG
-except ImportError:
-    print("❌ simple_rag_interface.py not found. Make sure it's in the same directory.")
+    from component_cards import ComponentCardStore
+    from metrics import REGISTRY, CACHE_HITS, MetricsMiddleware
+except ImportError as e:
+    print(f"❌ Failed to import RAG components: {e}")
+    print("Make sure simple_rag_interface.py, component_cards.py and metrics.py are in the same directory.")
     exit(1)
 
 app = FastAPI(
@@ -33,10 +37,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Global RAG system
 rag_system = None
 
+# Precomputed component cards (build with: python component_cards.py)
+component_cards = ComponentCardStore()
+
 class QueryRequest(BaseModel):
     query: str
     context: Optional[str] = None  # Code context from Cursor
@@ -53,7 +61,7 @@ class CodeAssistantResponse(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG system on startup"""
-    global rag_system
+    global rag_system, component_cards
     print("🚀 Initializing Vuetify RAG system...")
     try:
         rag_system = VuetifyRAG()
@@ -61,6 +69,9 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Failed to load RAG system: {e}")
         raise
+    
+    component_cards = ComponentCardStore.load()
+    print(f"✅ Loaded {len(component_cards)} component cards")
 
 @app.get("/")
 async def root():
@@ -77,6 +88,11 @@ async def root():
         }
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health_check():
     """System health check"""
@@ -150,11 +166,17 @@ async def search_documentation(q: str, limit: int = 5):
 async def get_component_info(component_name: str):
     """Get specific component information"""
     
+    # Precomputed card: O(1) lookup, no vector search
+    card = component_cards.get(component_name)
+    if card:
+        CACHE_HITS.inc(cache="component_cards")
+        return card
+    
     if rag_system is None:
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        # Search for component-specific information
+        # Fall back to searching for component-specific information
         result = rag_system.search(
             f"{component_name} props usage examples",
             component_filter=component_name
@@ -185,6 +207,8 @@ async def get_component_info(component_name: str):
             "found_chunks": len(result)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
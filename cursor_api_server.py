@@ -8,12 +8,19 @@ import os
 import sys
 import json
 import time
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response, PlainTextResponse, FileResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 import uvicorn
 
@@ -32,6 +39,12 @@ try:
     
     EnhancedVuetifyRAG = enhanced_module.EnhancedVuetifyRAG
     
+    from singleflight import SingleFlight, normalize_query
+    from admission import AdmissionController, Overloaded
+    from serialization import FragmentCache, dumps, encode_payload, json_response
+    from metrics import REGISTRY, CACHE_HITS, MetricsMiddleware, timed
+    from tracing import TracingMiddleware, configure_from_env
+    
 except ImportError as e:
     print(f"❌ Failed to import RAG components: {e}")
     print("Make sure enhanced_query_processor.py and simple_rag_interface.py are available")
@@ -42,9 +55,16 @@ class QueryRequest(BaseModel):
     query: str
     context: Optional[str] = None
     component_filter: Optional[str] = None
+    content_type_filter: Optional[str] = None
+    language_filter: Optional[str] = None
     n_results: Optional[int] = 5
+    diversity: Optional[float] = None
     use_enhanced: Optional[bool] = True
 
+class BatchRequest(BaseModel):
+    requests: List[QueryRequest]
+    stream: Optional[bool] = False  # Stream results as NDJSON lines
+
 class QueryResponse(BaseModel):
     query: str
     response: str
@@ -53,6 +73,7 @@ class QueryResponse(BaseModel):
     timestamp: str
     analysis: Optional[Dict[str, Any]] = None
     context_used: Optional[str] = None
+    degraded: Optional[bool] = None  # True when served search-only under load
 
 class HealthResponse(BaseModel):
     status: str
@@ -60,6 +81,7 @@ class HealthResponse(BaseModel):
     database_status: str
     total_documents: int
     server_uptime: float
+    llm_queue: Optional[Dict[str, Any]] = None
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -77,10 +99,212 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms and 5xx counts (exposed on /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Sampled request traces (RAG_TRACE_SAMPLE, RAG_TRACE_FILE, RAG_TRACE_OTLP_ENDPOINT)
+tracer = configure_from_env()
+app.add_middleware(TracingMiddleware)
+
 # Global RAG system instance
 rag_system = None
+# Analytics database (RAG_ANALYTICS_DB) and its cached reports, when configured
+analytics = None
+report_cache = None
 server_start_time = time.time()
 
+# Blocking work (Chroma queries, embedding, OpenAI calls) runs on a bounded
+# thread pool so a slow LLM call never stalls the event loop
+worker_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RAG_WORKER_THREADS", "8")),
+    thread_name_prefix="rag-worker"
+)
+
+# Batch endpoints: request cap and concurrent LLM calls per batch
+BATCH_MAX_REQUESTS = int(os.getenv("RAG_BATCH_MAX", "50"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("RAG_BATCH_LLM_CONCURRENCY", "4"))
+
+# Identical concurrent /ask and /search requests share one computation
+coalescer = SingleFlight()
+
+def _coalesce_key(endpoint: str, request: QueryRequest, query: str) -> tuple:
+    """Key identifying requests that produce the same result"""
+    return (
+        endpoint,
+        normalize_query(query),
+        request.n_results,
+        request.component_filter,
+        request.content_type_filter,
+        request.language_filter,
+        request.diversity,
+        request.use_enhanced,
+    )
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the worker pool and await its result
+    
+    The caller's context is copied so the worker sees the request's trace.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        worker_pool, functools.partial(context.run, func, *args, **kwargs)
+    )
+
+# Admission control for the LLM path: bounded concurrency and wait queue,
+# fast 503 when saturated, search-only answers when the queue grows long
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("RAG_LLM_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("RAG_LLM_QUEUE", "16")),
+    queue_timeout=float(os.getenv("RAG_LLM_QUEUE_TIMEOUT", "10")),
+    degrade_queue_depth=int(os.getenv("RAG_DEGRADE_QUEUE_DEPTH", "8"))
+)
+
+async def run_admitted(func, *args, **kwargs):
+    """Run a blocking LLM-path call once admission control grants a slot"""
+    async with admission.slot():
+        return await run_blocking(func, *args, **kwargs)
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    """503 with Retry-After for a rejected request"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Server busy: {e.reason}",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _degraded_query(query: str, request: QueryRequest) -> Dict[str, Any]:
+    """Search-only answer used when the LLM queue is too long"""
+    search_results = rag_system.base_rag.search(
+        query,
+        n_results=request.n_results,
+        component_filter=request.component_filter,
+        content_type_filter=request.content_type_filter,
+        diversity=request.diversity
+    )
+    return {
+        'response': rag_system.base_rag._format_simple_response(search_results),
+        'sources': rag_system.base_rag.format_sources(search_results),
+        'degraded': True
+    }
+
+# Serialized chunk bodies, reused across /search and /batch/search payloads
+fragment_cache = FragmentCache()
+
+def _cache_generation():
+    """Chunk cache generation, used to invalidate cached fragments
+    
+    VuetifyRAG.cache_generation only ever grows (reindex, upsert, delete);
+    metadata_index.version restarts with every rebuilt index, and chunk ids
+    are stable across reindexes, so it cannot tell old fragments apart.
+    """
+    return rag_system.base_rag.cache_generation if rag_system else None
+
+def _encoded_response(http_request: Request, payload: Dict[str, Any],
+                      results_key: Optional[str] = None) -> Response:
+    """Encode a payload (splicing cached result fragments) and compress it"""
+    with timed("serialization"):
+        body = encode_payload(payload, results_key, fragment_cache, _cache_generation())
+        return json_response(body, http_request.headers.get("accept-encoding"))
+
+def _collect_server_metrics():
+    """Scrape-time metrics for state tracked by the server's components"""
+    queue = admission.snapshot()
+    yield ("rag_llm_active", "gauge", "Requests holding an LLM slot",
+           [({}, queue["active"])])
+    yield ("rag_llm_queue_depth", "gauge", "Requests waiting for an LLM slot",
+           [({}, queue["queue_depth"])])
+    yield ("rag_llm_admission_total", "counter", "LLM admission outcomes",
+           [({"outcome": outcome}, queue[outcome])
+            for outcome in ("admitted", "rejected", "timed_out", "degraded")])
+    yield ("rag_coalesce_inflight", "gauge", "Distinct coalesced computations running",
+           [({}, coalescer.inflight)])
+    yield ("rag_coalesce_total", "counter", "Coalesced requests by role",
+           [({"role": "leader"}, coalescer.started_count),
+            ({"role": "follower"}, coalescer.shared_count)])
+    yield ("rag_fragment_cache_total", "counter", "Serialized chunk fragment lookups",
+           [({"result": "hit"}, fragment_cache.hits),
+            ({"result": "miss"}, fragment_cache.misses)])
+    
+    if rag_system is not None:
+        caches = {
+            "search": rag_system.base_rag.retrieval_cache,
+            "query_response": rag_system.base_rag.response_cache,
+            "enhanced_retrieval": rag_system.retrieval_cache,
+            "enhanced_response": rag_system.response_cache,
+        }
+        yield ("rag_query_cache_total", "counter", "Query cache lookups",
+               [({"cache": name, "result": result}, count)
+                for name, cache in caches.items()
+                for result, count in (("hit", cache.hits), ("miss", cache.misses))])
+        yield ("rag_query_cache_entries", "gauge", "Entries held in each query cache",
+               [({"cache": name}, len(cache)) for name, cache in caches.items()])
+    
+    reranker = rag_system.base_rag.reranker if rag_system else None
+    if reranker is not None:
+        yield ("rag_rerank_total", "counter", "Reranking outcomes",
+               [({"outcome": "reranked"}, reranker.reranked_count),
+                ({"outcome": "fallback"}, reranker.fallback_count),
+                ({"outcome": "skipped"}, reranker.skipped_count)])
+
+REGISTRY.register_callback(_collect_server_metrics)
+
+# Readiness: stays false until models are loaded and the index is warm
+warmup_state = {"ready": False, "error": None, "timings": {}, "prewarm": None}
+
+def _setup_analytics(analytics_db: str):
+    """Open the analytics database for cache pre-warming and /analytics/report
+    
+    Runs in the warmup thread: opening may migrate the schema and rebuild
+    the rollups, which must not block the event loop.
+    """
+    global analytics, report_cache
+    from rag_analytics import RAGAnalytics
+    from query_cache import CachePrewarmer
+    from analytics_reporting import ReportCache
+    
+    analytics = RAGAnalytics(analytics_db, async_writes=False)
+    # Each pre-warmed response is a paid LLM call, made on every start of
+    # every worker, so only retrieval is pre-warmed unless asked for
+    rag_system.prewarmer = CachePrewarmer(
+        rag_system,
+        analytics,
+        limit=int(os.getenv("RAG_PREWARM_QUERIES", "50")),
+        responses=int(os.getenv("RAG_PREWARM_RESPONSES", "0"))
+    )
+    report_cache = ReportCache(
+        analytics,
+        os.getenv("RAG_REPORT_DIR") or os.path.join(
+            os.path.dirname(os.path.abspath(analytics_db)), "reports"
+        ),
+        min_interval=float(os.getenv("RAG_REPORT_INTERVAL", "60"))
+    )
+
+def _run_warmup():
+    """Warm the RAG system (runs in a worker thread after startup)"""
+    try:
+        warmup_state["timings"] = rag_system.base_rag.warmup()
+        
+        # RAG_ANALYTICS_DB: pre-warm caches with the most popular logged
+        # queries at startup and after every refresh_indexes(), and serve
+        # /analytics/report
+        analytics_db = os.getenv("RAG_ANALYTICS_DB")
+        if analytics_db and os.path.exists(analytics_db):
+            try:
+                _setup_analytics(analytics_db)
+            except Exception as e:
+                print(f"⚠️  Analytics database unavailable: {e}")
+        if rag_system.prewarmer is not None:
+            try:
+                warmup_state["prewarm"] = rag_system.prewarmer.run()
+            except Exception as e:
+                # Cold caches are slower, not broken
+                print(f"⚠️  Cache pre-warming failed: {e}")
+        warmup_state["ready"] = True
+    except Exception as e:
+        warmup_state["error"] = str(e)
+        print(f"❌ Warmup failed: {e}")
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize RAG system on startup"""
@@ -91,7 +315,19 @@ async def startup_event():
     try:
         # Initialize base RAG
         print("📚 Loading Vuetify documentation database...")
-        base_rag = VuetifyRAG()
+        reranker = None
+        if os.getenv("RAG_RERANK", "").lower() in ("1", "true", "yes"):
+            from reranking import CrossEncoderReranker
+            print("🎯 Loading cross-encoder reranker...")
+            reranker = CrossEncoderReranker(
+                time_budget=float(os.getenv("RAG_RERANK_BUDGET", "0.3"))
+            )
+        # RAG_SHARED_INDEX: map a shared_index.py export instead of opening
+        # ChromaDB, so uvicorn --workers N shares one copy of the index
+        base_rag = VuetifyRAG(
+            reranker=reranker,
+            shared_index_path=os.getenv("RAG_SHARED_INDEX") or None
+        )
         
         # Initialize enhanced RAG
         print("🧠 Setting up enhanced query processing...")
@@ -102,6 +338,17 @@ async def startup_event():
     except Exception as e:
         print(f"❌ Failed to initialize RAG system: {e}")
         raise e
+    
+    # Warm up in the background so /health answers while /ready stays red
+    print("🔥 Warming up models and index...")
+    asyncio.get_running_loop().run_in_executor(worker_pool, _run_warmup)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop accepting blocking work"""
+    worker_pool.shutdown(wait=False, cancel_futures=True)
+    if analytics is not None:
+        analytics.close()
 
 @app.get("/", response_model=Dict[str, str])
 async def root():
@@ -113,6 +360,11 @@ async def root():
         "health": "/health"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint"""
@@ -123,7 +375,7 @@ async def health_check():
     
     try:
         # Check database status
-        doc_count = rag_system.base_rag.collection.count()
+        doc_count = await run_blocking(rag_system.base_rag.document_count)
         db_status = "healthy"
     except Exception as e:
         doc_count = 0
@@ -134,9 +386,30 @@ async def health_check():
         timestamp=datetime.now().isoformat(),
         database_status=db_status,
         total_documents=doc_count,
-        server_uptime=time.time() - server_start_time
+        server_uptime=time.time() - server_start_time,
+        llm_queue=admission.snapshot()
     )
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until warmup has finished"""
+    if not rag_system or not warmup_state["ready"]:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "ready": False,
+                "error": warmup_state["error"],
+                "timestamp": datetime.now().isoformat()
+            }
+        )
+    
+    return {
+        "ready": True,
+        "warmup_timings": warmup_state["timings"],
+        "prewarm": warmup_state["prewarm"],
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/ask", response_model=QueryResponse)
 async def ask_vuetify(request: QueryRequest):
     """Main query endpoint for Vuetify questions"""
@@ -148,27 +421,34 @@ async def ask_vuetify(request: QueryRequest):
     start_time = time.time()
     
     try:
-        # Prepare query with context if provided
-        query = request.query
-        if request.context:
-            # Enhance query with context
-            context_summary = request.context[:200] + "..." if len(request.context) > 200 else request.context
-            query = f"Given this context: {context_summary}\n\nQuestion: {request.query}"
+        query = _prepare_query(request)
         
         # Execute query
-        if request.use_enhanced:
-            result = rag_system.smart_query(
+        endpoint = "ask"
+        if admission.should_degrade():
+            compute = lambda: run_blocking(_degraded_query, query, request)
+            endpoint = "ask-degraded"
+        elif request.use_enhanced:
+            compute = lambda: run_admitted(
+                rag_system.smart_query,
                 query, 
-                n_results=request.n_results
+                n_results=request.n_results,
+                diversity=request.diversity
             )
-            analysis = result.get('analysis')
         else:
-            result = rag_system.base_rag.query(
+            compute = lambda: run_admitted(
+                rag_system.base_rag.query,
                 query,
                 n_results=request.n_results,
-                component_filter=request.component_filter
+                component_filter=request.component_filter,
+                content_type_filter=request.content_type_filter,
+                diversity=request.diversity
             )
-            analysis = None
+        
+        result = await coalescer.do(_coalesce_key(endpoint, request, query), compute)
+        analysis = result.get('analysis')
+        if result.get('degraded'):
+            admission.record_degraded()
         
         response_time = time.time() - start_time
         
@@ -179,14 +459,168 @@ async def ask_vuetify(request: QueryRequest):
             response_time=response_time,
             timestamp=datetime.now().isoformat(),
             analysis=analysis,
-            context_used=request.context[:100] + "..." if request.context and len(request.context) > 100 else request.context
+            context_used=request.context[:100] + "..." if request.context and len(request.context) > 100 else request.context,
+            degraded=result.get('degraded')
         )
         
+    except Overloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+def _prepare_query(request: QueryRequest) -> str:
+    """Prepare query with context if provided"""
+    query = request.query
+    if request.context:
+        # Enhance query with context
+        context_summary = request.context[:200] + "..." if len(request.context) > 200 else request.context
+        query = f"Given this context: {context_summary}\n\nQuestion: {request.query}"
+    return query
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _pump_tokens(tokens, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue,
+                 cancelled: threading.Event):
+    """Drain a blocking token iterator into an asyncio queue (runs on the worker pool)
+    
+    Puts ("token", text) per token, then ("done", None) or ("error", detail).
+    Stops once `cancelled` is set; the iterator is closed either way, which
+    closes the upstream OpenAI stream.
+    """
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            pass  # Event loop already closed
+    
+    try:
+        for token in tokens:
+            if cancelled.is_set():
+                break
+            put(("token", token))
+        put(("done", None))
+    except Exception as e:
+        put(("error", str(e)))
+    finally:
+        close = getattr(tokens, "close", None)
+        if close is not None:
+            close()
+
+@app.post("/ask/stream")
+async def ask_vuetify_stream(request: QueryRequest):
+    """Streaming query endpoint: sources first, then LLM tokens as SSE"""
+    global rag_system
+    
+    if not rag_system:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    start_time = time.time()
+    
+    try:
+        query = _prepare_query(request)
+        
+        # Retrieval happens up front so sources can be sent immediately
+        degraded = admission.should_degrade()
+        if degraded:
+            results = await run_blocking(
+                rag_system.base_rag.search,
+                query,
+                n_results=request.n_results,
+                component_filter=request.component_filter,
+                content_type_filter=request.content_type_filter,
+                diversity=request.diversity
+            )
+            tokens = iter([rag_system.base_rag._format_simple_response(results)])
+            analysis = None
+            admission.record_degraded()
+        elif request.use_enhanced:
+            analysis, results = await run_blocking(
+                rag_system.retrieve,
+                query,
+                n_results=request.n_results,
+                diversity=request.diversity
+            )
+            tokens = rag_system.stream_contextual_response(query, results, analysis)
+            analysis = rag_system.summarize_analysis(analysis)
+        else:
+            results = await run_blocking(
+                rag_system.base_rag.search,
+                query,
+                n_results=request.n_results,
+                component_filter=request.component_filter,
+                content_type_filter=request.content_type_filter,
+                diversity=request.diversity
+            )
+            tokens = rag_system.base_rag.generate_response_stream(query, results)
+            analysis = None
+        
+        if not results:
+            tokens = iter(["No relevant documentation found."])
+        
+        # Hold an LLM slot for the whole stream (decided before headers are sent)
+        acquired_at = None
+        if not degraded and results:
+            acquired_at = await admission.acquire()
+        
+    except Overloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
+    
+    def release_slot():
+        nonlocal acquired_at
+        if acquired_at is not None:
+            admission.release(acquired_at)
+            acquired_at = None
+    
+    cancelled = threading.Event()
+    
+    async def event_stream():
+        try:
+            yield _sse_event("sources", {
+                "query": request.query,
+                "sources": rag_system.base_rag.format_sources(results),
+                "analysis": analysis,
+                "degraded": degraded
+            })
+            
+            # One worker task reads the blocking OpenAI stream for the whole
+            # response; tokens reach this coroutine through the queue
+            queue: asyncio.Queue = asyncio.Queue()
+            pump = asyncio.ensure_future(run_blocking(
+                _pump_tokens, tokens, asyncio.get_running_loop(), queue, cancelled
+            ))
+            while True:
+                kind, value = await queue.get()
+                if kind == "token":
+                    yield _sse_event("token", {"text": value})
+                    continue
+                if kind == "error":
+                    yield _sse_event("error", {"detail": value})
+                break
+            
+            yield _sse_event("done", {
+                "response_time": time.time() - start_time,
+                "timestamp": datetime.now().isoformat()
+            })
+        finally:
+            # Client gone or stream finished: stop the worker, which closes the
+            # generator and the OpenAI response
+            cancelled.set()
+            release_slot()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also release if the stream never started (client went away)
+        background=BackgroundTask(release_slot)
+    )
+
 @app.post("/search", response_model=Dict[str, Any])
-async def search_docs(request: QueryRequest):
+async def search_docs(request: QueryRequest, http_request: Request):
     """Search-only endpoint (no AI response generation)"""
     global rag_system
     
@@ -197,27 +631,271 @@ async def search_docs(request: QueryRequest):
     
     try:
         # Perform search
-        search_results = rag_system.base_rag.search(
-            request.query,
-            n_results=request.n_results,
-            component_filter=request.component_filter
+        search_results = await coalescer.do(
+            _coalesce_key("search", request, request.query),
+            lambda: run_blocking(
+                rag_system.base_rag.search,
+                request.query,
+                n_results=request.n_results,
+                component_filter=request.component_filter,
+                content_type_filter=request.content_type_filter,
+                language_filter=request.language_filter,
+                diversity=request.diversity
+            )
         )
         
         response_time = time.time() - start_time
         
-        return {
+        # Bypass response_model validation: results are spliced in from
+        # cached fragments and the body is compressed off the event loop
+        return await run_blocking(_encoded_response, http_request, {
             "query": request.query,
-            "results": search_results,
             "num_results": len(search_results),
             "response_time": response_time,
-            "timestamp": datetime.now().isoformat()
-        }
+            "timestamp": datetime.now().isoformat(),
+            "results": search_results
+        }, "results")
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+# Aggregates change only on reindex, so dashboards can poll cheaply
+AGGREGATE_CACHE_CONTROL = "public, max-age=30"
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header ('*' or a list of tags)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def _cached_json(request: Request, payload_factory, etag: str) -> Response:
+    """Serve a JSON payload with an ETag, answering 304 when it still matches
+    
+    The ETag is weak: gzip and identity bodies carry the same tag, and
+    Vary tells caches to key them by Accept-Encoding.
+    """
+    etag = f'W/"{etag}"'
+    headers = {"ETag": etag, "Cache-Control": AGGREGATE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        CACHE_HITS.inc(cache="etag_304")
+        return Response(status_code=304, headers=headers)
+    
+    return json_response(dumps(payload_factory()), request.headers.get("accept-encoding"),
+                         headers=headers)
+
+async def _scan_metadata_counts(missing: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """Count components and content types with a full scan (no index available)
+    
+    Chunks without a value are counted under `missing` when it is set, as
+    MetadataIndex.values() does.
+    """
+    results = await run_blocking(rag_system.base_rag.collection.get, include=['metadatas'])
+    counts = {'component': {}, 'content_type': {}}
+    
+    for metadata in results['metadatas']:
+        for field in counts:
+            value = metadata.get(field) or missing
+            if value is not None:
+                counts[field][value] = counts[field].get(value, 0) + 1
+    
+    return counts
+
+def _search_spec(request: QueryRequest, query: Optional[str] = None) -> Dict[str, Any]:
+    """Search parameters for VuetifyRAG.search_batch"""
+    return {
+        'query': query or request.query,
+        'n_results': request.n_results,
+        'component_filter': request.component_filter,
+        'content_type_filter': request.content_type_filter,
+        'language_filter': request.language_filter,
+        'diversity': request.diversity,
+    }
+
+def _check_batch(batch: BatchRequest):
+    """Validate batch size"""
+    if not rag_system:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    if not batch.requests:
+        raise HTTPException(status_code=400, detail="Batch contains no requests")
+    if len(batch.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large ({len(batch.requests)} > {BATCH_MAX_REQUESTS})"
+        )
+
+def _ndjson_response(items) -> StreamingResponse:
+    """Stream an async iterator of dicts as newline-delimited JSON"""
+    async def lines():
+        async for item in items:
+            if "results" in item and "num_results" in item:
+                yield encode_payload(item, "results", fragment_cache, _cache_generation()) + b"\n"
+            else:
+                yield dumps(item) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/batch/search")
+async def batch_search(batch: BatchRequest, http_request: Request):
+    """Search many queries with one batched embedding and vector query"""
+    _check_batch(batch)
+    start_time = time.time()
+    
+    try:
+        batch_results = await run_blocking(
+            rag_system.base_rag.search_batch,
+            [_search_spec(request) for request in batch.requests]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+    
+    items = [
+        {
+            "index": i,
+            "query": request.query,
+            "results": results,
+            "num_results": len(results)
+        }
+        for i, (request, results) in enumerate(zip(batch.requests, batch_results))
+    ]
+    
+    if batch.stream:
+        async def stream_items():
+            for item in items:
+                yield item
+        return _ndjson_response(stream_items())
+    
+    payload = {
+        "num_requests": len(items),
+        "response_time": time.time() - start_time,
+        "timestamp": datetime.now().isoformat(),
+        "results": items
+    }
+    return await run_blocking(_encode_batch_search, http_request, payload)
+
+def _encode_batch_search(http_request: Request, payload: Dict[str, Any]) -> Response:
+    """Encode a batch search payload, reusing fragments for every item"""
+    version = _cache_generation()
+    with timed("serialization"):
+        items = b",".join(
+            encode_payload(item, "results", fragment_cache, version) for item in payload["results"]
+        )
+        head = {key: value for key, value in payload.items() if key != "results"}
+        body = dumps(head)[:-1] + b',"results":[' + items + b"]}"
+        return json_response(body, http_request.headers.get("accept-encoding"))
+
+@app.post("/batch/ask")
+async def batch_ask(batch: BatchRequest):
+    """Answer many queries: batched retrieval, bounded-concurrency LLM calls"""
+    _check_batch(batch)
+    start_time = time.time()
+    queries = [_prepare_query(request) for request in batch.requests]
+    
+    # Basic requests share one batched search; enhanced ones share one
+    # batched stage 1 before their per-query multi-stage retrieval
+    basic = [i for i, request in enumerate(batch.requests) if not request.use_enhanced]
+    enhanced = [i for i, request in enumerate(batch.requests) if request.use_enhanced]
+    retrieved = {}
+    try:
+        if basic:
+            basic_results = await run_blocking(
+                rag_system.base_rag.search_batch,
+                [_search_spec(batch.requests[i], queries[i]) for i in basic]
+            )
+            retrieved.update(zip(basic, basic_results))
+        if enhanced:
+            enhanced_results = await run_blocking(rag_system.retrieve_batch, [
+                {
+                    'query': queries[i],
+                    'n_results': batch.requests[i].n_results,
+                    'diversity': batch.requests[i].diversity,
+                }
+                for i in enhanced
+            ])
+            retrieved.update(zip(enhanced, enhanced_results))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch retrieval failed: {str(e)}")
+    
+    semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+    
+    async def answer(i: int) -> Dict[str, Any]:
+        request = batch.requests[i]
+        item_start = time.time()
+        try:
+            degraded = None
+            async with semaphore:
+                # Checked per item, as /ask does, so a long batch backs off
+                # once the LLM queue fills up
+                if admission.should_degrade():
+                    result = await run_blocking(_degraded_query, queries[i], request)
+                    response, sources = result['response'], result['sources']
+                    analysis, degraded = None, True
+                    admission.record_degraded()
+                elif request.use_enhanced:
+                    result = await run_admitted(
+                        rag_system.smart_query,
+                        queries[i],
+                        n_results=request.n_results,
+                        diversity=request.diversity,
+                        retrieved=retrieved[i]
+                    )
+                    response, sources = result['response'], result['sources']
+                    analysis = result.get('analysis')
+                else:
+                    results = retrieved[i]
+                    response = (
+                        await run_admitted(rag_system.base_rag.generate_response, queries[i], results)
+                        if results else "No relevant documentation found."
+                    )
+                    sources = rag_system.base_rag.format_sources(results)
+                    analysis = None
+            
+            item = QueryResponse(
+                query=request.query,
+                response=response,
+                sources=sources,
+                response_time=time.time() - item_start,
+                timestamp=datetime.now().isoformat(),
+                analysis=analysis,
+                context_used=request.context[:100] + "..." if request.context and len(request.context) > 100 else request.context,
+                degraded=degraded
+            ).model_dump()
+        except Overloaded as e:
+            item = {"query": request.query, "error": f"Server busy: {e.reason}",
+                    "retry_after": e.retry_after}
+        except Exception as e:
+            item = {"query": request.query, "error": f"Query processing failed: {str(e)}"}
+        
+        return {"index": i, **item}
+    
+    tasks = [asyncio.create_task(answer(i)) for i in range(len(batch.requests))]
+    
+    if batch.stream:
+        async def stream_items():
+            # Emit in request order as soon as each answer is ready
+            for task in tasks:
+                yield await task
+        return _ndjson_response(stream_items())
+    
+    items = await asyncio.gather(*tasks)
+    
+    return {
+        "results": items,
+        "num_requests": len(items),
+        "response_time": time.time() - start_time,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/components")
-async def list_components():
+async def list_components(request: Request):
     """List available Vuetify components in the database"""
     global rag_system
     
@@ -225,16 +903,19 @@ async def list_components():
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        # Get all unique components from the database
-        results = rag_system.base_rag.collection.get()
-        components = set()
+        index = rag_system.base_rag.metadata_index
+        if index is not None:
+            # Served from aggregates maintained by the metadata index
+            return _cached_json(request, lambda: {
+                "components": sorted(index.values('component')),
+                "total_count": len(index.counts['component']),
+                "timestamp": index.updated_at
+            }, etag=f"components-{index.digest()}")
         
-        for metadata in results['metadatas']:
-            if 'component' in metadata:
-                components.add(metadata['component'])
+        components = (await _scan_metadata_counts())['component']
         
         return {
-            "components": sorted(list(components)),
+            "components": sorted(components),
             "total_count": len(components),
             "timestamp": datetime.now().isoformat()
         }
@@ -242,8 +923,19 @@ async def list_components():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list components: {str(e)}")
 
+def _stats_payload(total_documents: int, component_counts: Dict[str, int],
+                   content_type_counts: Dict[str, int], timestamp: str) -> Dict[str, Any]:
+    """Database statistics response body"""
+    return {
+        "total_documents": total_documents,
+        "total_components": len(component_counts),
+        "component_distribution": dict(sorted(component_counts.items(), key=lambda x: x[1], reverse=True)[:20]),
+        "content_type_distribution": content_type_counts,
+        "timestamp": timestamp
+    }
+
 @app.get("/stats")
-async def get_stats():
+async def get_stats(request: Request):
     """Get database statistics"""
     global rag_system
     
@@ -251,37 +943,77 @@ async def get_stats():
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        # Get all documents
-        results = rag_system.base_rag.collection.get()
-        
-        # Count by component
-        component_counts = {}
-        content_type_counts = {}
+        index = rag_system.base_rag.metadata_index
+        if index is not None:
+            # Served from aggregates maintained by the metadata index
+            return _cached_json(request, lambda: _stats_payload(
+                len(index),
+                index.values('component', missing='unknown'),
+                index.values('content_type', missing='unknown'),
+                index.updated_at
+            ), etag=f"stats-{index.digest()}")
         
-        for metadata in results['metadatas']:
-            component = metadata.get('component', 'unknown')
-            content_type = metadata.get('content_type', 'unknown')
-            
-            component_counts[component] = component_counts.get(component, 0) + 1
-            content_type_counts[content_type] = content_type_counts.get(content_type, 0) + 1
+        counts = await _scan_metadata_counts(missing='unknown')
         
-        return {
-            "total_documents": len(results['documents']),
-            "total_components": len(component_counts),
-            "component_distribution": dict(sorted(component_counts.items(), key=lambda x: x[1], reverse=True)[:20]),
-            "content_type_distribution": content_type_counts,
-            "timestamp": datetime.now().isoformat()
-        }
+        return _stats_payload(
+            sum(counts['component'].values()),
+            counts['component'],
+            counts['content_type'],
+            datetime.now().isoformat()
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
+@app.get("/analytics/report")
+async def analytics_report(http_request: Request, format: str = "html", days: int = 30):
+    """Analytics report as HTML or a JSON export (cached, rebuilt when logs change)"""
+    from analytics_reporting import REPORT_FORMATS
+    
+    if report_cache is None:
+        raise HTTPException(status_code=503, detail="Analytics not configured (set RAG_ANALYTICS_DB) or still loading")
+    if format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(sorted(REPORT_FORMATS))}")
+    if not 1 <= days <= 366:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 366")
+    
+    try:
+        path = await run_blocking(report_cache.get, format, days)
+        modified = os.path.getmtime(path)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate report: {str(e)}")
+    
+    etag = f'W/"report-{format}-{days}-{report_cache.version(format, days)}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": AGGREGATE_CACHE_CONTROL,
+    }
+    if_none_match = http_request.headers.get("if-none-match")
+    if (_etag_matches(if_none_match, etag) if if_none_match
+            else _not_modified_since(http_request.headers.get("if-modified-since"), modified)):
+        CACHE_HITS.inc(cache="etag_304")
+        return Response(status_code=304, headers=headers)
+    
+    # Streamed from disk in chunks, never loaded whole
+    return FileResponse(path, media_type=REPORT_FORMATS[format], headers=headers)
+
+def _not_modified_since(if_modified_since: Optional[str], modified: float) -> bool:
+    """True when an If-Modified-Since date is at or after the modification time"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and int(modified) <= since.timestamp()
+
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc):
     return JSONResponse(
         status_code=404,
-        content={"detail": "Endpoint not found", "available_endpoints": ["/", "/ask", "/search", "/health", "/components", "/stats"]}
+        content={"detail": "Endpoint not found", "available_endpoints": ["/", "/ask", "/ask/stream", "/search", "/batch/search", "/batch/ask", "/health", "/ready", "/metrics", "/components", "/stats", "/analytics/report"]}
     )
 
 @app.exception_handler(500)
@@ -297,10 +1029,16 @@ def main():
     print("=" * 40)
     print("Endpoints:")
     print("  POST /ask          - Ask Vuetify questions")
+    print("  POST /ask/stream   - Ask with streamed (SSE) response")
     print("  POST /search       - Search documentation")
+    print("  POST /batch/search - Search many queries at once")
+    print("  POST /batch/ask    - Ask many questions at once")
     print("  GET  /health       - Health check")
+    print("  GET  /ready        - Readiness (after warmup)")
+    print("  GET  /metrics      - Prometheus metrics")
     print("  GET  /components   - List components")
     print("  GET  /stats        - Database statistics")
+    print("  GET  /analytics/report - Analytics report (HTML or JSON)")
     print("  GET  /docs         - API documentation")
     print()
     
@@ -6,10 +6,14 @@ Adds intelligent query understanding and multi-stage retrieval
 
 import re
 import json
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from dataclasses import dataclass
 from enum import Enum
 
+from metrics import CACHE_HITS, timed, record_usage, record_scores
+from query_cache import LRUCache, cache_key
+from tracing import span, set_attribute
+
 class QueryType(Enum):
     """Types of queries the system can handle"""
     COMPONENT_USAGE = "component_usage"          # "How to use v-btn?"
@@ -236,81 +240,289 @@ class VuetifyQueryProcessor:
 class EnhancedVuetifyRAG:
     """Enhanced RAG system with query intelligence"""
     
-    def __init__(self, base_rag_system):
-        """Initialize with existing RAG system"""
+    def __init__(self, base_rag_system, diversity: Optional[float] = None,
+                 cache_size: int = 1024):
+        """Initialize with existing RAG system
+        
+        Args:
+            base_rag_system: VuetifyRAG instance used for retrieval
+            diversity: Default MMR diversity for final result selection
+                (None keeps plain similarity ordering)
+            cache_size: Entries kept in the retrieval cache (0 disables);
+                the response cache holds a quarter as many
+        """
         self.base_rag = base_rag_system
         self.query_processor = VuetifyQueryProcessor()
+        self.diversity = diversity
+        
+        # Keyed to base_rag.cache_generation, so both empty when chunks change
+        self.retrieval_cache = LRUCache(cache_size)
+        self.response_cache = LRUCache(cache_size // 4)
+        # Optional CachePrewarmer, re-run after refresh_indexes()
+        self.prewarmer = None
+    
+    def refresh_indexes(self):
+        """Refresh the base system after a reindex and re-warm the caches"""
+        self.base_rag.refresh_indexes()
+        if self.prewarmer is not None:
+            self.prewarmer.run()
+    
+    def prewarm(self, queries: List[str], responses: int = 0) -> Dict[str, int]:
+        """Populate the caches for queries as served by /search and /ask
+        
+        Every query gets base search results and multi-stage retrieval
+        cached; the first `responses` also get a smart_query() response.
+        """
+        self.base_rag.prewarm(queries)
+        for i, query in enumerate(queries):
+            if i < responses:
+                self.smart_query(query)
+            else:
+                self.retrieve(query)
+        return {'queries': len(queries), 'responses': min(responses, len(queries))}
     
-    def smart_query(self, user_query: str, n_results: int = 5) -> Dict[str, Any]:
-        """Process query with intelligence and multi-stage retrieval"""
+    def smart_query(self, user_query: str, n_results: int = 5,
+                    diversity: Optional[float] = None,
+                    retrieved: Optional[Tuple[QueryAnalysis, List[Dict[str, Any]]]] = None
+                    ) -> Dict[str, Any]:
+        """Process query with intelligence and multi-stage retrieval
+        
+        LLM responses are cached until the base system's chunks change.
+        `retrieved` is an (analysis, results) pair from retrieve_batch(),
+        used instead of retrieving again.
+        """
+        
+        key = cache_key(user_query, n_results=n_results, diversity=diversity)
+        cached = self.response_cache.get(key, self.base_rag.cache_generation)
+        if cached is not None:
+            CACHE_HITS.inc(cache='response')
+            result, scores = cached
+            record_scores(scores)
+            return dict(result)
+        
+        with span('enhanced.smart_query', n_results=n_results):
+            if retrieved is None:
+                retrieved = self.retrieve(user_query, n_results, diversity)
+            analysis, final_results = retrieved
+            
+            # Generate enhanced response
+            response, generated = self._complete_contextual_response(
+                user_query, final_results, analysis
+            )
         
-        # Analyze the query
-        analysis = self.query_processor.analyze_query(user_query)
+        result = {
+            'query': user_query,
+            'analysis': self.summarize_analysis(analysis),
+            'response': response,
+            'sources': self.base_rag.format_sources(final_results),
+            'search_strategy': 'multi_stage_intelligent'
+        }
+        # Fallback answers (no LLM, or a failed call) are not worth pinning
+        if generated:
+            scores = tuple(chunk['similarity_score'] for chunk in final_results)
+            self.response_cache.put(key, (result, scores), self.base_rag.cache_generation)
+        return dict(result)
+    
+    def retrieve(self, user_query: str, n_results: int = 5,
+                 diversity: Optional[float] = None) -> Tuple[QueryAnalysis, List[Dict[str, Any]]]:
+        """Analyze the query and run multi-stage retrieval (no generation)
+        
+        Results are cached until the base system's chunks change.
+        """
+        
+        if diversity is None:
+            diversity = self.diversity
+        
+        key = cache_key(user_query, n_results=n_results, diversity=diversity)
+        generation = self.base_rag.cache_generation
+        cached = self.retrieval_cache.get(key, generation)
+        if cached is not None:
+            CACHE_HITS.inc(cache='retrieval')
+            analysis, results = cached
+            record_scores(result['similarity_score'] for result in results)
+            return analysis, [dict(result) for result in results]
+        
+        analysis, final_results, reranked = self._retrieve(user_query, n_results, diversity)
+        # A reranker fallback (vector order) would pin the weaker order
+        if reranked:
+            self.retrieval_cache.put(
+                key, (analysis, [dict(result) for result in final_results]), generation
+            )
+        record_scores(result['similarity_score'] for result in final_results)
+        return analysis, final_results
+    
+    def retrieve_batch(self, requests: List[Dict[str, Any]]
+                       ) -> List[Tuple[QueryAnalysis, List[Dict[str, Any]]]]:
+        """retrieve() for several queries, with stage 1 run as one batched search
+        
+        Each request is a dict with 'query' and optionally 'n_results' and
+        'diversity'. The stage 1 (enhanced query) searches of all uncached
+        requests go through a single base_rag.search_batch() call, so the
+        batch pays for one embedding call instead of one per query; later
+        stages run per query. Results come back in request order.
+        """
+        generation = self.base_rag.cache_generation
+        reranker = self.base_rag.reranker
+        retrieved = [None] * len(requests)
+        pending = []
+        
+        for i, request in enumerate(requests):
+            n_results = request.get('n_results') or 5
+            diversity = request.get('diversity')
+            if diversity is None:
+                diversity = self.diversity
+            key = cache_key(request['query'], n_results=n_results, diversity=diversity)
+            cached = self.retrieval_cache.get(key, generation)
+            if cached is not None:
+                CACHE_HITS.inc(cache='retrieval')
+                analysis, results = cached
+                record_scores(result['similarity_score'] for result in results)
+                retrieved[i] = (analysis, [dict(result) for result in results])
+            else:
+                pending.append((i, key, n_results, diversity))
+        
+        if not pending:
+            return retrieved
+        
+        analyses = {i: self._analyze(requests[i]['query']) for i, _, _, _ in pending}
+        with span('retrieve.stage1', queries=len(pending)):
+            stage1 = self.base_rag.search_batch([
+                {
+                    'query': analyses[i].enhanced_query,
+                    'n_results': n_results * reranker.overfetch if reranker else n_results,
+                    'component_filter': analyses[i].suggested_filters.get('component'),
+                }
+                for i, _, n_results, _ in pending
+            ], include_embeddings=any(diversity for _, _, _, diversity in pending), rerank=False)
+        
+        for (i, key, n_results, diversity), stage1_results in zip(pending, stage1):
+            if not diversity:
+                for result in stage1_results:
+                    result.pop('embedding', None)
+            analysis, final_results, reranked = self._retrieve(
+                requests[i]['query'], n_results, diversity,
+                analysis=analyses[i], stage1_results=stage1_results
+            )
+            if reranked:
+                self.retrieval_cache.put(
+                    key, (analysis, [dict(result) for result in final_results]), generation
+                )
+            record_scores(result['similarity_score'] for result in final_results)
+            retrieved[i] = (analysis, final_results)
+        
+        return retrieved
+    
+    def _analyze(self, user_query: str) -> QueryAnalysis:
+        """Analyze a query ahead of retrieval"""
+        with timed('analysis'), span('retrieve.analysis'):
+            analysis = self.query_processor.analyze_query(user_query)
+            set_attribute('query_type', analysis.query_type.value)
         
         print(f"🧠 Query Analysis:")
         print(f"   Type: {analysis.query_type.value}")
         print(f"   Components: {analysis.components}")
         print(f"   Keywords: {analysis.keywords}")
         print(f"   Confidence: {analysis.intent_confidence:.2f}")
+        return analysis
+    
+    def _retrieve(self, user_query: str, n_results: int,
+                  diversity: Optional[float],
+                  analysis: Optional[QueryAnalysis] = None,
+                  stage1_results: Optional[List[Dict[str, Any]]] = None
+                  ) -> Tuple[QueryAnalysis, List[Dict[str, Any]], bool]:
+        """Uncached multi-stage retrieval behind retrieve()
+        
+        retrieve_batch() passes in the analysis and stage 1 results it
+        computed for the whole batch. Returns (analysis, results, reranked);
+        reranked is False only when the reranker fell back to vector order.
+        """
+        
+        include_embeddings = bool(diversity)
+        reranker = self.base_rag.reranker
+        
+        # Over-fetch in stage 1 when a second-stage reranker will pick the final set
+        fetch_k = n_results * reranker.overfetch if reranker else n_results
+        
+        # Analyze the query
+        if analysis is None:
+            analysis = self._analyze(user_query)
         
         # Multi-stage retrieval
         all_results = []
         
         # Stage 1: Enhanced query search
-        print(f"🔍 Stage 1: Enhanced semantic search...")
-        enhanced_results = self.base_rag.search(
-            analysis.enhanced_query, 
-            n_results=n_results,
-            component_filter=analysis.suggested_filters.get('component')
-        )
+        if stage1_results is None:
+            print(f"🔍 Stage 1: Enhanced semantic search...")
+            with span('retrieve.stage1'):
+                stage1_results = self.base_rag.search(
+                    analysis.enhanced_query, 
+                    n_results=fetch_k,
+                    component_filter=analysis.suggested_filters.get('component'),
+                    include_embeddings=include_embeddings,
+                    rerank=False
+                )
+        enhanced_results = stage1_results
         all_results.extend(enhanced_results)
         
         # Stage 2: Component-specific search (if components detected)
-        if analysis.components and len(enhanced_results) < n_results:
+        if analysis.components and len(enhanced_results) < fetch_k:
             print(f"🔍 Stage 2: Component-specific search...")
-            for component in analysis.components:
-                component_results = self.base_rag.search(
-                    user_query,
-                    n_results=3,
-                    component_filter=component
-                )
-                all_results.extend(component_results)
+            with span('retrieve.stage2', components=len(analysis.components)):
+                for component in analysis.components:
+                    component_results = self.base_rag.search(
+                        user_query,
+                        n_results=3,
+                        component_filter=component,
+                        include_embeddings=include_embeddings,
+                        rerank=False
+                    )
+                    all_results.extend(component_results)
         
         # Stage 3: Content-type specific search
         content_type = analysis.suggested_filters.get('content_type')
-        if content_type and len(all_results) < n_results:
+        if content_type and len(all_results) < fetch_k:
             print(f"🔍 Stage 3: Content-type search ({content_type})...")
-            # This would require extending the base RAG to filter by content_type
-            # For now, we'll use the enhanced query
+            with span('retrieve.stage3', content_type=content_type):
+                content_type_results = self.base_rag.search(
+                    analysis.enhanced_query,
+                    n_results=n_results,
+                    component_filter=analysis.suggested_filters.get('component'),
+                    content_type_filter=content_type,
+                    include_embeddings=include_embeddings,
+                    rerank=False
+                )
+            all_results.extend(content_type_results)
         
         # Remove duplicates and re-rank
-        unique_results = self._deduplicate_results(all_results)
-        final_results = unique_results[:n_results]
-        
-        # Generate enhanced response
-        response = self._generate_contextual_response(
-            user_query, final_results, analysis
-        )
+        with timed('dedup'), span('retrieve.dedup', candidates=len(all_results)):
+            unique_results = self._deduplicate_results(all_results)
+        reranked = True
+        if reranker:
+            keep_k = n_results * self.base_rag.mmr_fetch_multiplier if diversity else n_results
+            print(f"🔍 Stage 4: Cross-encoder reranking ({len(unique_results)} candidates)...")
+            with timed('rerank'), span('retrieve.rerank', candidates=len(unique_results)):
+                unique_results, reranked = reranker.rerank(user_query, unique_results, top_k=keep_k)
+        
+        if diversity:
+            # Drop near-duplicate chunks to keep the LLM prompt small
+            with span('retrieve.diversify', diversity=diversity):
+                query_embedding = self.base_rag._embed([user_query])[0]
+                final_results = self.base_rag.diversify(
+                    query_embedding, unique_results, n_results, diversity
+                )
+        else:
+            final_results = unique_results[:n_results]
         
+        return analysis, final_results, reranked
+    
+    @staticmethod
+    def summarize_analysis(analysis: QueryAnalysis) -> Dict[str, Any]:
+        """Analysis fields returned to API clients"""
         return {
-            'query': user_query,
-            'analysis': {
-                'type': analysis.query_type.value,
-                'components': analysis.components,
-                'keywords': analysis.keywords,
-                'confidence': analysis.intent_confidence
-            },
-            'response': response,
-            'sources': [
-                {
-                    'component': result['metadata'].get('component'),
-                    'section': result['metadata'].get('subsection'),
-                    'type': result['metadata'].get('content_type'),
-                    'similarity': f"{result['similarity_score']:.3f}"
-                }
-                for result in final_results
-            ],
-            'search_strategy': 'multi_stage_intelligent'
+            'type': analysis.query_type.value,
+            'components': analysis.components,
+            'keywords': analysis.keywords,
+            'confidence': analysis.intent_confidence
         }
     
     def _deduplicate_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -332,9 +544,48 @@ class EnhancedVuetifyRAG:
     def _generate_contextual_response(self, query: str, results: List[Dict[str, Any]], 
                                     analysis: QueryAnalysis) -> str:
         """Generate response with query-type specific formatting"""
+        return self._complete_contextual_response(query, results, analysis)[0]
+    
+    def _complete_contextual_response(self, query: str, results: List[Dict[str, Any]],
+                                      analysis: QueryAnalysis) -> Tuple[str, bool]:
+        """(response, True if the LLM wrote it); False means the simple fallback"""
+        
+        if not self.base_rag.openai_client:
+            return self.base_rag._format_simple_response(results), False
+        
+        try:
+            with timed('llm'), span('llm.chat_completion', max_tokens=1000):
+                response = self.base_rag.openai_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=self._build_contextual_messages(query, results, analysis),
+                    temperature=0.1,
+                    max_tokens=1000
+                )
+            record_usage(response.usage)
+            
+            return response.choices[0].message.content, True
+            
+        except Exception as e:
+            print(f"⚠️  OpenAI error: {e}")
+            return self.base_rag._format_simple_response(results), False
+    
+    def stream_contextual_response(self, query: str, results: List[Dict[str, Any]],
+                                   analysis: QueryAnalysis) -> Iterator[str]:
+        """Stream the query-type specific response as text deltas"""
         
         if not self.base_rag.openai_client:
-            return self.base_rag._format_simple_response(results)
+            yield self.base_rag._format_simple_response(results)
+            return
+        
+        yield from self.base_rag.stream_completion(
+            self._build_contextual_messages(query, results, analysis),
+            results,
+            max_tokens=1000
+        )
+    
+    def _build_contextual_messages(self, query: str, results: List[Dict[str, Any]],
+                                   analysis: QueryAnalysis) -> List[Dict[str, str]]:
+        """Build chat messages with a query-type specific system prompt"""
         
         # Prepare context
         context_parts = []
@@ -392,22 +643,10 @@ User Question: {query}
 
 Please provide a comprehensive answer based on the query type and documentation context."""
         
-        try:
-            response = self.base_rag.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            print(f"⚠️  OpenAI error: {e}")
-            return self.base_rag._format_simple_response(results)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
 
 # Usage example
 def demo_enhanced_rag():
@@ -10,9 +10,12 @@ pip install matplotlib pandas sqlite3
 """
 
 # Step 2: Enhanced RAG with Analytics
+from datetime import datetime
+
 from simple_rag_interface import VuetifyRAG
 from enhanced_query_processor import EnhancedVuetifyRAG
-from rag_analytics import RAGAnalytics, MonitoredRAG
+from rag_analytics import RAGAnalytics, MonitoredRAG, QueryLog
+from metrics import query_timing
 
 class SuperchargedVuetifyRAG:
     """Complete RAG system with intelligence and monitoring"""
@@ -42,23 +45,27 @@ class SuperchargedVuetifyRAG:
         if use_intelligence:
             # Use enhanced query processing
             print("🧠 Using intelligent query processing...")
-            result = self.enhanced_rag.smart_query(user_query)
+            with query_timing() as timing:
+                result = self.enhanced_rag.smart_query(user_query)
             
             if monitor:
-                # Log the query for analytics
-                from datetime import datetime
-                from rag_analytics import QueryLog
-                
+                # Log the query for analytics with what the pipeline measured
                 query_log = QueryLog(
                     timestamp=datetime.now().isoformat(),
                     query=user_query,
                     query_type=result['analysis']['type'],
                     components=result['analysis']['components'],
-                    response_time=1.0,  # Would be measured in real implementation
+                    response_time=timing.elapsed,
                     num_results=len(result['sources']),
-                    similarity_scores=[0.8, 0.7, 0.6]  # Would extract from actual results
+                    similarity_scores=timing.similarity_scores,
+                    stage_timings=timing.stages
                 )
                 self.analytics.log_query(query_log)
+                result['monitoring'] = {
+                    'response_time': timing.elapsed,
+                    'stage_timings': timing.stages,
+                    'similarity_scores': timing.similarity_scores
+                }
             
         else:
             # Use basic query processing
@@ -201,6 +208,11 @@ def main():
         print("📊 Performance Insights:")
         print(f"Total Queries: {insights['total_queries']}")
         print(f"Avg Response Time: {insights['avg_response_time']}s")
+        latency = insights['latency_percentiles']
+        print(f"p50/p90/p99: {latency['p50']}s / {latency['p90']}s / {latency['p99']}s")
+        stages = rag.analytics.get_latency_percentiles(dimension='stage')
+        for stage, stats in sorted(stages.items()):
+            print(f"  {stage}: p50 {stats['p50']}s, p99 {stats['p99']}s")
         
         # Generate report
         report = rag.generate_analytics_report()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Load test for the Vuetify RAG API Server
+Measures throughput and latency as the number of concurrent clients grows
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any
+
+import requests
+
+TEST_QUERIES = [
+    "How do I create a button with custom colors?",
+    "v-data-table sorting and pagination",
+    "v-form validation with rules",
+    "v-card elevation and styling",
+    "responsive navigation drawer",
+    "v-text-field input validation",
+    "theme customization",
+    "v-dialog modal examples",
+]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _send(session: requests.Session, url: str, query: str, endpoint: str) -> Dict[str, Any]:
+    """Send one request and time it"""
+    payload = {"query": query, "n_results": 3, "use_enhanced": endpoint == "ask"}
+    start = time.perf_counter()
+    try:
+        response = session.post(f"{url}/{endpoint}", json=payload, timeout=120)
+        ok = response.status_code == 200
+    except requests.RequestException:
+        ok = False
+    return {"ok": ok, "latency": time.perf_counter() - start}
+
+
+def run_load_level(url: str, endpoint: str, clients: int,
+                   requests_per_client: int) -> Dict[str, Any]:
+    """Run one concurrency level and summarize it"""
+    def client_loop(client_id: int) -> List[Dict[str, Any]]:
+        session = requests.Session()
+        results = []
+        for i in range(requests_per_client):
+            query = TEST_QUERIES[(client_id + i) % len(TEST_QUERIES)]
+            results.append(_send(session, url, query, endpoint))
+        return results
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        batches = list(pool.map(client_loop, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    results = [result for batch in batches for result in batch]
+    latencies = [result["latency"] for result in results if result["ok"]]
+
+    return {
+        "clients": clients,
+        "requests": len(results),
+        "errors": len(results) - len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": _percentile(latencies, 50),
+        "p95": _percentile(latencies, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the Vuetify RAG API')
+    parser.add_argument('--url', default='http://localhost:8000', help='Server base URL')
+    parser.add_argument('--endpoint', choices=['search', 'ask'], default='search',
+                       help='Endpoint to exercise')
+    parser.add_argument('--clients', default='1,2,4,8,16',
+                       help='Comma-separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=10,
+                       help='Requests per client at each level')
+
+    args = parser.parse_args()
+
+    print(f"🧪 Load testing {args.url}/{args.endpoint}")
+    print("=" * 60)
+    print(f"{'clients':>8} {'requests':>9} {'errors':>7} {'req/s':>8} {'scale':>6} "
+          f"{'p50 (s)':>8} {'p95 (s)':>8}")
+
+    baseline = None
+    for clients in [int(level) for level in args.clients.split(',')]:
+        summary = run_load_level(args.url, args.endpoint, clients, args.requests)
+        baseline = baseline or summary["throughput"]
+        scale = summary["throughput"] / baseline if baseline else 0.0
+        print(f"{summary['clients']:>8} {summary['requests']:>9} {summary['errors']:>7} "
+              f"{summary['throughput']:>8.2f} {scale:>5.1f}x "
+              f"{summary['p50']:>8.3f} {summary['p95']:>8.3f}")
+
+    print("\n💡 Throughput should rise with clients until the worker pool "
+          "(RAG_WORKER_THREADS) or the LLM becomes the bottleneck.")
+
+
+if __name__ == "__main__":
+    main()
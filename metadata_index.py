@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Metadata Index for Vuetify RAG
+Precomputed posting lists over chunk metadata so filtered search is a
+bitmap intersection plus an exact vector scan over the surviving chunks
+"""
+
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Metadata fields that get posting lists
+INDEXED_FIELDS = ('component', 'content_type', 'language')
+
+
+class MetadataIndex:
+    """In-memory posting lists (value -> bitmap of chunk positions)"""
+
+    def __init__(self, indexed_fields: Tuple[str, ...] = INDEXED_FIELDS):
+        """Initialize an empty index"""
+        self.indexed_fields = indexed_fields
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.positions: Dict[str, int] = {}
+        self.embeddings: Optional[np.ndarray] = None
+
+        # Posting lists are Python ints used as bitsets: bit i set => chunk i
+        self.postings: Dict[str, Dict[str, int]] = {field: {} for field in indexed_fields}
+        self.live = 0
+        self.version = 0
+        # Set for indexes loaded from a shared, memory-mapped export
+        self.read_only = False
+
+        # Aggregates kept up to date on every add/remove
+        self.counts: Dict[str, Counter] = {field: Counter() for field in indexed_fields}
+        self.updated_at = datetime.now().isoformat()
+        self._digest = None
+        self._digest_version = -1
+        # Boolean mask of live embedding rows, rebuilt lazily after mutations
+        self._live_rows = None
+        self._live_rows_version = -1
+
+    @classmethod
+    def from_collection(cls, collection, batch_size: int = 500) -> 'MetadataIndex':
+        """Build the index from every chunk stored in a Chroma collection"""
+        index = cls()
+        total = collection.count()
+
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=['documents', 'metadatas', 'embeddings']
+            )
+            index.add(
+                batch['ids'],
+                batch['metadatas'],
+                documents=batch['documents'],
+                embeddings=batch.get('embeddings')
+            )
+
+        return index
+
+    def add(self, ids: List[str], metadatas: List[Dict[str, Any]],
+            documents: Optional[List[str]] = None,
+            embeddings: Optional[List[List[float]]] = None):
+        """Add (or replace) chunks and update posting lists incrementally
+
+        Embedding rows are addressed by position, so once the index holds
+        vectors every add must supply them (and an index holding chunks
+        without vectors cannot start taking them).
+        """
+        if self.read_only:
+            raise ValueError("Index is read-only (loaded from a shared export)")
+        if embeddings is None and self.embeddings is not None:
+            raise ValueError("Index has embeddings; add() needs embeddings for new chunks")
+        if embeddings is not None:
+            if len(embeddings) != len(ids):
+                raise ValueError("add() needs one embedding per chunk id")
+            if self.embeddings is None and self.ids:
+                raise ValueError("Index was built without embeddings")
+        if documents is None:
+            documents = [''] * len(ids)
+
+        new_vectors = []
+        for i, (chunk_id, metadata) in enumerate(zip(ids, metadatas)):
+            metadata = metadata or {}
+            if chunk_id in self.positions:
+                self.remove([chunk_id])
+
+            position = len(self.ids)
+            self.ids.append(chunk_id)
+            self.documents.append(documents[i])
+            self.metadatas.append(metadata)
+            self.positions[chunk_id] = position
+            self._index_position(position, metadata)
+
+            if embeddings is not None:
+                new_vectors.append(embeddings[i])
+
+        if new_vectors:
+            matrix = np.asarray(new_vectors, dtype=np.float32)
+            if self.embeddings is None:
+                self.embeddings = matrix
+            else:
+                self.embeddings = np.vstack([self.embeddings, matrix])
+
+        self._touch()
+
+    def _index_position(self, position: int, metadata: Dict[str, Any]):
+        """Mark a position live and add it to the posting lists of its values"""
+        bit = 1 << position
+        self.live |= bit
+        for field in self.indexed_fields:
+            value = metadata.get(field)
+            if value:
+                postings = self.postings[field]
+                postings[value] = postings.get(value, 0) | bit
+                self.counts[field][value] += 1
+
+    def remove(self, ids: List[str]):
+        """Drop chunks from every posting list (positions are tombstoned)"""
+        if self.read_only:
+            raise ValueError("Index is read-only (loaded from a shared export)")
+        for chunk_id in ids:
+            position = self.positions.pop(chunk_id, None)
+            if position is None:
+                continue
+
+            mask = ~(1 << position)
+            self.live &= mask
+            for field, postings in self.postings.items():
+                value = self.metadatas[position].get(field)
+                if value in postings:
+                    postings[value] &= mask
+                    if not postings[value]:
+                        del postings[value]
+                    self.counts[field][value] -= 1
+                    if self.counts[field][value] <= 0:
+                        del self.counts[field][value]
+
+        self._touch()
+
+    def _touch(self):
+        """Record a mutation so cached aggregates and ETags are refreshed"""
+        self.version += 1
+        self.updated_at = datetime.now().isoformat()
+
+    def candidates(self, **filters: Optional[str]) -> Optional[int]:
+        """Intersect posting lists for the given filters
+
+        Returns None when no filter is active, otherwise a bitmap of the
+        matching chunk positions (0 when nothing matches).
+        """
+        bitmap = None
+        for field, value in filters.items():
+            if not value:
+                continue
+            if field not in self.postings:
+                raise ValueError(f"Field '{field}' is not indexed")
+
+            postings = self.postings[field].get(value, 0)
+            bitmap = postings if bitmap is None else bitmap & postings
+            if not bitmap:
+                return 0
+
+        return bitmap
+
+    def values(self, field: str, missing: Optional[str] = None) -> Dict[str, int]:
+        """Number of live chunks for every value of an indexed field
+
+        With `missing` set, chunks without a value for the field are counted
+        under that key.
+        """
+        counts = dict(self.counts[field])
+        if missing is not None:
+            unset = len(self) - sum(counts.values())
+            if unset > 0:
+                counts[missing] = counts.get(missing, 0) + unset
+        return counts
+
+    def digest(self) -> str:
+        """Content hash of the aggregates, stable across processes (used as ETag)"""
+        if self._digest_version != self.version:
+            payload = json.dumps({
+                'total': len(self),
+                'counts': {field: sorted(counts.items()) for field, counts in self.counts.items()}
+            }, sort_keys=True)
+            self._digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+            self._digest_version = self.version
+        return self._digest
+
+    def __len__(self) -> int:
+        return self.live.bit_count()
+
+    @staticmethod
+    def bitmap_mask(bitmap: int, size: int) -> np.ndarray:
+        """Boolean array of length size with True at the bitmap's positions"""
+        if size <= 0:
+            return np.zeros(0, dtype=bool)
+        length = (max(size, bitmap.bit_length()) + 7) // 8
+        packed = np.frombuffer(bitmap.to_bytes(length, 'little'), dtype=np.uint8)
+        return np.unpackbits(packed, bitorder='little')[:size].astype(bool)
+
+    @staticmethod
+    def bitmap_positions(bitmap: int) -> List[int]:
+        """Expand a bitmap into a sorted list of chunk positions"""
+        if not bitmap:
+            return []
+        mask = MetadataIndex.bitmap_mask(bitmap, bitmap.bit_length())
+        return np.flatnonzero(mask).tolist()
+
+    def live_rows(self) -> Optional[np.ndarray]:
+        """Boolean mask of live embedding rows (None when every row is live)"""
+        if self._live_rows_version != self.version:
+            rows = len(self.ids)
+            self._live_rows = None if len(self) == rows else self.bitmap_mask(self.live, rows)
+            self._live_rows_version = self.version
+        return self._live_rows
+
+    def scan(self, query_embedding: np.ndarray, bitmap: Optional[int], n_results: int,
+             space: str = 'l2') -> List[Tuple[int, float]]:
+        """Exact nearest-neighbour scan restricted to the chunks in bitmap
+
+        With bitmap None every live chunk is scanned straight off the
+        embedding matrix (no copy of a memory-mapped export), deleted rows
+        masked out with live_rows().
+
+        Distances follow Chroma's conventions for the collection space
+        (squared L2, 1 - cosine or 1 - inner product) so scores stay
+        comparable with results coming from the HNSW index.
+        """
+        if self.embeddings is None:
+            raise ValueError("Index was built without embeddings")
+
+        if bitmap is None:
+            positions = None
+            vectors = self.embeddings
+            candidates = len(self)
+        else:
+            positions = self.bitmap_positions(bitmap)
+            vectors = self.embeddings[positions]
+            candidates = len(positions)
+        if not candidates:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+
+        if space == 'cosine':
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+            distances = 1.0 - (vectors @ query) / np.maximum(norms, 1e-12)
+        elif space == 'ip':
+            distances = 1.0 - vectors @ query
+        else:
+            diff = vectors - query
+            distances = np.einsum('ij,ij->i', diff, diff)
+
+        if positions is None:
+            live = self.live_rows()
+            if live is not None:
+                distances = np.where(live, distances, np.inf)
+
+        k = min(n_results, candidates)
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+
+        if positions is None:
+            return [(int(i), float(distances[i])) for i in top]
+        return [(positions[i], float(distances[i])) for i in top]
+
+    def get(self, position: int) -> Tuple[str, str, Dict[str, Any]]:
+        """Chunk id, document and metadata stored at a position"""
+        return self.ids[position], self.documents[position], self.metadatas[position]
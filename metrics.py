@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+In-process metrics for Vuetify RAG
+Counters and latency histograms rendered in the Prometheus text format,
+cheap enough to leave on in production
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (name, type, help, [(labels, value)]) produced by scrape-time callbacks
+Sample = Tuple[Dict[str, str], float]
+Family = Tuple[str, str, str, List[Sample]]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value (backslash, quote and newline)"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """Render a label set as {name="value",...}"""
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Integers without a trailing .0, everything else as repr"""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        """Add amount to the series selected by labels"""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current value of one series"""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            labels = dict(zip(self.labelnames, key))
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        """Record one observation"""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe the wall time of the block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        """Number of observations in one series"""
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        return sum(self._counts.get(key, ()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+
+        for key, counts, total in sorted(items):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus callbacks that report externally kept values"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._callbacks: List[Callable[[], Iterable[Family]]] = []
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Tuple[str, ...] = ()) -> Counter:
+        """Create (or return the existing) counter"""
+        if name not in self._metrics:
+            self._metrics[name] = Counter(name, documentation, labelnames)
+        return self._metrics[name]
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        """Create (or return the existing) histogram"""
+        if name not in self._metrics:
+            self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._metrics[name]
+
+    def register_callback(self, callback: Callable[[], Iterable[Family]]):
+        """Add a function called at scrape time that yields metric families
+
+        Used for values already tracked elsewhere (queue depths, coalescing
+        counters) so the hot path does no extra work.
+        """
+        self._callbacks.append(callback)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        for callback in self._callbacks:
+            try:
+                families = list(callback())
+            except Exception:
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Pipeline stages: analysis, embedding, vector_query, dedup, rerank, llm,
+# serialization
+STAGE_LATENCY = REGISTRY.histogram(
+    'rag_stage_duration_seconds', 'Time spent in each query pipeline stage', ('stage',)
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    'rag_http_request_duration_seconds', 'HTTP request latency (until the response is sent)',
+    ('method', 'route', 'status')
+)
+CACHE_HITS = REGISTRY.counter(
+    'rag_cache_hits_total', 'Requests or lookups served from a cache', ('cache',)
+)
+ERRORS = REGISTRY.counter(
+    'rag_errors_total', 'Errors by pipeline stage or endpoint', ('stage',)
+)
+OPENAI_TOKENS = REGISTRY.counter(
+    'rag_openai_tokens_total', 'OpenAI tokens reported in API usage', ('kind',)
+)
+
+
+class QueryTiming:
+    """Measurements of one query: wall time, per-stage durations and the
+    raw similarity scores of the results it returned"""
+
+    __slots__ = ('start', 'end', 'stages', 'similarity_scores')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.end = None
+        self.stages: Dict[str, float] = {}
+        self.similarity_scores: List[float] = []
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the query started (total once finished)"""
+        return (self.end or time.perf_counter()) - self.start
+
+    def add_stage(self, stage: str, seconds: float):
+        """Accumulate time spent in a stage (stages may run several times)"""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current_timing: ContextVar[Optional[QueryTiming]] = ContextVar('current_timing', default=None)
+
+
+@contextmanager
+def query_timing():
+    """Collect timed() stages and recorded scores of the block into a QueryTiming
+
+    Nested calls share the outer timing, so a query wrapped twice is
+    measured once.
+    """
+    active = _current_timing.get()
+    if active is not None:
+        yield active
+        return
+
+    timing = QueryTiming()
+    token = _current_timing.set(timing)
+    try:
+        yield timing
+    finally:
+        timing.end = time.perf_counter()
+        _current_timing.reset(token)
+
+
+def current_timing() -> Optional[QueryTiming]:
+    """The QueryTiming collecting in this context, if any"""
+    return _current_timing.get()
+
+
+def record_scores(scores: Iterable[float]):
+    """Set the similarity scores of the results a query is returning"""
+    active = _current_timing.get()
+    if active is not None:
+        active.similarity_scores = [float(score) for score in scores]
+
+
+@contextmanager
+def timed(stage: str):
+    """Record a stage's latency, counting an error if the block raises
+
+    The duration is also added to the active query_timing(), if any.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        active = _current_timing.get()
+        if active is not None:
+            active.add_stage(stage, elapsed)
+
+
+def record_usage(usage: Optional[object]):
+    """Count prompt/completion tokens from an OpenAI usage object"""
+    if usage is None:
+        return
+    OPENAI_TOKENS.inc(getattr(usage, 'prompt_tokens', 0) or 0, kind='prompt')
+    OPENAI_TOKENS.inc(getattr(usage, 'completion_tokens', 0) or 0, kind='completion')
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by route template
+
+    Latency runs until the last body chunk is sent, so streaming responses
+    report their full duration. Unmatched paths share one label to keep
+    cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get('route'), 'path', 'unmatched')
+            REQUEST_LATENCY.observe(time.perf_counter() - start, method=scope['method'],
+                                    route=route, status=str(status))
+            if status >= 500:
+                ERRORS.inc(stage='http')
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Query Caches for Vuetify RAG
+Bounded LRU caches for retrieval results and generated responses, and a
+pre-warming job that fills them with the most frequent queries recorded
+by RAGAnalytics
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from singleflight import normalize_query
+
+
+def cache_key(query: str, **params: Any) -> tuple:
+    """Key for a query and the parameters that change its result"""
+    return (normalize_query(query),) + tuple(sorted(params.items()))
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache
+
+    Entries are dropped whenever the version passed to get()/put() changes
+    (reindexing), the same way FragmentCache handles cache generations.
+    Callers must treat cached values as read-only.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """Initialize an empty cache holding at most maxsize entries"""
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version: Any):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        """Cached value for key (None on a miss)"""
+        with self._lock:
+            self._check_version(version)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: Any = None):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def popular_queries(analytics, limit: int = 50, days: int = 7) -> List[str]:
+    """Most frequent recent queries (one phrasing per fingerprint)"""
+    return [entry['query'] for entry in analytics.get_trending_queries(limit, days)]
+
+
+class CachePrewarmer:
+    """Fill a RAG system's caches with the most popular queries
+
+    Runs at server startup and from refresh_indexes() after a reindex, so
+    the most frequent requests are served from cache from the start.
+    Incremental upsert_chunks()/delete_chunks() only invalidate the caches;
+    they are not re-warmed until the next refresh_indexes().
+    Generating responses costs LLM calls, so only the top `responses`
+    queries get one; the rest only warm retrieval.
+    """
+
+    def __init__(self, rag, analytics, limit: int = 50, days: int = 7,
+                 responses: int = 10):
+        """
+        Args:
+            rag: VuetifyRAG or EnhancedVuetifyRAG (anything with prewarm())
+            analytics: RAGAnalytics to read popular queries from
+            limit: Number of popular queries to warm
+            days: Popularity window in days
+            responses: Queries (most popular first) that also get a response
+        """
+        self.rag = rag
+        self.analytics = analytics
+        self.limit = limit
+        self.days = days
+        self.responses = responses
+        self.last_run: Dict[str, Any] = {}
+
+    def run(self) -> Dict[str, Any]:
+        """Warm the caches now; returns what was warmed and how long it took"""
+        start = time.perf_counter()
+        queries = popular_queries(self.analytics, self.limit, self.days)
+        if queries:
+            self.rag.prewarm(queries, responses=self.responses)
+
+        self.last_run = {
+            'queries': len(queries),
+            'responses': min(self.responses, len(queries)),
+            'seconds': round(time.perf_counter() - start, 3),
+        }
+        print(f"🔥 Pre-warmed caches with {self.last_run['queries']} popular queries "
+              f"({self.last_run['responses']} responses, {self.last_run['seconds']}s)")
+        return self.last_run
@@ -4,15 +4,23 @@ RAG Performance Analytics and Monitoring
 Track query patterns, performance metrics, and system health
 """
 
+import re
 import json
+import math
+import hashlib
 import time
+import queue
+import argparse
+import atexit
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Iterator
 from dataclasses import dataclass, asdict
 from collections import defaultdict, Counter
-import matplotlib.pyplot as plt
-import pandas as pd
+
+from metrics import query_timing
 
 @dataclass
 class QueryLog:
@@ -26,19 +34,314 @@ class QueryLog:
     similarity_scores: List[float]
     user_feedback: Optional[str] = None
     session_id: Optional[str] = None
+    stage_timings: Optional[Dict[str, float]] = None  # seconds per pipeline stage
+
+# Words that do not change what a query is about
+_STOPWORDS = frozenset(
+    'a an and are can could do does for from get how i in is it me my of on or '
+    'please show the to use using what when where which why with you your'.split()
+)
+_TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9-]*')
+
+def fingerprint_query(query: str) -> str:
+    """Stable 16-hex-digit fingerprint shared by trivial rephrasings
+    
+    Case, punctuation, word order, stopwords and plural 's' are ignored,
+    so "How do I create buttons?" and "create button" match.
+    """
+    terms = set()
+    for token in _TOKEN_PATTERN.findall(query.lower()):
+        if token in _STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms.add(token)
+    
+    key = ' '.join(sorted(terms)) or ' '.join(query.lower().split())
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+class LatencySketch:
+    """Log-bucketed latency histogram with bounded relative error
+    
+    Bucket i holds values in (MIN_VALUE * GAMMA^(i-1), MIN_VALUE * GAMMA^i],
+    so any quantile read back is within (GAMMA - 1) / (GAMMA + 1) (about 2%)
+    of the true value. Sketches merge by adding bucket counts, which makes
+    them cheap to maintain per component, query type and day.
+    """
+    
+    GAMMA = 1.04
+    MIN_VALUE = 1e-4  # seconds; smaller values share bucket 0
+    
+    @classmethod
+    def bucket(cls, value: float) -> int:
+        """Bucket index for a latency in seconds"""
+        if value <= cls.MIN_VALUE:
+            return 0
+        return math.ceil(math.log(value / cls.MIN_VALUE, cls.GAMMA))
+    
+    @classmethod
+    def value(cls, bucket: int) -> float:
+        """Representative latency of a bucket"""
+        if bucket <= 0:
+            return cls.MIN_VALUE
+        return cls.MIN_VALUE * 2 * cls.GAMMA ** bucket / (cls.GAMMA + 1)
+    
+    @classmethod
+    def quantiles(cls, counts: Dict[int, int],
+                  qs: tuple = (0.5, 0.9, 0.99)) -> List[Optional[float]]:
+        """Quantiles of a sketch given as {bucket: count}"""
+        total = sum(counts.values())
+        if not total:
+            return [None] * len(qs)
+        
+        buckets = sorted(counts)
+        results = []
+        for q in qs:
+            rank = q * (total - 1)
+            cumulative = 0
+            for bucket in buckets:
+                cumulative += counts[bucket]
+                if cumulative > rank:
+                    results.append(cls.value(bucket))
+                    break
+        return results
+
+# Queue marker asking the writer thread to exit
+_STOP = object()
+
+class AnalyticsWriter:
+    """Background thread writing queued query logs in batched transactions
+    
+    Producers only enqueue, so logging costs microseconds on the request
+    path. Records are dropped (and counted) when the queue is full rather
+    than blocking a request.
+    """
+    
+    def __init__(self, write_batch: Callable[[List[QueryLog]], None],
+                 flush_interval: float = 1.0, max_queue: int = 10000,
+                 max_batch: int = 1000):
+        """Start the writer thread
+        
+        Args:
+            write_batch: Writes a list of logs in one transaction
+            flush_interval: Longest a record waits before being written (seconds)
+            max_queue: Records buffered before new ones are dropped
+            max_batch: Records written per transaction at most
+        """
+        self.write_batch = write_batch
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.written_count = 0
+        self.dropped_count = 0
+        self.failed_count = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="analytics-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, record: QueryLog) -> bool:
+        """Queue a record without blocking; False if it was dropped"""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            return False
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written"""
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self, timeout: float = 5.0):
+        """Write what is queued and stop the thread"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+    
+    @property
+    def pending(self) -> int:
+        """Records waiting to be written"""
+        return self._queue.qsize()
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            # Idle until the first record, then collect for one interval
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                
+                if stopping or waiters or len(batch) >= self.max_batch:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            # Drain without waiting so a flush covers everything before it
+            while (waiters or stopping) and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+            
+            if batch:
+                try:
+                    self.write_batch(batch)
+                    self.written_count += len(batch)
+                except Exception as e:
+                    self.failed_count += len(batch)
+                    print(f"⚠️  Analytics write failed: {e}")
+            
+            for waiter in waiters:
+                waiter.set()
 
 class RAGAnalytics:
     """Analytics system for RAG performance monitoring"""
     
-    def __init__(self, db_path: str = "rag_analytics.db"):
-        """Initialize analytics database"""
+    # Aggregates maintained from query_logs at write time
+    ROLLUP_TABLES = ('component_stats', 'daily_stats', 'daily_components',
+                     'daily_component_stats', 'daily_query_stats', 'hourly_stats',
+                     'latency_sketches')
+    # Seconds between automatic compactions when retain_days is set
+    COMPACT_INTERVAL = 3600
+    
+    def __init__(self, db_path: str = "rag_analytics.db", async_writes: bool = True,
+                 flush_interval: float = 1.0, retain_days: Optional[int] = None,
+                 busy_timeout: float = 30.0):
+        """Initialize analytics database
+        
+        Args:
+            db_path: SQLite database file
+            async_writes: Buffer log_query() calls and write them from a
+                background thread, one transaction per flush interval
+            flush_interval: Seconds between background flushes
+            retain_days: Keep raw query logs for this many days, compacting
+                older ones into the rollups hourly (keep everything when None)
+            busy_timeout: Seconds to wait for another writer's lock before
+                giving up with "database is locked"
+        """
         self.db_path = db_path
+        self.retain_days = retain_days
+        self.busy_timeout = busy_timeout
+        self._last_compaction = 0.0
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
         self._init_database()
+        
+        self.writer = None
+        if async_writes:
+            self.writer = AnalyticsWriter(self._write_batch, flush_interval=flush_interval)
+            atexit.register(self.close)
+    
+    def flush(self):
+        """Write any buffered query logs now"""
+        if getattr(self, 'writer', None) is not None:
+            self.writer.flush()
+    
+    def close(self):
+        """Flush buffered logs, stop the background writer and close connections"""
+        if self.writer is not None:
+            self.writer.close()
+        
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened and tuned on first use
+        
+        Connections are kept for the life of the object (one per thread)
+        and run in autocommit mode; writes go through _transaction().
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            # Durable at checkpoints rather than every commit (safe with WAL)
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.execute('PRAGMA temp_store = MEMORY')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _read_connection(self) -> sqlite3.Connection:
+        """This thread's read-only connection for streamed reads (_iter_rows)
+        
+        Kept apart from the write connection: a report holds its cursor open
+        across many yields, and a ROLLBACK on the write connection would
+        abort it mid-stream. Several iterators on one thread share it.
+        """
+        conn = getattr(self._local, 'read_conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA query_only = ON')
+            conn.execute('PRAGMA temp_store = MEMORY')
+            self._local.read_conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Write transaction on this thread's connection, yielding a cursor
+        
+        BEGIN IMMEDIATE takes the write lock up front, so concurrent writers
+        (threads or worker processes) queue on busy_timeout instead of
+        failing when a read lock cannot be upgraded.
+        """
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
     
     def _init_database(self):
         """Initialize SQLite database for analytics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connection()
+        # WAL: readers and the writer no longer block each other (persistent)
+        conn.execute('PRAGMA journal_mode = WAL')
+        
+        with self._transaction() as cursor:
+            migrated = self._create_schema(cursor)
+        
+        if migrated:
+            # Databases from before incremental aggregates: recompute once
+            self.rebuild_aggregates()
+        print(f"📊 Analytics database initialized: {self.db_path}")
+    
+    def _create_schema(self, cursor: sqlite3.Cursor) -> bool:
+        """Create missing tables and indexes; True if aggregates need a rebuild"""
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables_existed = {row[0] for row in cursor.fetchall()}
         
         # Create tables
         cursor.execute('''
@@ -52,7 +355,9 @@ class RAGAnalytics:
                 num_results INTEGER,
                 avg_similarity REAL,
                 user_feedback TEXT,
-                session_id TEXT
+                session_id TEXT,
+                fingerprint TEXT,  -- fingerprint_query(query)
+                stage_timings TEXT  -- JSON object, seconds per pipeline stage
             )
         ''')
         
@@ -62,7 +367,9 @@ class RAGAnalytics:
                 query_count INTEGER DEFAULT 0,
                 avg_response_time REAL DEFAULT 0,
                 avg_similarity REAL DEFAULT 0,
-                last_queried TEXT
+                last_queried TEXT,
+                total_response_time REAL DEFAULT 0,  -- running sums behind the averages
+                total_similarity REAL DEFAULT 0
             )
         ''')
         
@@ -72,28 +379,148 @@ class RAGAnalytics:
                 total_queries INTEGER DEFAULT 0,
                 avg_response_time REAL DEFAULT 0,
                 avg_similarity REAL DEFAULT 0,
-                unique_components INTEGER DEFAULT 0
+                unique_components INTEGER DEFAULT 0,
+                total_response_time REAL DEFAULT 0,
+                total_similarity REAL DEFAULT 0
             )
         ''')
         
-        conn.commit()
-        conn.close()
-        print(f"📊 Analytics database initialized: {self.db_path}")
+        # Distinct components per day, so unique_components is a counter
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_components (
+                date TEXT NOT NULL,
+                component TEXT NOT NULL,
+                PRIMARY KEY (date, component)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Per-day component rollup; component_stats is its all-time total
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_component_stats (
+                date TEXT NOT NULL,
+                component TEXT NOT NULL,
+                query_count INTEGER DEFAULT 0,
+                total_response_time REAL DEFAULT 0,
+                total_similarity REAL DEFAULT 0,
+                last_queried TEXT,
+                PRIMARY KEY (date, component)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Per-day query frequency by fingerprint (query is the phrasing seen at last_seen)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_query_stats (
+                date TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                query TEXT,
+                query_count INTEGER DEFAULT 0,
+                total_response_time REAL DEFAULT 0,
+                total_similarity REAL DEFAULT 0,
+                last_seen TEXT,
+                PRIMARY KEY (date, fingerprint)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Hourly rollup per query type (hour is YYYY-MM-DDTHH)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hourly_stats (
+                hour TEXT NOT NULL,
+                query_type TEXT NOT NULL,
+                query_count INTEGER DEFAULT 0,
+                total_response_time REAL DEFAULT 0,
+                total_similarity REAL DEFAULT 0,
+                PRIMARY KEY (hour, query_type)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Latency sketches: (day, dimension, key) -> bucket counts
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS latency_sketches (
+                date TEXT NOT NULL,
+                dimension TEXT NOT NULL,  -- 'all', 'component', 'query_type' or 'stage'
+                key TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (date, dimension, key, bucket)
+            ) WITHOUT ROWID
+        ''')
+        
+        # Small key/value table (compaction watermark)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analytics_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_query_logs_timestamp ON query_logs (timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_query_logs_query_type '
+                       'ON query_logs (query_type, timestamp)')
+        
+        migrated = self._add_missing_columns(cursor)
+        if not tables_existed.issuperset(self.ROLLUP_TABLES):
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM query_logs)")
+            migrated = migrated or bool(cursor.fetchone()[0])
+        return migrated
+    
+    @staticmethod
+    def _add_missing_columns(cursor: sqlite3.Cursor) -> bool:
+        """Add columns missing from tables created by older versions"""
+        migrated = False
+        for table, column, definition in (
+            ('component_stats', 'total_response_time', 'REAL DEFAULT 0'),
+            ('component_stats', 'total_similarity', 'REAL DEFAULT 0'),
+            ('daily_stats', 'total_response_time', 'REAL DEFAULT 0'),
+            ('daily_stats', 'total_similarity', 'REAL DEFAULT 0'),
+            ('query_logs', 'fingerprint', 'TEXT'),
+            ('query_logs', 'stage_timings', 'TEXT'),
+            ('daily_query_stats', 'last_seen', 'TEXT'),
+        ):
+            columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                migrated = True
+        return migrated
     
     def log_query(self, query_log: QueryLog):
-        """Log a query with its performance metrics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Log a query with its performance metrics
+        
+        With async writes this only queues the record; it reaches the
+        database within one flush interval.
+        """
+        if self.writer is not None:
+            self.writer.submit(query_log)
+        else:
+            self._write_batch([query_log])
+    
+    def _write_batch(self, query_logs: List[QueryLog]):
+        """Write query logs and their aggregate updates in one transaction"""
+        rows = [self._log_row(query_log) for query_log in query_logs]
+        
+        with self._transaction() as cursor:
+            cursor.executemany('''
+                INSERT INTO query_logs 
+                (timestamp, query, query_type, components, response_time, num_results, avg_similarity, user_feedback, session_id, fingerprint, stage_timings)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self._apply_aggregates(cursor, (
+                (query_log.timestamp, query_log.query_type, query_log.components,
+                 row[4], row[6], query_log.query, row[9], query_log.stage_timings)
+                for query_log, row in zip(query_logs, rows)
+            ))
         
+        if self.retain_days is not None and time.time() - self._last_compaction > self.COMPACT_INTERVAL:
+            self._last_compaction = time.time()
+            self.compact(self.retain_days, flush=False)
+    
+    @staticmethod
+    def _log_row(query_log: QueryLog) -> tuple:
+        """query_logs row for a log entry"""
         # Calculate average similarity
-        avg_similarity = sum(query_log.similarity_scores) / len(query_log.similarity_scores) if query_log.similarity_scores else 0
+        scores = query_log.similarity_scores
+        avg_similarity = sum(scores) / len(scores) if scores else 0
         
-        # Insert query log
-        cursor.execute('''
-            INSERT INTO query_logs 
-            (timestamp, query, query_type, components, response_time, num_results, avg_similarity, user_feedback, session_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
+        return (
             query_log.timestamp,
             query_log.query,
             query_log.query_type,
@@ -102,83 +529,309 @@ class RAGAnalytics:
             query_log.num_results,
             avg_similarity,
             query_log.user_feedback,
-            query_log.session_id
-        ))
+            query_log.session_id,
+            fingerprint_query(query_log.query),
+            json.dumps(query_log.stage_timings) if query_log.stage_timings else None
+        )
+    
+    @staticmethod
+    def _apply_aggregates(cursor: sqlite3.Cursor, events):
+        """Fold (timestamp, query_type, components, response_time, avg_similarity,
+        query, fingerprint, stage_timings) events into the rollup tables
+        (ROLLUP_TABLES)
         
-        # Update component stats
-        for component in query_log.components:
-            cursor.execute('''
-                INSERT OR REPLACE INTO component_stats 
-                (component, query_count, avg_response_time, avg_similarity, last_queried)
-                VALUES (
-                    ?, 
-                    COALESCE((SELECT query_count FROM component_stats WHERE component = ?), 0) + 1,
-                    (COALESCE((SELECT avg_response_time FROM component_stats WHERE component = ?) * 
-                             (SELECT query_count FROM component_stats WHERE component = ?), 0) + ?) / 
-                    (COALESCE((SELECT query_count FROM component_stats WHERE component = ?), 0) + 1),
-                    (COALESCE((SELECT avg_similarity FROM component_stats WHERE component = ?) * 
-                             (SELECT query_count FROM component_stats WHERE component = ?), 0) + ?) / 
-                    (COALESCE((SELECT query_count FROM component_stats WHERE component = ?), 0) + 1),
-                    ?
+        Events are summed per key in memory first, so each component, day,
+        hour and sketch bucket costs one primary-key upsert regardless of
+        traffic.
+        """
+        components = {}
+        component_days = {}
+        days = {}
+        hours = {}
+        queries = {}
+        sketches = Counter()
+        for (timestamp, query_type, event_components, response_time, similarity,
+             query, fingerprint, stage_timings) in events:
+            response_time = response_time or 0
+            similarity = similarity or 0
+            query_type = query_type or 'unknown'
+            
+            date = timestamp[:10]  # Extract date (YYYY-MM-DD)
+            bucket = LatencySketch.bucket(response_time)
+            sketches[(date, 'all', '', bucket)] += 1
+            sketches[(date, 'query_type', query_type, bucket)] += 1
+            for component in set(event_components):
+                sketches[(date, 'component', component, bucket)] += 1
+            for stage, seconds in (stage_timings or {}).items():
+                sketches[(date, 'stage', stage, LatencySketch.bucket(seconds))] += 1
+            
+            for component in event_components:
+                for stats in (components.setdefault(component, [0, 0.0, 0.0, timestamp]),
+                              component_days.setdefault((date, component), [0, 0.0, 0.0, timestamp])):
+                    stats[0] += 1
+                    stats[1] += response_time
+                    stats[2] += similarity
+                    stats[3] = max(stats[3], timestamp)
+            
+            stats = hours.setdefault((f"{date}T{timestamp[11:13]}", query_type), [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += response_time
+            stats[2] += similarity
+            
+            # Keep the phrasing of the latest event, whatever order they arrive in
+            stats = queries.setdefault((date, fingerprint), [query, 0, 0.0, 0.0, timestamp])
+            if timestamp >= stats[4]:
+                stats[0] = query
+                stats[4] = timestamp
+            stats[1] += 1
+            stats[2] += response_time
+            stats[3] += similarity
+            
+            stats = days.setdefault(date, [0, 0.0, 0.0, set()])
+            stats[0] += 1
+            stats[1] += response_time
+            stats[2] += similarity
+            stats[3].update(event_components)
+        
+        cursor.executemany('''
+            INSERT INTO component_stats 
+            (component, query_count, total_response_time, total_similarity,
+             avg_response_time, avg_similarity, last_queried)
+            VALUES (?, ?, ?, ?, ? / ?, ? / ?, ?)
+            ON CONFLICT(component) DO UPDATE SET
+                query_count = query_count + excluded.query_count,
+                total_response_time = total_response_time + excluded.total_response_time,
+                total_similarity = total_similarity + excluded.total_similarity,
+                avg_response_time = (total_response_time + excluded.total_response_time) /
+                                    (query_count + excluded.query_count),
+                avg_similarity = (total_similarity + excluded.total_similarity) /
+                                 (query_count + excluded.query_count),
+                last_queried = MAX(COALESCE(last_queried, ''), excluded.last_queried)
+        ''', [
+            (component, count, response_time, similarity,
+             response_time, count, similarity, count, last_queried)
+            for component, (count, response_time, similarity, last_queried) in components.items()
+        ])
+        
+        for date, (count, response_time, similarity, day_components) in days.items():
+            new_components = 0
+            for component in day_components:
+                cursor.execute(
+                    'INSERT OR IGNORE INTO daily_components (date, component) VALUES (?, ?)',
+                    (date, component)
                 )
-            ''', (component, component, component, component, query_log.response_time, 
-                  component, component, component, avg_similarity, component, query_log.timestamp))
+                new_components += cursor.rowcount
+            
+            cursor.execute('''
+                INSERT INTO daily_stats 
+                (date, total_queries, total_response_time, total_similarity,
+                 avg_response_time, avg_similarity, unique_components)
+                VALUES (?, ?, ?, ?, ? / ?, ? / ?, ?)
+                ON CONFLICT(date) DO UPDATE SET
+                    total_queries = total_queries + excluded.total_queries,
+                    total_response_time = total_response_time + excluded.total_response_time,
+                    total_similarity = total_similarity + excluded.total_similarity,
+                    avg_response_time = (total_response_time + excluded.total_response_time) /
+                                        (total_queries + excluded.total_queries),
+                    avg_similarity = (total_similarity + excluded.total_similarity) /
+                                     (total_queries + excluded.total_queries),
+                    unique_components = unique_components + excluded.unique_components
+            ''', (date, count, response_time, similarity,
+                  response_time, count, similarity, count, new_components))
         
-        # Update daily stats
-        date = query_log.timestamp[:10]  # Extract date (YYYY-MM-DD)
-        cursor.execute('''
-            INSERT OR REPLACE INTO daily_stats 
-            (date, total_queries, avg_response_time, avg_similarity, unique_components)
-            VALUES (
-                ?,
-                COALESCE((SELECT total_queries FROM daily_stats WHERE date = ?), 0) + 1,
-                (COALESCE((SELECT avg_response_time FROM daily_stats WHERE date = ?) * 
-                         (SELECT total_queries FROM daily_stats WHERE date = ?), 0) + ?) / 
-                (COALESCE((SELECT total_queries FROM daily_stats WHERE date = ?), 0) + 1),
-                (COALESCE((SELECT avg_similarity FROM daily_stats WHERE date = ?) * 
-                         (SELECT total_queries FROM daily_stats WHERE date = ?), 0) + ?) / 
-                (COALESCE((SELECT total_queries FROM daily_stats WHERE date = ?), 0) + 1),
-                (SELECT COUNT(DISTINCT component) FROM (
-                    SELECT json_each.value as component 
-                    FROM query_logs, json_each(query_logs.components) 
-                    WHERE date(timestamp) = ?
-                ))
+        cursor.executemany('''
+            INSERT INTO daily_component_stats 
+            (date, component, query_count, total_response_time, total_similarity, last_queried)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date, component) DO UPDATE SET
+                query_count = query_count + excluded.query_count,
+                total_response_time = total_response_time + excluded.total_response_time,
+                total_similarity = total_similarity + excluded.total_similarity,
+                last_queried = MAX(COALESCE(last_queried, ''), excluded.last_queried)
+        ''', [key + tuple(stats) for key, stats in component_days.items()])
+        
+        cursor.executemany('''
+            INSERT INTO daily_query_stats 
+            (date, fingerprint, query, query_count, total_response_time, total_similarity, last_seen)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date, fingerprint) DO UPDATE SET
+                query = CASE WHEN excluded.last_seen >= COALESCE(last_seen, '')
+                             THEN excluded.query ELSE query END,
+                query_count = query_count + excluded.query_count,
+                total_response_time = total_response_time + excluded.total_response_time,
+                total_similarity = total_similarity + excluded.total_similarity,
+                last_seen = MAX(COALESCE(last_seen, ''), excluded.last_seen)
+        ''', [key + tuple(stats) for key, stats in queries.items()])
+        
+        cursor.executemany('''
+            INSERT INTO hourly_stats 
+            (hour, query_type, query_count, total_response_time, total_similarity)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(hour, query_type) DO UPDATE SET
+                query_count = query_count + excluded.query_count,
+                total_response_time = total_response_time + excluded.total_response_time,
+                total_similarity = total_similarity + excluded.total_similarity
+        ''', [key + tuple(stats) for key, stats in hours.items()])
+        
+        cursor.executemany('''
+            INSERT INTO latency_sketches (date, dimension, key, bucket, count)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(date, dimension, key, bucket) DO UPDATE SET
+                count = count + excluded.count
+        ''', [key + (count,) for key, count in sketches.items()])
+    
+    @staticmethod
+    def _compacted_before(cursor: sqlite3.Cursor) -> str:
+        """Date (YYYY-MM-DD) before which raw logs have been compacted away"""
+        cursor.execute("SELECT value FROM analytics_meta WHERE key = 'compacted_before'")
+        row = cursor.fetchone()
+        return row[0] if row else ''
+    
+    def rebuild_aggregates(self) -> int:
+        """Recompute the rollups from query_logs in one pass
+        
+        Days already compacted (see compact()) only exist as rollups, so
+        they are kept and the all-time component totals are re-seeded from
+        them. Returns the number of query logs read.
+        """
+        self.flush()
+        with self._transaction() as cursor:
+            watermark = self._compacted_before(cursor)
+            
+            # Logs written before fingerprinting existed
+            cursor.executemany(
+                "UPDATE query_logs SET fingerprint = ? WHERE id = ?",
+                [(fingerprint_query(query), log_id) for log_id, query in cursor.connection.execute(
+                    "SELECT id, query FROM query_logs WHERE fingerprint IS NULL"
+                ).fetchall()]
             )
-        ''', (date, date, date, date, query_log.response_time, date, 
-              date, date, avg_similarity, date, date))
+            
+            cursor.execute("DELETE FROM component_stats")
+            for table in ('daily_stats', 'daily_components', 'daily_component_stats',
+                          'daily_query_stats', 'latency_sketches'):
+                cursor.execute(f"DELETE FROM {table} WHERE date >= ?", (watermark,))
+            cursor.execute("DELETE FROM hourly_stats WHERE hour >= ?", (watermark,))
+            
+            cursor.execute('''
+                INSERT INTO component_stats 
+                (component, query_count, total_response_time, total_similarity,
+                 avg_response_time, avg_similarity, last_queried)
+                SELECT component, SUM(query_count), SUM(total_response_time),
+                       SUM(total_similarity),
+                       SUM(total_response_time) / SUM(query_count),
+                       SUM(total_similarity) / SUM(query_count),
+                       MAX(last_queried)
+                FROM daily_component_stats
+                GROUP BY component
+            ''')
+            
+            read = 0
+            def events():
+                nonlocal read
+                rows = cursor.connection.execute(
+                    'SELECT timestamp, query_type, components, response_time, avg_similarity, '
+                    'query, fingerprint, stage_timings FROM query_logs WHERE timestamp >= ?',
+                    (watermark,)
+                )
+                for (timestamp, query_type, components, response_time, similarity,
+                     query, fingerprint, stage_timings) in rows:
+                    read += 1
+                    yield (timestamp, query_type, json.loads(components or '[]'),
+                           response_time, similarity, query, fingerprint,
+                           json.loads(stage_timings) if stage_timings else None)
+            
+            self._apply_aggregates(cursor, events())
+        
+        return read
+    
+    def compact(self, retain_days: int = 30, flush: bool = True) -> int:
+        """Delete raw query logs older than retain_days whole days
         
-        conn.commit()
-        conn.close()
+        Their contribution already lives in the rollups (which are updated
+        as logs are written), so only the raw rows go, along with old
+        daily_query_stats rows for queries seen once that day.
+        rebuild_aggregates() only sees the retained window afterwards.
+        Returns the number of rows deleted.
+        """
+        if flush:
+            self.flush()
+        cutoff = (datetime.now() - timedelta(days=retain_days)).strftime('%Y-%m-%d')
+        
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM query_logs WHERE timestamp < ?", (cutoff,))
+            deleted = cursor.rowcount
+            # One-off queries are noise once they leave the trending window
+            cursor.execute("DELETE FROM daily_query_stats WHERE date < ? AND query_count = 1",
+                           (cutoff,))
+            cursor.execute('''
+                INSERT INTO analytics_meta (key, value) VALUES ('compacted_before', ?)
+                ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)
+            ''', (cutoff,))
+        
+        return deleted
+    
+    def get_latency_percentiles(self, days: int = 7, dimension: str = 'all',
+                                keys: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """p50/p90/p99 response time per key of a dimension over the last N days
+        
+        Merges the daily latency sketches (bucket counts), so the cost does
+        not depend on how many queries were logged.
+        
+        Args:
+            days: Window size in days (including today)
+            dimension: 'all', 'component', 'query_type' or 'stage' (pipeline
+                stages such as embedding, vector_query, rerank and llm)
+            keys: Restrict to these keys (all keys when None)
+        """
+        self.flush()
+        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        
+        query = '''
+            SELECT key, bucket, SUM(count) FROM latency_sketches
+            WHERE dimension = ? AND date >= ?
+        '''
+        params = [dimension, start_date]
+        if keys is not None:
+            if not keys:
+                return {}
+            query += f" AND key IN ({','.join('?' * len(keys))})"
+            params.extend(keys)
+        query += " GROUP BY key, bucket"
+        
+        sketches = defaultdict(dict)
+        for key, bucket, count in self._connection().execute(query, params):
+            sketches[key][bucket] = count
+        
+        percentiles = {}
+        for key, counts in sketches.items():
+            p50, p90, p99 = LatencySketch.quantiles(counts)
+            percentiles[key] = {
+                'count': sum(counts.values()),
+                'p50': round(p50, 3),
+                'p90': round(p90, 3),
+                'p99': round(p99, 3),
+            }
+        return percentiles
     
     def get_performance_summary(self, days: int = 7) -> Dict[str, Any]:
         """Get performance summary for the last N days"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.flush()
+        cursor = self._connection().cursor()
         
-        # Calculate date range
+        # Calculate date range (hour resolution, matching hourly_stats)
         end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
+        start_hour = (end_date - timedelta(days=days)).strftime('%Y-%m-%dT%H')
         
-        # Total queries
+        # Totals and averages from the hourly rollup
         cursor.execute('''
-            SELECT COUNT(*) FROM query_logs 
-            WHERE timestamp >= ?
-        ''', (start_date.isoformat(),))
-        total_queries = cursor.fetchone()[0]
-        
-        # Average response time
-        cursor.execute('''
-            SELECT AVG(response_time) FROM query_logs 
-            WHERE timestamp >= ?
-        ''', (start_date.isoformat(),))
-        avg_response_time = cursor.fetchone()[0] or 0
-        
-        # Average similarity
-        cursor.execute('''
-            SELECT AVG(avg_similarity) FROM query_logs 
-            WHERE timestamp >= ?
-        ''', (start_date.isoformat(),))
-        avg_similarity = cursor.fetchone()[0] or 0
+            SELECT SUM(query_count), SUM(total_response_time), SUM(total_similarity)
+            FROM hourly_stats 
+            WHERE hour >= ?
+        ''', (start_hour,))
+        total_queries, total_response_time, total_similarity = cursor.fetchone()
+        total_queries = total_queries or 0
+        avg_response_time = total_response_time / total_queries if total_queries else 0
+        avg_similarity = total_similarity / total_queries if total_queries else 0
         
         # Top components
         cursor.execute('''
@@ -199,174 +852,163 @@ class RAGAnalytics:
         
         # Query types distribution
         cursor.execute('''
-            SELECT query_type, COUNT(*) 
-            FROM query_logs 
-            WHERE timestamp >= ?
+            SELECT query_type, SUM(query_count) AS queries 
+            FROM hourly_stats 
+            WHERE hour >= ?
             GROUP BY query_type 
-            ORDER BY COUNT(*) DESC
-        ''', (start_date.isoformat(),))
+            ORDER BY queries DESC
+        ''', (start_hour,))
         query_types = dict(cursor.fetchall())
         
-        conn.close()
+        cursor.close()
+        
+        # Tail latency from the sketches (no raw log scan)
+        latency = self.get_latency_percentiles(days).get('', {})
+        component_latency = self.get_latency_percentiles(
+            days, 'component', [comp['component'] for comp in top_components]
+        )
+        for comp in top_components:
+            comp.update({
+                quantile: component_latency.get(comp['component'], {}).get(quantile)
+                for quantile in ('p50', 'p90', 'p99')
+            })
         
         return {
             'period': f"Last {days} days",
             'total_queries': total_queries,
             'avg_response_time': round(avg_response_time, 3),
             'avg_similarity': round(avg_similarity, 3),
+            'latency_percentiles': {
+                quantile: latency.get(quantile) for quantile in ('p50', 'p90', 'p99')
+            },
+            'query_type_latency': self.get_latency_percentiles(days, 'query_type'),
             'top_components': top_components,
             'query_types': query_types
         }
     
-    def get_trending_queries(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get trending/popular queries"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_trending_queries(self, limit: int = 10, days: int = 7) -> List[Dict[str, Any]]:
+        """Most frequent queries over the last N days, grouped by fingerprint
         
-        cursor.execute('''
-            SELECT query, COUNT(*) as frequency,
-                   AVG(response_time) as avg_response_time,
-                   AVG(avg_similarity) as avg_similarity
-            FROM query_logs 
-            WHERE timestamp >= datetime('now', '-7 days')
-            GROUP BY LOWER(query)
+        Reads the daily_query_stats rollup, so the cost depends on the number
+        of distinct queries in the window rather than on traffic. Each entry
+        carries the most recent phrasing of its query.
+        """
+        return list(self.iter_query_stats(days, limit))
+    
+    def iter_query_stats(self, days: int = 7, limit: Optional[int] = None,
+                         page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream per-fingerprint query stats, most frequent first
+        
+        Same entries as get_trending_queries(), without a limit by default.
+        """
+        self.flush()
+        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        
+        # With MAX(date), SQLite takes the bare query column from that row
+        query = '''
+            SELECT fingerprint, query, MAX(date),
+                   SUM(query_count) AS frequency,
+                   SUM(total_response_time) / SUM(query_count),
+                   SUM(total_similarity) / SUM(query_count) AS avg_similarity
+            FROM daily_query_stats 
+            WHERE date >= ?
+            GROUP BY fingerprint
             ORDER BY frequency DESC, avg_similarity DESC
-            LIMIT ?
-        ''', (limit,))
+        '''
+        params = (start_date,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
         
-        trending = [
-            {
-                'query': row[0],
-                'frequency': row[1],
-                'avg_response_time': round(row[2], 3),
-                'avg_similarity': round(row[3], 3)
+        for row in self._iter_rows(query, params, page_size):
+            yield {
+                'query': row[1],
+                'fingerprint': row[0],
+                'frequency': row[3],
+                'avg_response_time': round(row[4], 3),
+                'avg_similarity': round(row[5], 3)
             }
-            for row in cursor.fetchall()
-        ]
+    
+    def iter_component_stats(self, days: int = 30,
+                             page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream per-component stats over the last N days, most queried first"""
+        self.flush()
+        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
         
-        conn.close()
-        return trending
+        for row in self._iter_rows('''
+            SELECT component, SUM(query_count) AS queries,
+                   SUM(total_response_time) / SUM(query_count),
+                   SUM(total_similarity) / SUM(query_count),
+                   MAX(last_queried)
+            FROM daily_component_stats 
+            WHERE date >= ?
+            GROUP BY component
+            ORDER BY queries DESC, component
+        ''', (start_date,), page_size):
+            yield {
+                'component': row[0],
+                'queries': row[1],
+                'avg_response_time': round(row[2], 3),
+                'avg_similarity': round(row[3], 3),
+                'last_queried': row[4]
+            }
     
-    def generate_report(self, output_file: str = "rag_analytics_report.html"):
-        """Generate comprehensive analytics report"""
-        
-        # Get data
-        summary = self.get_performance_summary(30)  # Last 30 days
-        trending = self.get_trending_queries(15)
-        
-        # Generate HTML report
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Vuetify RAG Analytics Report</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                .header {{ background: #1976D2; color: white; padding: 20px; border-radius: 8px; }}
-                .metric {{ background: #f5f5f5; padding: 15px; margin: 10px 0; border-radius: 5px; }}
-                .component {{ background: #e3f2fd; padding: 10px; margin: 5px 0; border-radius: 3px; }}
-                table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-                th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-                .chart {{ margin: 20px 0; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>🎯 Vuetify RAG Analytics Report</h1>
-                <p>Performance insights for your documentation RAG system</p>
-                <p>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-            
-            <h2>📊 Performance Summary ({summary['period']})</h2>
-            <div class="metric">
-                <strong>Total Queries:</strong> {summary['total_queries']}
-            </div>
-            <div class="metric">
-                <strong>Average Response Time:</strong> {summary['avg_response_time']}s
-            </div>
-            <div class="metric">
-                <strong>Average Similarity Score:</strong> {summary['avg_similarity']:.3f}
-            </div>
-            
-            <h2>🏆 Top Components</h2>
-            <table>
-                <tr>
-                    <th>Component</th>
-                    <th>Queries</th>
-                    <th>Avg Response Time</th>
-                    <th>Avg Similarity</th>
-                </tr>
-        """
+    def iter_daily_stats(self, days: int = 30,
+                         page_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Stream one entry per day over the last N days, oldest first"""
+        self.flush()
+        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
         
-        for comp in summary['top_components']:
-            html_content += f"""
-                <tr>
-                    <td>{comp['component']}</td>
-                    <td>{comp['queries']}</td>
-                    <td>{comp['avg_response_time']:.3f}s</td>
-                    <td>{comp['avg_similarity']:.3f}</td>
-                </tr>
-            """
-        
-        html_content += """
-            </table>
-            
-            <h2>🔥 Trending Queries</h2>
-            <table>
-                <tr>
-                    <th>Query</th>
-                    <th>Frequency</th>
-                    <th>Avg Response Time</th>
-                    <th>Avg Similarity</th>
-                </tr>
-        """
+        for row in self._iter_rows('''
+            SELECT date, total_queries, avg_response_time, avg_similarity, unique_components
+            FROM daily_stats 
+            WHERE date >= ?
+            ORDER BY date
+        ''', (start_date,), page_size):
+            yield {
+                'date': row[0],
+                'queries': row[1],
+                'avg_response_time': round(row[2] or 0, 3),
+                'avg_similarity': round(row[3] or 0, 3),
+                'unique_components': row[4]
+            }
+    
+    def _iter_rows(self, query: str, params: tuple = (),
+                   page_size: int = 500) -> Iterator[tuple]:
+        """Yield a query's rows, fetched page_size at a time
         
-        for query in trending:
-            html_content += f"""
-                <tr>
-                    <td>{query['query']}</td>
-                    <td>{query['frequency']}</td>
-                    <td>{query['avg_response_time']}s</td>
-                    <td>{query['avg_similarity']:.3f}</td>
-                </tr>
-            """
-        
-        html_content += """
-            </table>
-            
-            <h2>📈 Query Type Distribution</h2>
-            <table>
-                <tr>
-                    <th>Query Type</th>
-                    <th>Count</th>
-                    <th>Percentage</th>
-                </tr>
+        Reads through the per-thread read connection of the thread that
+        starts iterating; the cursor is closed when the iterator is
+        exhausted or closed.
         """
+        cursor = self._read_connection().execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def data_version(self) -> str:
+        """Changes whenever logs are written or compacted (cheap to check)
         
-        total_typed_queries = sum(summary['query_types'].values())
-        for query_type, count in summary['query_types'].items():
-            percentage = (count / total_typed_queries * 100) if total_typed_queries > 0 else 0
-            html_content += f"""
-                <tr>
-                    <td>{query_type}</td>
-                    <td>{count}</td>
-                    <td>{percentage:.1f}%</td>
-                </tr>
-            """
-        
-        html_content += """
-            </table>
-        </body>
-        </html>
+        Used to tell whether a cached report is still current.
         """
-        
-        # Save report
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        print(f"📄 Analytics report generated: {output_file}")
-        return output_file
+        self.flush()
+        cursor = self._connection().cursor()
+        cursor.execute("SELECT MAX(id) FROM query_logs")
+        last_id = cursor.fetchone()[0] or 0
+        compacted_before = self._compacted_before(cursor)
+        cursor.close()
+        return f"{last_id}-{compacted_before}"
+    
+    def generate_report(self, output_file: str = "rag_analytics_report.html"):
+        """Generate comprehensive analytics report (see analytics_reporting)"""
+        # Reporting is loaded on first use to keep logging imports light
+        from analytics_reporting import generate_report
+        return generate_report(self, output_file)
 
 class MonitoredRAG:
     """RAG system with built-in analytics monitoring"""
@@ -378,71 +1020,56 @@ class MonitoredRAG:
         self.session_id = datetime.now().strftime('%Y%m%d_%H%M%S')
     
     def query_with_monitoring(self, user_query: str, **kwargs) -> Dict[str, Any]:
-        """Execute query with full monitoring"""
-        start_time = time.time()
+        """Execute query with full monitoring
         
-        # Execute the query
-        try:
-            result = self.base_rag.query(user_query, **kwargs)
-            
-            # Extract components from query (simplified)
-            components = []
-            query_lower = user_query.lower()
-            if 'v-' in query_lower:
-                import re
-                components = re.findall(r'v-[a-z-]+', query_lower)
-            
-            # Calculate metrics
-            response_time = time.time() - start_time
-            similarity_scores = []
-            
-            if 'sources' in result:
-                for source in result['sources']:
-                    if 'similarity' in source:
-                        try:
-                            score = float(source['similarity'])
-                            similarity_scores.append(score)
-                        except:
-                            pass
-            
-            # Log the query
-            query_log = QueryLog(
-                timestamp=datetime.now().isoformat(),
-                query=user_query,
-                query_type='general',  # This would come from enhanced processor
-                components=components,
-                response_time=response_time,
-                num_results=len(result.get('sources', [])),
-                similarity_scores=similarity_scores,
-                session_id=self.session_id
-            )
-            
-            self.analytics.log_query(query_log)
-            
-            # Add monitoring info to result
-            result['monitoring'] = {
-                'response_time': response_time,
-                'similarity_scores': similarity_scores,
-                'session_id': self.session_id
-            }
-            
-            return result
-            
-        except Exception as e:
-            # Log failed queries too
-            error_log = QueryLog(
-                timestamp=datetime.now().isoformat(),
-                query=user_query,
-                query_type='error',
-                components=[],
-                response_time=time.time() - start_time,
-                num_results=0,
-                similarity_scores=[],
-                session_id=self.session_id
-            )
-            
-            self.analytics.log_query(error_log)
-            raise e
+        Response time, per-stage durations and the raw similarity scores
+        come from the query_timing() context the pipeline reports into.
+        """
+        with query_timing() as timing:
+            try:
+                result = self.base_rag.query(user_query, **kwargs)
+            except Exception:
+                # Log failed queries too
+                self.analytics.log_query(QueryLog(
+                    timestamp=datetime.now().isoformat(),
+                    query=user_query,
+                    query_type='error',
+                    components=[],
+                    response_time=timing.elapsed,
+                    num_results=0,
+                    similarity_scores=[],
+                    session_id=self.session_id,
+                    stage_timings=dict(timing.stages)
+                ))
+                raise
+        
+        # Extract components from query (simplified)
+        components = re.findall(r'v-[a-z-]+', user_query.lower())
+        
+        # Log the query
+        query_log = QueryLog(
+            timestamp=datetime.now().isoformat(),
+            query=user_query,
+            query_type='general',  # This would come from enhanced processor
+            components=components,
+            response_time=timing.elapsed,
+            num_results=len(result.get('sources', [])),
+            similarity_scores=timing.similarity_scores,
+            session_id=self.session_id,
+            stage_timings=timing.stages
+        )
+        
+        self.analytics.log_query(query_log)
+        
+        # Add monitoring info to result
+        result['monitoring'] = {
+            'response_time': timing.elapsed,
+            'stage_timings': timing.stages,
+            'similarity_scores': timing.similarity_scores,
+            'session_id': self.session_id
+        }
+        
+        return result
     
     def add_feedback(self, query: str, feedback: str):
         """Add user feedback for a query"""
@@ -487,6 +1114,8 @@ def demo_analytics():
     
     print(f"Total Queries: {summary['total_queries']}")
     print(f"Avg Response Time: {summary['avg_response_time']}s")
+    latency = summary['latency_percentiles']
+    print(f"Response Time p50/p90/p99: {latency['p50']}s / {latency['p90']}s / {latency['p99']}s")
     print(f"Avg Similarity: {summary['avg_similarity']:.3f}")
     
     print(f"\nTop Components:")
@@ -497,5 +1126,31 @@ def demo_analytics():
     report_file = analytics.generate_report("demo_analytics_report.html")
     print(f"\n📄 Full report: {report_file}")
 
+def main():
+    parser = argparse.ArgumentParser(description='Vuetify RAG analytics')
+    parser.add_argument('command', nargs='?', choices=['demo', 'rebuild', 'compact'],
+                       default='demo',
+                       help='demo: simulate queries and build a report; '
+                            'rebuild: recompute aggregates from query_logs; '
+                            'compact: drop raw logs older than --retain-days')
+    parser.add_argument('--db-path', default='vuetify_rag_analytics.db',
+                       help='Analytics database (rebuild/compact)')
+    parser.add_argument('--retain-days', type=int, default=30,
+                       help='Days of raw query logs to keep (compact only)')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'rebuild':
+        analytics = RAGAnalytics(args.db_path, async_writes=False)
+        start = time.time()
+        count = analytics.rebuild_aggregates()
+        print(f"✅ Rebuilt aggregates from {count} query logs in {time.time() - start:.2f}s")
+    elif args.command == 'compact':
+        analytics = RAGAnalytics(args.db_path, async_writes=False)
+        deleted = analytics.compact(args.retain_days)
+        print(f"✅ Compacted {deleted} query logs older than {args.retain_days} days into rollups")
+    else:
+        demo_analytics()
+
 if __name__ == "__main__":
-    demo_analytics()
+    main()
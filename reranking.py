@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Result Reranking for Vuetify RAG
+Second-stage selection over retrieved chunks to cut redundant context
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Optional: local cross-encoder for second-stage reranking
+try:
+    from sentence_transformers import CrossEncoder
+    CROSS_ENCODER_AVAILABLE = True
+except ImportError:
+    CROSS_ENCODER_AVAILABLE = False
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (or a single vector)"""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def mmr_select(query_embedding: List[float], embeddings: List[List[float]],
+               k: int, diversity: float = 0.3,
+               duplicate_threshold: Optional[float] = 0.95) -> List[int]:
+    """Maximal marginal relevance selection over retrieved embeddings
+
+    Args:
+        query_embedding: Embedding of the user query
+        embeddings: Embeddings of the candidate chunks
+        k: Maximum number of chunks to select
+        diversity: Weight of the redundancy penalty (0 = pure relevance,
+            1 = pure novelty)
+        duplicate_threshold: Cosine similarity above which a candidate is
+            treated as a near-duplicate of an already selected chunk and
+            dropped, so fewer than k chunks may be returned
+
+    Returns:
+        Indices into embeddings, in selection order
+    """
+    if not len(embeddings) or k <= 0:
+        return []
+
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+    relevance = vectors @ query
+    pairwise = vectors @ vectors.T
+
+    selected = []
+    available = np.ones(len(vectors), dtype=bool)
+    redundancy = np.zeros(len(vectors), dtype=np.float32)
+
+    for _ in range(min(k, len(vectors))):
+        if duplicate_threshold is not None and selected:
+            available &= redundancy < duplicate_threshold
+
+        scores = (1.0 - diversity) * relevance - diversity * redundancy
+        scores = np.where(available, scores, -np.inf)
+
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            break
+
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+
+    return selected
+
+
+class CrossEncoderReranker:
+    """Second-stage reranker scoring (query, chunk) pairs with a small local model
+
+    Scoring runs as one batched forward pass on a dedicated worker thread so
+    the caller can enforce a hard time budget; when the budget is exceeded
+    the candidates are returned in their original vector order.
+    
+    A forward pass cannot be interrupted, so jobs carry their request's
+    deadline and are skipped if it has passed before they start, and at
+    most max_pending jobs may wait; beyond that requests fall back at once
+    instead of queueing work nobody will read.
+    """
+    
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 time_budget: float = 0.3, overfetch: int = 3,
+                 batch_size: int = 32, max_length: int = 256, max_pending: int = 2):
+        """
+        Initialize the reranker.
+        
+        Args:
+            model_name: Hugging Face cross-encoder model (CPU friendly by default)
+            time_budget: Default per-request scoring budget in seconds
+            overfetch: Candidates retrieved per requested result
+            batch_size: Pairs per forward pass
+            max_length: Token limit per (query, chunk) pair
+            max_pending: Jobs allowed to wait for or hold the worker thread
+        """
+        if not CROSS_ENCODER_AVAILABLE:
+            raise ImportError("Install sentence-transformers for reranking: pip install sentence-transformers")
+        
+        self.model_name = model_name
+        self.time_budget = time_budget
+        self.overfetch = overfetch
+        self.batch_size = batch_size
+        self.model = CrossEncoder(model_name, max_length=max_length, device='cpu')
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reranker')
+        self._lock = threading.Lock()
+        self._pending = 0
+        
+        self.reranked_count = 0
+        self.fallback_count = 0
+        # Jobs dropped unscored because their deadline passed in the queue
+        self.skipped_count = 0
+    
+    def _count(self, counter: str):
+        """Increment a counter attribute (called from many request threads)"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+    
+    def _score(self, query: str, documents: List[str],
+               deadline: Optional[float] = None) -> Optional[np.ndarray]:
+        """Batched forward pass over (query, document) pairs
+        
+        Returns None without scoring when the deadline (time.monotonic())
+        has already passed.
+        """
+        if deadline is not None and time.monotonic() >= deadline:
+            self._count('skipped_count')
+            return None
+        pairs = [(query, document) for document in documents]
+        return np.asarray(self.model.predict(
+            pairs, batch_size=self.batch_size, show_progress_bar=False
+        ))
+    
+    def rerank(self, query: str, results: List[Dict[str, Any]],
+               top_k: Optional[int] = None,
+               time_budget: Optional[float] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """Reorder search results by cross-encoder score within a time budget
+        
+        Returns (results, reranked); reranked is False when the budget ran
+        out, the queue was full or scoring failed and the results are in
+        their original vector order, which callers should not cache.
+        """
+        top_k = top_k or len(results)
+        if len(results) <= 1:
+            return results[:top_k], True
+        
+        budget = self.time_budget if time_budget is None else time_budget
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.fallback_count += 1
+                return results[:top_k], False
+            self._pending += 1
+        
+        deadline = time.monotonic() + budget
+        future = self._executor.submit(self._score, query, [r['content'] for r in results],
+                                       deadline)
+        future.add_done_callback(self._release)
+        
+        try:
+            scores = future.result(timeout=budget)
+        except FutureTimeoutError:
+            # Budget exceeded: keep vector order rather than stall the request
+            future.cancel()
+            self._count('fallback_count')
+            print(f"⚠️  Rerank budget exceeded ({budget:.2f}s), using vector order")
+            return results[:top_k], False
+        except Exception as e:
+            self._count('fallback_count')
+            print(f"⚠️  Rerank error: {e}")
+            return results[:top_k], False
+        
+        if scores is None:
+            self._count('fallback_count')
+            return results[:top_k], False
+        
+        self._count('reranked_count')
+        for result, score in zip(results, scores):
+            result['rerank_score'] = float(score)
+        
+        order = np.argsort(-scores, kind='stable')[:top_k]
+        return [results[i] for i in order], True
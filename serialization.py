@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Response serialization for the Vuetify RAG API
+Fast JSON encoding, cached per-chunk JSON fragments and negotiated
+gzip/brotli compression for large search payloads
+"""
+
+import gzip
+import json
+from typing import List, Dict, Any, Optional, Tuple
+
+from fastapi.responses import Response
+
+# Optional: faster JSON encoder
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional: brotli compression
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+# Fast settings: payloads are built per request, not cached
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+# Result keys covered by a cached chunk fragment
+FRAGMENT_KEYS = ('content', 'metadata')
+
+
+def _default(obj):
+    """Encode numpy scalars and arrays with the stdlib encoder"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact UTF-8 JSON"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'),
+                      default=_default).encode('utf-8')
+
+
+class FragmentCache:
+    """Serialized '"content":...,"metadata":...' fragments keyed by chunk id
+
+    Chunk bodies dominate search payloads and never change between queries,
+    so each one is encoded once. The cache is dropped whenever the version
+    passed in changes; it must grow on every chunk change (the server
+    passes VuetifyRAG.cache_generation), since chunk ids survive reindexing.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache"""
+        self.fragments: Dict[str, bytes] = {}
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+
+    def fragment(self, result: Dict[str, Any], version: Any = None) -> bytes:
+        """Cached fragment for a search result (encoded on first use)"""
+        if version != self.version:
+            self.fragments.clear()
+            self.version = version
+
+        chunk_id = result.get('id')
+        fragment = self.fragments.get(chunk_id) if chunk_id is not None else None
+        if fragment is not None:
+            self.hits += 1
+            return fragment
+
+        self.misses += 1
+        fragment = dumps({key: result.get(key) for key in FRAGMENT_KEYS})[1:-1]
+        if chunk_id is not None:
+            self.fragments[chunk_id] = fragment
+        return fragment
+
+    def __len__(self) -> int:
+        return len(self.fragments)
+
+
+def encode_result(result: Dict[str, Any], cache: Optional[FragmentCache] = None,
+                  version: Any = None) -> bytes:
+    """Serialize one search result, reusing its cached chunk fragment"""
+    if cache is None:
+        return dumps(result)
+
+    extra = {key: value for key, value in result.items() if key not in FRAGMENT_KEYS}
+    parts = [b'{', cache.fragment(result, version)]
+    if extra:
+        parts += [b',', dumps(extra)[1:-1]]
+    parts.append(b'}')
+    return b''.join(parts)
+
+
+def encode_results(results: List[Dict[str, Any]], cache: Optional[FragmentCache] = None,
+                   version: Any = None) -> bytes:
+    """Serialize a list of search results as a JSON array"""
+    return b'[' + b','.join(encode_result(result, cache, version) for result in results) + b']'
+
+
+def encode_payload(payload: Dict[str, Any], results_key: Optional[str] = None,
+                   cache: Optional[FragmentCache] = None, version: Any = None) -> bytes:
+    """Serialize a response dict whose results_key holds search results
+
+    The rest of the payload is encoded normally; the results are spliced
+    in from cached fragments.
+    """
+    if results_key is None or results_key not in payload:
+        return dumps(payload)
+
+    head = {key: value for key, value in payload.items() if key != results_key}
+    body = dumps(head)
+    results = encode_results(payload[results_key], cache, version)
+    separator = b',' if head else b''
+    return body[:-1] + separator + dumps(results_key) + b':' + results + b'}'
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header (None for identity)
+
+    The encoding with the highest q-value wins, preferring br on a tie;
+    q=0 (or an unparsable q) refuses an encoding and '*' covers any not listed.
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    candidates = ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Compress a body with the client's preferred encoding"""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL), encoding
+    return body, None
+
+
+def json_response(body: bytes, accept_encoding: Optional[str] = None,
+                  status_code: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response from pre-encoded bytes, compressed when worthwhile"""
+    content, encoding = compress(body, accept_encoding)
+    headers = dict(headers or {})
+    headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        headers['Content-Encoding'] = encoding
+
+    return Response(content=content, status_code=status_code,
+                    media_type='application/json', headers=headers)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Shared Read-Only Index for Vuetify RAG
+Exports the chunk corpus, embedding matrix and embedding model to flat files
+that every server worker memory-maps, so the pages live once in the OS page
+cache no matter how many workers are running.
+"""
+
+import argparse
+import inspect
+import json
+import os
+import shutil
+from datetime import datetime
+from functools import cached_property
+from pathlib import Path
+from typing import Dict, Any
+
+import numpy as np
+import chromadb
+from chromadb.utils import embedding_functions
+
+from metadata_index import MetadataIndex
+
+# Optional: re-save the model with its weights as external data
+try:
+    import onnx
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+FORMAT_VERSION = 1
+MODEL_DIR = 'model'
+
+# Layout of an export directory
+MANIFEST_FILE = 'manifest.json'
+EMBEDDINGS_FILE = 'embeddings.npy'
+DOCUMENTS_FILE = 'documents.bin'
+OFFSETS_FILE = 'document_offsets.npy'
+CHUNKS_FILE = 'chunks.json'
+
+
+class MappedDocuments:
+    """Read-only sequence of documents backed by a memory-mapped UTF-8 blob"""
+
+    def __init__(self, blob_path: str, offsets_path: str):
+        """Map the blob and its (n + 1) byte offsets"""
+        self.offsets = np.load(offsets_path, mmap_mode='r')
+        if os.path.getsize(blob_path):
+            self.blob = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            self.blob = np.zeros(0, dtype=np.uint8)
+
+    def __getitem__(self, position: int) -> str:
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return self.blob[start:end].tobytes().decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+# ONNXMiniLM_L6_V2 internals MappedONNXMiniLM relies on (not public API;
+# present in chromadb 0.5 through 1.5)
+_ONNX_CLASS_ATTRIBUTES = ('DOWNLOAD_PATH', 'EXTRACTED_FOLDER_NAME', 'MODEL_NAME')
+_ONNX_INSTANCE_ATTRIBUTES = ('ort', '_preferred_providers')
+
+
+def mapped_model_supported() -> bool:
+    """True when the installed chromadb has the internals MappedONNXMiniLM overrides"""
+    base = embedding_functions.ONNXMiniLM_L6_V2
+    return (all(hasattr(base, name) for name in _ONNX_CLASS_ATTRIBUTES)
+            and isinstance(inspect.getattr_static(base, 'model', None), cached_property))
+
+
+class MappedONNXMiniLM(embedding_functions.ONNXMiniLM_L6_V2):
+    """Chroma's default MiniLM embedding function, loaded from a shared export
+
+    ONNX Runtime memory-maps initializers stored as external data, so the
+    weights stay in the shared page cache as long as the session does not
+    make private copies of them (memory arena and weight prepacking).
+
+    This overrides chromadb internals; shared_embedding_function() checks
+    they exist and falls back to the default embedding function otherwise.
+    """
+
+    def __init__(self, model_path: str):
+        """Use the model files under model_path instead of the user cache"""
+        if not mapped_model_supported():
+            raise TypeError("Installed chromadb does not expose the ONNX model internals")
+        super().__init__(preferred_providers=['CPUExecutionProvider'])
+        missing = [name for name in _ONNX_INSTANCE_ATTRIBUTES if not hasattr(self, name)]
+        if missing:
+            raise TypeError(f"Installed chromadb ONNX model lacks {', '.join(missing)}")
+        self.DOWNLOAD_PATH = Path(model_path)
+
+    @cached_property
+    def model(self):
+        options = self.ort.SessionOptions()
+        options.log_severity_level = 3
+        options.enable_cpu_mem_arena = False
+        options.add_session_config_entry('session.disable_prepacking', '1')
+
+        return self.ort.InferenceSession(
+            str(self.DOWNLOAD_PATH / self.EXTRACTED_FOLDER_NAME / 'model.onnx'),
+            providers=self._preferred_providers,
+            sess_options=options
+        )
+
+
+def export_shared_index(index: MetadataIndex, output_dir: str,
+                        distance_space: str = 'l2',
+                        include_model: bool = True) -> Dict[str, Any]:
+    """Write a metadata index (live chunks only) as a shared export
+
+    Returns the manifest that was written.
+    """
+    if index.embeddings is None:
+        raise ValueError("Index was built without embeddings")
+
+    os.makedirs(output_dir, exist_ok=True)
+    positions = index.bitmap_positions(index.live)
+
+    # Embedding matrix, compacted to live rows
+    embeddings = np.ascontiguousarray(index.embeddings[positions], dtype=np.float32)
+    np.save(os.path.join(output_dir, EMBEDDINGS_FILE), embeddings)
+
+    # Documents as one blob plus byte offsets
+    offsets = [0]
+    with open(os.path.join(output_dir, DOCUMENTS_FILE), 'wb') as f:
+        for position in positions:
+            encoded = (index.documents[position] or '').encode('utf-8')
+            f.write(encoded)
+            offsets.append(offsets[-1] + len(encoded))
+    np.save(os.path.join(output_dir, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+
+    # Ids and metadata are small; every worker parses them into posting lists
+    with open(os.path.join(output_dir, CHUNKS_FILE), 'w', encoding='utf-8') as f:
+        json.dump({
+            'ids': [index.ids[position] for position in positions],
+            'metadatas': [index.metadatas[position] for position in positions],
+        }, f, ensure_ascii=False)
+
+    model = export_embedding_model(os.path.join(output_dir, MODEL_DIR)) if include_model else None
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'count': len(positions),
+        'dimension': int(embeddings.shape[1]) if len(positions) else 0,
+        'distance_space': distance_space,
+        'digest': index.digest(),
+        'model': model,
+        'created_at': datetime.now().isoformat(),
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def export_embedding_model(model_path: str) -> str:
+    """Copy the default embedding model, storing its weights as external data
+
+    Returns the model name.
+    """
+    embedding_function = embedding_functions.ONNXMiniLM_L6_V2()
+    # Downloads the model into the user cache on first use
+    embedding_function(['warmup'])
+
+    source = Path(embedding_function.DOWNLOAD_PATH) / embedding_function.EXTRACTED_FOLDER_NAME
+    target = Path(model_path) / embedding_function.EXTRACTED_FOLDER_NAME
+    target.mkdir(parents=True, exist_ok=True)
+
+    for path in source.iterdir():
+        if path.is_file() and path.name != 'model.onnx':
+            shutil.copy2(path, target / path.name)
+
+    if ONNX_AVAILABLE:
+        model = onnx.load(str(source / 'model.onnx'))
+        onnx.save_model(
+            model, str(target / 'model.onnx'),
+            save_as_external_data=True,
+            all_tensors_to_one_file=True,
+            location='model.onnx.data',
+            size_threshold=1024
+        )
+    else:
+        print("💡 Install onnx to store model weights as memory-mappable external data")
+        shutil.copy2(source / 'model.onnx', target / 'model.onnx')
+
+    return embedding_function.MODEL_NAME
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """Read and validate an export's manifest"""
+    with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported shared index format: {manifest.get('format_version')}")
+    return manifest
+
+
+def load_shared_index(path: str) -> MetadataIndex:
+    """Map an export into a read-only MetadataIndex
+
+    The embedding matrix and documents are memory-mapped rather than read,
+    so workers share their pages. Posting lists are rebuilt per worker.
+    """
+    load_manifest(path)
+
+    with open(os.path.join(path, CHUNKS_FILE), 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+
+    index = MetadataIndex()
+    index.ids = chunks['ids']
+    index.metadatas = chunks['metadatas']
+    for position, (chunk_id, metadata) in enumerate(zip(index.ids, index.metadatas)):
+        index.positions[chunk_id] = position
+        index._index_position(position, metadata)
+
+    index.documents = MappedDocuments(
+        os.path.join(path, DOCUMENTS_FILE),
+        os.path.join(path, OFFSETS_FILE)
+    )
+    index.embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode='r')
+    index.read_only = True
+    index._touch()
+
+    return index
+
+
+def shared_embedding_function(path: str):
+    """Embedding function for an export, sharing its model files when present"""
+    model_path = os.path.join(path, MODEL_DIR)
+    if os.path.isdir(model_path):
+        try:
+            return MappedONNXMiniLM(model_path)
+        except TypeError as e:
+            # Same model, loaded per worker from the user cache instead
+            print(f"⚠️  Shared embedding model unavailable ({e}); using the default model")
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export a shared read-only Vuetify RAG index')
+    parser.add_argument('--db-path', default='./chromadb_data',
+                       help='Path to ChromaDB data directory')
+    parser.add_argument('--output', '-o', default='./shared_index',
+                       help='Export directory mapped by the server workers')
+    parser.add_argument('--no-model', action='store_true',
+                       help='Do not export the embedding model')
+
+    args = parser.parse_args()
+
+    print(f"📂 Reading ChromaDB from: {args.db_path}")
+    client = chromadb.PersistentClient(path=args.db_path)
+    collection = client.get_collection("vuetify_docs")
+    index = MetadataIndex.from_collection(collection)
+
+    manifest = export_shared_index(
+        index, args.output,
+        distance_space=(collection.metadata or {}).get('hnsw:space', 'l2'),
+        include_model=not args.no_model
+    )
+
+    print(f"✅ Exported {manifest['count']} chunks ({manifest['dimension']} dims) -> {args.output}")
+    print("💡 Start the server with RAG_SHARED_INDEX pointing at this directory")
+
+
+if __name__ == '__main__':
+    main()
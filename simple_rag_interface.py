@@ -6,10 +6,19 @@ Combines ChromaDB search with OpenAI for intelligent responses
 
 import os
 import json
+import time
 import chromadb
-from typing import List, Dict, Any, Optional
+from chromadb.utils import embedding_functions
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 import argparse
 
+from metadata_index import MetadataIndex
+from reranking import mmr_select
+from shared_index import load_manifest, load_shared_index, shared_embedding_function
+from metrics import STAGE_LATENCY, ERRORS, CACHE_HITS, timed, record_usage, record_scores
+from query_cache import LRUCache, cache_key
+from tracing import tracer, span, current_span
+
 # Optional: OpenAI integration
 try:
     import openai
@@ -18,17 +27,58 @@ except ImportError:
     OPENAI_AVAILABLE = False
     print("💡 Install OpenAI for enhanced responses: pip install openai")
 
+# Representative queries used to warm the model and index at startup
+WARMUP_QUERIES = [
+    "How do I create a button with custom colors?",
+    "v-data-table sorting and pagination",
+    "v-form validation with rules",
+    "v-card elevation and styling",
+]
+
 class VuetifyRAG:
     """Simple RAG system for Vuetify documentation"""
     
-    def __init__(self, chroma_db_path: str = "./chromadb_data"):
-        """Initialize the RAG system"""
+    # Candidates fetched per requested result when diversifying
+    mmr_fetch_multiplier = 3
+    # Cosine similarity above which two chunks count as near-duplicates
+    duplicate_threshold = 0.95
+    
+    def __init__(self, chroma_db_path: str = "./chromadb_data", reranker=None,
+                 shared_index_path: Optional[str] = None, cache_size: int = 1024):
+        """Initialize the RAG system
+        
+        Args:
+            chroma_db_path: Path to the ChromaDB data directory
+            reranker: Optional CrossEncoderReranker for second-stage ordering
+            shared_index_path: Serve from a read-only shared_index.py export
+                instead of ChromaDB (memory-mapped, shared between workers)
+            cache_size: Entries kept in the search result cache (0 disables);
+                the response cache holds a quarter as many
+        """
         self.chroma_db_path = chroma_db_path
+        self.shared_index_path = shared_index_path
+        self.reranker = reranker
         self.client = None
         self.collection = None
         self.openai_client = None
+        self.metadata_index = None
+        self.distance_space = 'l2'
+        self.ready = False
         
-        self._setup_chromadb()
+        # Search results and query() responses, dropped when chunks change
+        self.retrieval_cache = LRUCache(cache_size)
+        self.response_cache = LRUCache(cache_size // 4)
+        self.cache_generation = 0
+        # Optional CachePrewarmer, re-run after refresh_indexes()
+        self.prewarmer = None
+        
+        if shared_index_path:
+            self.embedding_function = shared_embedding_function(shared_index_path)
+            self._setup_shared_index()
+        else:
+            self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            self._setup_chromadb()
+            self._setup_metadata_index()
         self._setup_openai()
     
     def _setup_chromadb(self):
@@ -38,7 +88,11 @@ class VuetifyRAG:
             self.client = chromadb.PersistentClient(path=self.chroma_db_path)
             
             # Get the collection we created earlier
-            self.collection = self.client.get_collection("vuetify_docs")
+            self.collection = self.client.get_collection(
+                "vuetify_docs",
+                embedding_function=self.embedding_function
+            )
+            self.distance_space = (self.collection.metadata or {}).get('hnsw:space', 'l2')
             count = self.collection.count()
             print(f"✅ Connected to ChromaDB ({count} documents)")
             
@@ -47,6 +101,140 @@ class VuetifyRAG:
             print("💡 Run setup_chromadb.py first to create the database!")
             exit(1)
     
+    def _setup_metadata_index(self):
+        """Precompute component/content_type/language posting lists"""
+        try:
+            self.metadata_index = MetadataIndex.from_collection(self.collection)
+            print(f"✅ Metadata index built ({len(self.metadata_index)} chunks, "
+                  f"{len(self.metadata_index.postings['component'])} components)")
+        except Exception as e:
+            # Filtering still works through Chroma's where clause
+            print(f"⚠️  Metadata index unavailable: {e}")
+            self.metadata_index = None
+    
+    def _setup_shared_index(self):
+        """Map a shared export; every search is an exact scan over its matrix"""
+        try:
+            manifest = load_manifest(self.shared_index_path)
+            self.metadata_index = load_shared_index(self.shared_index_path)
+            self.distance_space = manifest.get('distance_space', 'l2')
+            print(f"✅ Mapped shared index ({len(self.metadata_index)} chunks, "
+                  f"{len(self.metadata_index.postings['component'])} components)")
+            
+        except Exception as e:
+            print(f"❌ Shared index load failed: {e}")
+            print("💡 Run shared_index.py first to export the index!")
+            exit(1)
+    
+    def document_count(self) -> int:
+        """Number of chunks being served"""
+        if self.collection is None:
+            return len(self.metadata_index)
+        return self.collection.count()
+    
+    def warmup(self, queries: Optional[List[str]] = None) -> Dict[str, float]:
+        """Load models and fault in index pages before serving traffic
+        
+        Returns the time spent in each warmup step (seconds).
+        """
+        queries = queries or WARMUP_QUERIES
+        timings = {}
+        
+        # Embedding model: the first call loads the ONNX weights
+        start = time.perf_counter()
+        embeddings = self._embed(queries)
+        timings['embedding_model'] = time.perf_counter() - start
+        
+        # HNSW index: unfiltered queries page in the graph and vectors
+        start = time.perf_counter()
+        for embedding in embeddings:
+            self._retrieve(embedding, 10, {})
+        timings['vector_index'] = time.perf_counter() - start
+        
+        # Metadata index: touch every embedding row through a full scan
+        if self.metadata_index is not None and self.metadata_index.embeddings is not None:
+            start = time.perf_counter()
+            self.metadata_index.scan(embeddings[0], None, 1,
+                                     space=self.distance_space)
+            timings['metadata_index'] = time.perf_counter() - start
+        
+        if self.reranker is not None:
+            start = time.perf_counter()
+            self.reranker.rerank(queries[0], self.search(queries[0], rerank=False),
+                                 time_budget=60.0)
+            timings['reranker'] = time.perf_counter() - start
+        
+        # OpenAI: open the HTTPS connection pool ahead of the first request
+        if self.openai_client:
+            start = time.perf_counter()
+            try:
+                self.openai_client.models.list()
+            except Exception as e:
+                print(f"⚠️  OpenAI warmup failed: {e}")
+            timings['openai'] = time.perf_counter() - start
+        
+        self.ready = True
+        print(f"🔥 Warmup complete ({sum(timings.values()):.2f}s)")
+        return timings
+    
+    def refresh_indexes(self):
+        """Rebuild precomputed indexes after the collection is reindexed"""
+        if self.shared_index_path:
+            self._setup_shared_index()
+        else:
+            self._setup_metadata_index()
+        self.invalidate_caches()
+        if self.prewarmer is not None:
+            self.prewarmer.run()
+    
+    def invalidate_caches(self):
+        """Drop cached search results and responses (chunks changed)"""
+        self.cache_generation += 1
+    
+    def prewarm(self, queries: List[str], responses: int = 0) -> Dict[str, int]:
+        """Populate the caches for queries as served by /search and query()
+        
+        Search results are cached for every query with default parameters;
+        the first `responses` queries also get a generated response.
+        """
+        self.search_batch([{'query': query} for query in queries])
+        for query in queries[:responses]:
+            self.query(query)
+        return {'queries': len(queries), 'responses': min(responses, len(queries))}
+    
+    def upsert_chunks(self, ids: List[str], documents: List[str],
+                      metadatas: List[Dict[str, Any]]):
+        """Add or replace chunks, keeping the metadata index in sync
+        
+        Caches are invalidated but not re-warmed (that would cost LLM calls
+        on every incremental update); call refresh_indexes() after a bulk
+        change to re-run the prewarmer.
+        """
+        if self.collection is None:
+            raise ValueError("Shared index is read-only; re-export it to change chunks")
+        embeddings = self._embed(documents)
+        self.collection.upsert(
+            ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings
+        )
+        if self.metadata_index is not None:
+            self.metadata_index.add(ids, metadatas, documents=documents, embeddings=embeddings)
+        self.invalidate_caches()
+    
+    def delete_chunks(self, ids: List[str]):
+        """Delete chunks, keeping the metadata index in sync (caches are
+        invalidated, not re-warmed; see upsert_chunks)"""
+        if self.collection is None:
+            raise ValueError("Shared index is read-only; re-export it to change chunks")
+        self.collection.delete(ids=ids)
+        if self.metadata_index is not None:
+            self.metadata_index.remove(ids)
+        self.invalidate_caches()
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with the collection's embedding model"""
+        with timed('embedding'):
+            return [list(map(float, vector)) for vector in self.embedding_function(texts)]
+    
     def _setup_openai(self):
         """Setup OpenAI client if available"""
         if not OPENAI_AVAILABLE:
@@ -60,47 +248,357 @@ class VuetifyRAG:
             print("💡 Set OPENAI_API_KEY for AI-powered responses")
     
     def search(self, query: str, n_results: int = 5, 
-               component_filter: str = None) -> List[Dict[str, Any]]:
-        """Search the documentation"""
+               component_filter: str = None,
+               content_type_filter: str = None,
+               language_filter: str = None,
+               diversity: Optional[float] = None,
+               include_embeddings: bool = False,
+               rerank: bool = True) -> List[Dict[str, Any]]:
+        """Search the documentation
         
-        # Build filters
-        where_clause = None
-        if component_filter:
-            where_clause = {"component": component_filter}
+        With a reranker configured, candidates are over-fetched and reordered
+        by the cross-encoder. With diversity set, they are then reduced with
+        maximal marginal relevance, dropping near-duplicate chunks.
+        """
         
         try:
-            # Search ChromaDB
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results,
-                where=where_clause
-            )
+            with span('rag.search', n_results=n_results,
+                      component_filter=component_filter or '',
+                      content_type_filter=content_type_filter or ''):
+                results = self.search_batch([{
+                    'query': query,
+                    'n_results': n_results,
+                    'component_filter': component_filter,
+                    'content_type_filter': content_type_filter,
+                    'language_filter': language_filter,
+                    'diversity': diversity,
+                }], include_embeddings=include_embeddings, rerank=rerank)[0]
+            record_scores(result['similarity_score'] for result in results)
+            return results
+            
+        except Exception as e:
+            print(f"❌ Search error: {e}")
+            return []
+    
+    def search_batch(self, requests: List[Dict[str, Any]],
+                     include_embeddings: bool = False,
+                     rerank: bool = True) -> List[List[Dict[str, Any]]]:
+        """Search several queries with one embedding call
+        
+        Each request is a dict with 'query' and optionally 'n_results',
+        'component_filter', 'content_type_filter', 'language_filter' and
+        'diversity'. Requests sharing the same filters are sent to the
+        vector index as a single multi-query call. Results come back in
+        request order. Results without embeddings are cached per query and
+        parameters until the chunks change.
+        """
+        with span('rag.search_batch', queries=len(requests)):
+            if not requests:
+                return []
+            
+            use_reranker = rerank and self.reranker is not None
+            batch_results = [None] * len(requests)
+            keys = [None] * len(requests)
+            if not include_embeddings:
+                for i, request in enumerate(requests):
+                    keys[i] = self._search_cache_key(request, use_reranker)
+                    cached = self.retrieval_cache.get(keys[i], self.cache_generation)
+                    if cached is not None:
+                        CACHE_HITS.inc(cache='retrieval')
+                        batch_results[i] = [dict(result) for result in cached]
+            
+            pending = [i for i, results in enumerate(batch_results) if results is None]
+            if not pending:
+                return batch_results
+            query_embeddings = dict(zip(
+                pending, self._embed([requests[i]['query'] for i in pending])
+            ))
+            
+            # Group requests by filter so each group is one vector query
+            groups = {}
+            for i in pending:
+                request = requests[i]
+                filters = (
+                    ('component', request.get('component_filter')),
+                    ('content_type', request.get('content_type_filter')),
+                    ('language', request.get('language_filter')),
+                )
+                groups.setdefault(filters, []).append(i)
             
-            # Format results
+            for filters, indices in groups.items():
+                fetch_ks = []
+                for i in indices:
+                    n_results = requests[i].get('n_results') or 5
+                    keep_k = n_results * self.mmr_fetch_multiplier if requests[i].get('diversity') else n_results
+                    fetch_ks.append(keep_k * self.reranker.overfetch if use_reranker else keep_k)
+                
+                needs_embeddings = include_embeddings or any(requests[i].get('diversity') for i in indices)
+                group_results = self._retrieve_many(
+                    [query_embeddings[i] for i in indices], max(fetch_ks),
+                    dict(filters), include_embeddings=needs_embeddings
+                )
+                
+                for i, fetch_k, results in zip(indices, fetch_ks, group_results):
+                    batch_results[i], reranked = self._finalize_results(
+                        requests[i], query_embeddings[i], results[:fetch_k],
+                        use_reranker, include_embeddings
+                    )
+                    # A reranker fallback (vector order) is not cached under the rerank key
+                    if keys[i] is not None and reranked:
+                        self.retrieval_cache.put(
+                            keys[i], [dict(result) for result in batch_results[i]],
+                            self.cache_generation
+                        )
+            
+            return batch_results
+    
+    @staticmethod
+    def _search_cache_key(request: Dict[str, Any], use_reranker: bool) -> tuple:
+        """Retrieval cache key for a search_batch request"""
+        return cache_key(
+            request['query'],
+            n_results=request.get('n_results') or 5,
+            component=request.get('component_filter'),
+            content_type=request.get('content_type_filter'),
+            language=request.get('language_filter'),
+            diversity=request.get('diversity'),
+            rerank=use_reranker,
+        )
+    
+    def _finalize_results(self, request: Dict[str, Any], query_embedding: List[float],
+                          results: List[Dict[str, Any]], use_reranker: bool,
+                          include_embeddings: bool) -> Tuple[List[Dict[str, Any]], bool]:
+        """Apply reranking and diversification to one query's candidates
+        
+        Returns (results, reranked); reranked is False only when the
+        reranker fell back to vector order.
+        """
+        n_results = request.get('n_results') or 5
+        diversity = request.get('diversity')
+        keep_k = n_results * self.mmr_fetch_multiplier if diversity else n_results
+        
+        reranked = True
+        if use_reranker:
+            with timed('rerank'):
+                results, reranked = self.reranker.rerank(request['query'], results, top_k=keep_k)
+        
+        if diversity:
+            results = self.diversify(query_embedding, results, n_results, diversity)
+            if not include_embeddings:
+                for result in results:
+                    result.pop('embedding', None)
+        
+        return results[:keep_k], reranked
+    
+    def _retrieve(self, query_embedding: List[float], n_results: int,
+                  filters: Dict[str, Optional[str]],
+                  include_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """Nearest chunks for an embedded query"""
+        return self._retrieve_many([query_embedding], n_results, filters, include_embeddings)[0]
+    
+    def _retrieve_many(self, query_embeddings: List[List[float]], n_results: int,
+                       filters: Dict[str, Optional[str]],
+                       include_embeddings: bool = False) -> List[List[Dict[str, Any]]]:
+        """Nearest chunks for several embedded queries sharing the same filters"""
+        with timed('vector_query'):
+            return self._query_index(query_embeddings, n_results, filters, include_embeddings)
+    
+    def _query_index(self, query_embeddings: List[List[float]], n_results: int,
+                     filters: Dict[str, Optional[str]],
+                     include_embeddings: bool = False) -> List[List[Dict[str, Any]]]:
+        """Query the metadata index scan or ChromaDB, whichever serves the filters"""
+        
+        # Filtered search: intersect posting lists, then scan only the survivors
+        if self.metadata_index is not None and self.metadata_index.embeddings is not None:
+            candidates = self.metadata_index.candidates(**filters)
+            # Shared index mode has no HNSW index: scan every live chunk
+            full_scan = candidates is None and self.collection is None
+            if candidates == 0:
+                return [[] for _ in query_embeddings]
+            if candidates is not None or full_scan:
+                return [
+                    self._scan_candidates(query_embedding, candidates, n_results,
+                                          include_embeddings)
+                    for query_embedding in query_embeddings
+                ]
+        
+        include = ['documents', 'metadatas', 'distances']
+        if include_embeddings:
+            include.append('embeddings')
+        
+        # Search ChromaDB
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=self._build_where_clause(filters),
+            include=include
+        )
+        
+        # Format results
+        batch_results = []
+        for q in range(len(query_embeddings)):
             formatted_results = []
-            documents = results['documents'][0]
-            metadatas = results['metadatas'][0]
-            distances = results['distances'][0]
+            ids = results['ids'][q]
+            documents = results['documents'][q]
+            metadatas = results['metadatas'][q]
+            distances = results['distances'][q]
+            embeddings = results['embeddings'][q] if include_embeddings else [None] * len(documents)
             
-            for doc, metadata, distance in zip(documents, metadatas, distances):
-                formatted_results.append({
+            for chunk_id, doc, metadata, distance, embedding in zip(ids, documents, metadatas,
+                                                                    distances, embeddings):
+                result = {
+                    'id': chunk_id,
                     'content': doc,
                     'metadata': metadata,
                     'similarity_score': 1 - distance,
                     'distance': distance
-                })
-            
-            return formatted_results
+                }
+                if include_embeddings:
+                    result['embedding'] = embedding
+                formatted_results.append(result)
             
-        except Exception as e:
-            print(f"❌ Search error: {e}")
-            return []
+            batch_results.append(formatted_results)
+        
+        return batch_results
+    
+    def _scan_candidates(self, query_embedding: List[float], candidates: Optional[int],
+                         n_results: int, include_embeddings: bool = False) -> List[Dict[str, Any]]:
+        """Exact vector scan restricted to a posting-list intersection
+        (candidates None scans every live chunk)"""
+        formatted_results = []
+        
+        for position, distance in self.metadata_index.scan(
+            query_embedding, candidates, n_results, space=self.distance_space
+        ):
+            chunk_id, doc, metadata = self.metadata_index.get(position)
+            result = {
+                'id': chunk_id,
+                'content': doc,
+                'metadata': metadata,
+                'similarity_score': 1 - distance,
+                'distance': distance
+            }
+            if include_embeddings:
+                result['embedding'] = self.metadata_index.embeddings[position]
+            formatted_results.append(result)
+        
+        return formatted_results
+    
+    def diversify(self, query_embedding: List[float], results: List[Dict[str, Any]],
+                  n_results: int, diversity: float) -> List[Dict[str, Any]]:
+        """Reduce results to a smaller, less redundant set with MMR"""
+        candidates = [result for result in results if result.get('embedding') is not None]
+        if not candidates:
+            return results[:n_results]
+        
+        with timed('diversify'):
+            selected = mmr_select(
+                query_embedding,
+                [result['embedding'] for result in candidates],
+                k=n_results,
+                diversity=diversity,
+                duplicate_threshold=self.duplicate_threshold
+            )
+        return [candidates[i] for i in selected]
+    
+    @staticmethod
+    def _build_where_clause(filters: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+        """Build a (possibly compound) Chroma where clause"""
+        conditions = [{field: value} for field, value in filters.items() if value]
+        
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
     
     def generate_response(self, query: str, search_results: List[Dict[str, Any]]) -> str:
         """Generate AI response using search results"""
+        return self._complete_response(query, search_results)[0]
+    
+    def _complete_response(self, query: str,
+                           search_results: List[Dict[str, Any]]) -> Tuple[str, bool]:
+        """(response, True if the LLM wrote it); False means the simple fallback"""
         
         if not self.openai_client:
-            return self._format_simple_response(search_results)
+            return self._format_simple_response(search_results), False
+        
+        try:
+            with timed('llm'), span('llm.chat_completion', max_tokens=800):
+                response = self.openai_client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=self._build_messages(query, search_results),
+                    temperature=0.1,
+                    max_tokens=800
+                )
+            record_usage(response.usage)
+            
+            return response.choices[0].message.content, True
+            
+        except Exception as e:
+            print(f"⚠️  OpenAI error: {e}")
+            return self._format_simple_response(search_results), False
+    
+    def generate_response_stream(self, query: str,
+                                 search_results: List[Dict[str, Any]]) -> Iterator[str]:
+        """Generate AI response as a stream of text deltas"""
+        
+        if not self.openai_client:
+            yield self._format_simple_response(search_results)
+            return
+        
+        yield from self.stream_completion(
+            self._build_messages(query, search_results), search_results, max_tokens=800
+        )
+    
+    def stream_completion(self, messages: List[Dict[str, str]],
+                          search_results: List[Dict[str, Any]],
+                          max_tokens: int = 800) -> Iterator[str]:
+        """Stream a chat completion, falling back to the simple response on error"""
+        emitted = False
+        error = None
+        stream = None
+        parent_span = current_span()
+        start = time.perf_counter()
+        start_ns = time.time_ns()
+        try:
+            stream = self.openai_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=messages,
+                temperature=0.1,
+                max_tokens=max_tokens,
+                stream=True,
+                # Final chunk carries token usage (and no choices)
+                stream_options={"include_usage": True}
+            )
+            
+            for chunk in stream:
+                if chunk.usage:
+                    record_usage(chunk.usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    emitted = True
+                    yield chunk.choices[0].delta.content
+                    
+        except Exception as e:
+            ERRORS.inc(stage='llm')
+            error = f"{type(e).__name__}: {e}"
+            print(f"⚠️  OpenAI error: {e}")
+            if not emitted:
+                yield self._format_simple_response(search_results)
+        finally:
+            # Closing the generator early (client went away) also closes
+            # the HTTP response so the completion stops streaming
+            if stream is not None:
+                stream.close()
+            STAGE_LATENCY.observe(time.perf_counter() - start, stage='llm')
+            # The generator may be resumed from several threads, so the span
+            # is recorded after the fact instead of being held open
+            tracer.record('llm.chat_completion_stream', start_ns, parent_span,
+                          error=error, max_tokens=max_tokens)
+    
+    def _build_messages(self, query: str,
+                        search_results: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build the chat messages for a query and its search results"""
         
         # Prepare context from search results
         context_parts = []
@@ -133,22 +631,23 @@ User Question: {query}
 
 Please provide a helpful answer based on the documentation context above."""
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,
-                max_tokens=800
-            )
-            
-            return response.choices[0].message.content
-            
-        except Exception as e:
-            print(f"⚠️  OpenAI error: {e}")
-            return self._format_simple_response(search_results)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    @staticmethod
+    def format_sources(search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Compact source descriptions returned alongside responses"""
+        return [
+            {
+                'component': result['metadata'].get('component'),
+                'section': result['metadata'].get('subsection'),
+                'type': result['metadata'].get('content_type'),
+                'similarity': f"{result['similarity_score']:.3f}"
+            }
+            for result in search_results
+        ]
     
     def _format_simple_response(self, search_results: List[Dict[str, Any]]) -> str:
         """Format a simple response without AI"""
@@ -175,15 +674,30 @@ Please provide a helpful answer based on the documentation context above."""
         return "\n".join(response_parts)
     
     def query(self, user_query: str, n_results: int = 5, 
-              component_filter: str = None) -> Dict[str, Any]:
-        """Complete query pipeline"""
+              component_filter: str = None,
+              content_type_filter: str = None,
+              diversity: Optional[float] = None) -> Dict[str, Any]:
+        """Complete query pipeline (LLM responses are cached until chunks change)"""
+        
+        key = cache_key(user_query, n_results=n_results, component=component_filter,
+                        content_type=content_type_filter, diversity=diversity)
+        cached = self.response_cache.get(key, self.cache_generation)
+        if cached is not None:
+            CACHE_HITS.inc(cache='response')
+            result, scores = cached
+            record_scores(scores)
+            return dict(result)
         
         print(f"🔍 Searching for: '{user_query}'")
         if component_filter:
             print(f"📌 Filtered to component: {component_filter}")
+        if content_type_filter:
+            print(f"📌 Filtered to content type: {content_type_filter}")
         
         # Search for relevant chunks
-        search_results = self.search(user_query, n_results, component_filter)
+        search_results = self.search(user_query, n_results, component_filter,
+                                     content_type_filter=content_type_filter,
+                                     diversity=diversity)
         
         if not search_results:
             return {
@@ -195,21 +709,18 @@ Please provide a helpful answer based on the documentation context above."""
         print(f"📚 Found {len(search_results)} relevant chunks")
         
         # Generate response
-        response = self.generate_response(user_query, search_results)
+        response, generated = self._complete_response(user_query, search_results)
         
-        return {
+        result = {
             'query': user_query,
             'response': response,
-            'sources': [
-                {
-                    'component': result['metadata'].get('component'),
-                    'section': result['metadata'].get('subsection'),
-                    'type': result['metadata'].get('content_type'),
-                    'similarity': f"{result['similarity_score']:.3f}"
-                }
-                for result in search_results
-            ]
+            'sources': self.format_sources(search_results)
         }
+        # Fallback answers (no LLM, or a failed call) are not worth pinning
+        if generated:
+            scores = tuple(chunk['similarity_score'] for chunk in search_results)
+            self.response_cache.put(key, (result, scores), self.cache_generation)
+        return dict(result)
 
 def interactive_mode(rag: VuetifyRAG):
     """Interactive query mode"""
@@ -316,8 +827,11 @@ def main():
                        default='interactive', help='Run mode')
     parser.add_argument('--query', '-q', help='Single query to run')
     parser.add_argument('--component', '-c', help='Filter by component')
+    parser.add_argument('--content-type', '-t', help='Filter by content type')
     parser.add_argument('--db-path', default='./chromadb_data', 
                        help='Path to ChromaDB data directory')
+    parser.add_argument('--rerank', action='store_true',
+                       help='Rerank results with a local cross-encoder')
     
     args = parser.parse_args()
     
@@ -325,7 +839,11 @@ def main():
     
     # Initialize RAG system
     try:
-        rag = VuetifyRAG(chroma_db_path=args.db_path)
+        reranker = None
+        if args.rerank:
+            from reranking import CrossEncoderReranker
+            reranker = CrossEncoderReranker()
+        rag = VuetifyRAG(chroma_db_path=args.db_path, reranker=reranker)
     except Exception as e:
         print(f"❌ Failed to initialize: {e}")
         return
@@ -333,7 +851,8 @@ def main():
     # Run based on mode
     if args.query:
         # Single query mode
-        result = rag.query(args.query, component_filter=args.component)
+        result = rag.query(args.query, component_filter=args.component,
+                           content_type_filter=args.content_type)
         
         print(f"\nQuery: {result['query']}")
         print(f"\nResponse:")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Single-flight request coalescing for the Vuetify RAG API
+Concurrent identical requests share one in-flight computation
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+def normalize_query(query: str) -> str:
+    """Normalize query text for coalescing keys (case and whitespace)"""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one computation
+
+    The computation runs as its own task, so a caller that disconnects
+    does not cancel the work other callers are waiting on. Callers receive
+    the same result object and must treat it as read-only.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started_count = 0
+        self.shared_count = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func once per key among concurrent callers and share its result"""
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            self.started_count += 1
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.shared_count += 1
+
+        return await asyncio.shield(task)
+
+    @property
+    def inflight(self) -> int:
+        """Number of distinct computations currently running"""
+        return len(self._inflight)
@@ -0,0 +1,71 @@
+"""Make the top-level modules importable when pytest runs from any directory,
+and shared fixtures for tests that need a real (small) RAG system"""
+
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HashEmbedding:
+    """Deterministic bag-of-words embedding (no model download)"""
+
+    dimensions = 32
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vector = [0.0] * self.dimensions
+            for word in text.lower().split():
+                digest = hashlib.md5(word.encode('utf-8')).digest()
+                vector[digest[0] % self.dimensions] += 1.0
+            vectors.append(vector)
+        return vectors
+
+    @staticmethod
+    def name():
+        return 'test-hash'
+
+
+CHUNKS = [
+    ('btn-1', 'v-btn color prop sets the button color', 'v-btn', 'api'),
+    ('btn-2', 'v-btn variant outlined tonal text', 'v-btn', 'example'),
+    ('card-1', 'v-card elevation and rounded corners', 'v-card', 'api'),
+    ('dialog-1', 'v-dialog fullscreen and persistent modals', 'v-dialog', 'example'),
+]
+
+
+@pytest.fixture
+def rag_factory(tmp_path, monkeypatch):
+    """Build VuetifyRAG instances over a temporary Chroma collection
+
+    Returns (make_rag, write_chunks): write_chunks(chunks) (re)writes the
+    collection, make_rag(**kwargs) opens a VuetifyRAG on it.
+    """
+    chromadb = pytest.importorskip('chromadb')
+    import simple_rag_interface
+
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    monkeypatch.setattr(simple_rag_interface.embedding_functions,
+                        'DefaultEmbeddingFunction', HashEmbedding)
+    path = str(tmp_path / 'chroma')
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_or_create_collection('vuetify_docs',
+                                                 embedding_function=HashEmbedding())
+
+    def write_chunks(chunks=CHUNKS):
+        collection.upsert(
+            ids=[chunk[0] for chunk in chunks],
+            documents=[chunk[1] for chunk in chunks],
+            metadatas=[{'chunk_id': chunk[0], 'component': chunk[2], 'content_type': chunk[3]}
+                       for chunk in chunks],
+        )
+
+    def make_rag(**kwargs):
+        return simple_rag_interface.VuetifyRAG(chroma_db_path=path, **kwargs)
+
+    write_chunks()
+    return make_rag, write_chunks
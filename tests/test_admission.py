@@ -0,0 +1,98 @@
+"""Tests for admission.AdmissionController"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def test_slots_bound_concurrency():
+    async def main():
+        admission = AdmissionController(max_concurrent=2, max_queue=10, queue_timeout=5)
+        running = peak = 0
+
+        async def work():
+            nonlocal running, peak
+            async with admission.slot():
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        assert peak == 2
+        snapshot = admission.snapshot()
+        assert snapshot['admitted'] == 6
+        assert snapshot['active'] == 0 and snapshot['queue_depth'] == 0
+
+    asyncio.run(main())
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def main():
+        admission = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=5)
+        held = await admission.acquire()
+        waiter = asyncio.ensure_future(admission.acquire())
+        await asyncio.sleep(0)
+        assert admission.queue_depth == 1
+
+        with pytest.raises(Overloaded) as excinfo:
+            await admission.acquire()
+        assert excinfo.value.reason == "LLM queue full"
+        assert 1 <= excinfo.value.retry_after <= 60
+        assert admission.rejected_count == 1
+
+        admission.release(held)
+        admission.release(await waiter)
+        assert admission.active == 0
+
+    asyncio.run(main())
+
+
+def test_queue_timeout():
+    async def main():
+        admission = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.01)
+        held = await admission.acquire()
+        with pytest.raises(Overloaded):
+            await admission.acquire()
+        assert admission.timeout_count == 1
+        assert admission.queue_depth == 0
+        admission.release(held)
+
+    asyncio.run(main())
+
+
+def test_slot_released_when_block_raises():
+    async def main():
+        admission = AdmissionController(max_concurrent=1)
+        with pytest.raises(RuntimeError):
+            async with admission.slot():
+                raise RuntimeError
+        assert admission.active == 0
+        await asyncio.wait_for(admission.acquire(), timeout=1)
+
+    asyncio.run(main())
+
+
+def test_should_degrade_does_not_count():
+    async def main():
+        admission = AdmissionController(max_concurrent=1, max_queue=10,
+                                        queue_timeout=5, degrade_queue_depth=2)
+        held = await admission.acquire()
+        assert not admission.should_degrade()
+
+        waiters = [asyncio.ensure_future(admission.acquire()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert admission.should_degrade()
+        assert admission.should_degrade()
+        assert admission.degraded_count == 0
+
+        admission.record_degraded()
+        assert admission.snapshot()['degraded'] == 1
+
+        admission.release(held)
+        for waiter in waiters:
+            admission.release(await waiter)
+
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+"""Tests for analytics_reporting: streamed reports and the ReportCache
+rebuild rules"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics_reporting
+from analytics_reporting import ReportCache, iter_json_report, write_report
+from rag_analytics import RAGAnalytics, QueryLog
+
+
+def make_log(query='How to use v-btn?', components=('v-btn',), days_ago=0):
+    timestamp = (datetime.now() - timedelta(days=days_ago, minutes=1)).replace(microsecond=0)
+    return QueryLog(
+        timestamp=timestamp.isoformat(),
+        query=query,
+        query_type='how_to',
+        components=list(components),
+        response_time=0.25,
+        num_results=5,
+        similarity_scores=[0.8, 0.6],
+        stage_timings={'embedding': 0.01, 'llm': 0.2},
+    )
+
+
+class FakeClock:
+    """Stands in for the time and datetime modules ReportCache reads"""
+
+    def __init__(self):
+        self.seconds = 1000.0
+        self.today = datetime.now()
+
+    def monotonic(self):
+        return self.seconds
+
+    def now(self):
+        return self.today
+
+
+@pytest.fixture
+def analytics(tmp_path):
+    instance = RAGAnalytics(str(tmp_path / 'analytics.db'), async_writes=False)
+    instance._write_batch([make_log(), make_log('v-card elevation', ['v-card'], days_ago=1)])
+    yield instance
+    instance.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(analytics_reporting, 'time', fake)
+    monkeypatch.setattr(analytics_reporting, 'datetime', fake)
+    return fake
+
+
+def test_json_report_is_valid_json(analytics, tmp_path):
+    report = json.loads("".join(iter_json_report(analytics, days=30, page_size=1)))
+    assert report['days'] == 30
+    assert report['summary']['total_queries'] == 2
+    assert {comp['component'] for comp in report['components']} == {'v-btn', 'v-card'}
+    assert len(report['queries']) == 2
+    assert len(report['daily']) == 2
+
+    path = write_report(analytics, str(tmp_path / 'report.json'), 'json')
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['summary'] == report['summary']
+
+
+def test_json_report_with_no_data(tmp_path):
+    empty = RAGAnalytics(str(tmp_path / 'empty.db'), async_writes=False)
+    try:
+        report = json.loads("".join(iter_json_report(empty)))
+        assert (report['components'], report['queries'], report['daily']) == ([], [], [])
+    finally:
+        empty.close()
+
+
+def test_report_reused_until_data_changes(analytics, tmp_path, clock):
+    cache = ReportCache(analytics, str(tmp_path / 'reports'), min_interval=0)
+    path = cache.get('json')
+    version = cache.version('json')
+    assert cache.get('json') == path
+    assert cache.builds == 1
+
+    analytics._write_batch([make_log('dialog fullscreen', ['v-dialog'])])
+    clock.seconds += 1
+    with open(cache.get('json'), encoding='utf-8') as f:
+        assert json.load(f)['summary']['total_queries'] == 3
+    assert cache.builds == 2
+    assert cache.version('json') != version
+
+
+def test_rebuilds_throttled_by_min_interval(analytics, tmp_path, clock):
+    cache = ReportCache(analytics, str(tmp_path / 'reports'), min_interval=60)
+    cache.get('json')
+    analytics._write_batch([make_log('dialog fullscreen', ['v-dialog'])])
+
+    clock.seconds += 30
+    cache.get('json')
+    assert cache.builds == 1
+
+    clock.seconds += 31
+    cache.get('json')
+    assert cache.builds == 2
+
+
+def test_rebuild_at_midnight_without_new_logs(analytics, tmp_path, clock):
+    cache = ReportCache(analytics, str(tmp_path / 'reports'), min_interval=0)
+    cache.get('html')
+    version = cache.version('html')
+
+    clock.seconds += 1
+    cache.get('html')
+    assert cache.builds == 1
+
+    clock.today += timedelta(days=1)
+    clock.seconds += 1
+    cache.get('html')
+    assert cache.builds == 2
+    assert cache.version('html') != version
+
+
+def test_formats_and_windows_cached_separately(analytics, tmp_path, clock):
+    cache = ReportCache(analytics, str(tmp_path / 'reports'), min_interval=0)
+    paths = {cache.get('html', 30), cache.get('json', 30), cache.get('json', 7)}
+    assert len(paths) == 3
+    assert cache.builds == 3
+
+
+def test_deleted_report_is_rebuilt(analytics, tmp_path, clock):
+    cache = ReportCache(analytics, str(tmp_path / 'reports'), min_interval=60)
+    path = cache.get('json')
+    os.unlink(path)
+    assert cache.get('json') == path
+    assert cache.builds == 2
@@ -0,0 +1,153 @@
+"""Tests for metadata_index.MetadataIndex"""
+
+import numpy as np
+import pytest
+
+from metadata_index import MetadataIndex
+
+
+def build_index(n=40, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = [f"chunk-{i}" for i in range(n)]
+    metadatas = [
+        {'component': f"v-c{i % 4}", 'content_type': 'api' if i % 2 else 'example'}
+        for i in range(n)
+    ]
+    embeddings = rng.normal(size=(n, dim)).astype(np.float32)
+    index = MetadataIndex()
+    index.add(ids, metadatas, documents=[f"doc {i}" for i in range(n)],
+              embeddings=embeddings.tolist())
+    return index, embeddings
+
+
+def brute_force(embeddings, query, positions, k):
+    distances = ((embeddings[positions] - query) ** 2).sum(axis=1)
+    order = np.argsort(distances)[:k]
+    return [positions[i] for i in order]
+
+
+def test_candidates_intersect_posting_lists():
+    index, _ = build_index()
+    assert index.candidates() is None
+    assert index.candidates(component=None) is None
+
+    bitmap = index.candidates(component='v-c1', content_type='api')
+    assert index.bitmap_positions(bitmap) == [i for i in range(40) if i % 4 == 1]
+    assert index.candidates(component='v-c0', content_type='api') == 0
+    assert index.candidates(component='v-missing') == 0
+
+    with pytest.raises(ValueError):
+        index.candidates(section='x')
+
+
+def test_bitmap_positions_and_mask():
+    assert MetadataIndex.bitmap_positions(0) == []
+    bitmap = (1 << 0) | (1 << 9) | (1 << 200)
+    assert MetadataIndex.bitmap_positions(bitmap) == [0, 9, 200]
+
+    mask = MetadataIndex.bitmap_mask(bitmap, 10)
+    assert mask.dtype == bool and mask.tolist() == [True] + [False] * 8 + [True]
+    assert len(MetadataIndex.bitmap_mask(0, 0)) == 0
+
+
+def test_remove_and_replace_update_counts():
+    index, _ = build_index()
+    assert len(index) == 40
+    assert index.values('component') == {f"v-c{i}": 10 for i in range(4)}
+
+    version = index.version
+    digest = index.digest()
+    index.remove(['chunk-0', 'chunk-4', 'not-there'])
+    assert len(index) == 38
+    assert index.values('component')['v-c0'] == 8
+    assert index.version > version
+    assert index.digest() != digest
+
+    # Re-adding an id replaces it (old position tombstoned)
+    index.add(['chunk-1'], [{'component': 'v-c3'}], embeddings=[[0.0] * 8])
+    assert len(index) == 38
+    assert index.values('component')['v-c1'] == 9
+    assert index.values('component')['v-c3'] == 11
+    assert index.get(index.positions['chunk-1'])[2] == {'component': 'v-c3'}
+
+
+def test_values_counts_missing_under_key():
+    index = MetadataIndex()
+    index.add(['a', 'b', 'c'], [{'component': 'v-btn'}, {}, {'component': ''}])
+    assert index.values('component') == {'v-btn': 1}
+    assert index.values('component', missing='unknown') == {'v-btn': 1, 'unknown': 2}
+    index.remove(['b'])
+    assert index.values('component', missing='unknown') == {'v-btn': 1, 'unknown': 1}
+
+
+def test_digest_is_stable_across_instances():
+    first, _ = build_index()
+    second, _ = build_index(seed=1)
+    assert first.digest() == second.digest()
+    second.remove(['chunk-3'])
+    assert first.digest() != second.digest()
+
+
+def test_filtered_scan_matches_brute_force():
+    index, embeddings = build_index()
+    query = np.ones(8, dtype=np.float32)
+    bitmap = index.candidates(component='v-c2')
+    positions = index.bitmap_positions(bitmap)
+
+    hits = index.scan(query, bitmap, 4)
+    assert [position for position, _ in hits] == brute_force(embeddings, query, positions, 4)
+    assert [d for _, d in hits] == sorted(d for _, d in hits)
+    assert index.scan(query, 0, 4) == []
+
+
+@pytest.mark.parametrize('space', ['l2', 'cosine', 'ip'])
+def test_full_scan_matches_bitmap_scan(space):
+    index, _ = build_index()
+    index.remove(['chunk-5', 'chunk-17'])
+    query = np.linspace(-1, 1, 8).astype(np.float32)
+
+    full = index.scan(query, None, 10, space=space)
+    bitmap = index.scan(query, index.live, 10, space=space)
+    assert [p for p, _ in full] == [p for p, _ in bitmap]
+    assert np.allclose([d for _, d in full], [d for _, d in bitmap])
+    assert not {index.positions.get('chunk-5'), index.positions.get('chunk-17')} & {p for p, _ in full}
+
+
+def test_full_scan_never_returns_deleted_rows():
+    index, _ = build_index(n=5)
+    index.remove(['chunk-0', 'chunk-1', 'chunk-2'])
+    hits = index.scan(np.zeros(8, dtype=np.float32), None, 10)
+    assert sorted(p for p, _ in hits) == [3, 4]
+
+
+def test_live_rows_cached_until_mutation():
+    index, _ = build_index(n=6)
+    assert index.live_rows() is None
+    index.remove(['chunk-2'])
+    mask = index.live_rows()
+    assert mask.tolist() == [True, True, False, True, True, True]
+    assert index.live_rows() is mask
+
+
+def test_add_keeps_embedding_rows_aligned():
+    index, _ = build_index(n=4)
+    with pytest.raises(ValueError):
+        index.add(['x'], [{}])
+    with pytest.raises(ValueError):
+        index.add(['x', 'y'], [{}, {}], embeddings=[[0.0] * 8])
+
+    no_vectors = MetadataIndex()
+    no_vectors.add(['a'], [{}])
+    with pytest.raises(ValueError):
+        no_vectors.add(['b'], [{}], embeddings=[[0.0] * 8])
+    with pytest.raises(ValueError):
+        no_vectors.scan(np.zeros(8), None, 1)
+
+
+def test_read_only_index_rejects_mutation():
+    index, _ = build_index(n=2)
+    index.read_only = True
+    with pytest.raises(ValueError):
+        index.add(['z'], [{}], embeddings=[[0.0] * 8])
+    with pytest.raises(ValueError):
+        index.remove(['chunk-0'])
@@ -0,0 +1,112 @@
+"""Tests for metrics"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from metrics import (ERRORS, OPENAI_TOKENS, REQUEST_LATENCY, STAGE_LATENCY, Counter,
+                     Histogram, MetricsMiddleware, MetricsRegistry, current_timing,
+                     query_timing, record_scores, record_usage, timed)
+
+
+def test_counter_series_and_render():
+    counter = Counter('hits_total', 'Hits', ('cache',))
+    counter.inc(cache='a')
+    counter.inc(2, cache='a')
+    counter.inc(cache='b"x')
+    assert counter.value(cache='a') == 3
+    assert counter.render() == [
+        '# HELP hits_total Hits',
+        '# TYPE hits_total counter',
+        'hits_total{cache="a"} 3',
+        'hits_total{cache="b\\"x"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, stage='llm')
+    assert histogram.count(stage='llm') == 4
+    assert histogram.count(stage='other') == 0
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{stage="llm",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{stage="llm",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{stage="llm"} 5.65' in lines
+    assert 'latency_seconds_count{stage="llm"} 4' in lines
+
+
+def test_registry_reuses_metrics_and_skips_failing_callbacks():
+    registry = MetricsRegistry()
+    assert registry.counter('c_total', 'C') is registry.counter('c_total', 'C')
+
+    def broken():
+        raise RuntimeError
+
+    registry.register_callback(broken)
+    registry.register_callback(lambda: [('queue_depth', 'gauge', 'Depth', [({}, 3), ({'q': 'x'}, 1.5)])])
+    text = registry.render()
+    assert text.endswith('\n')
+    assert '# TYPE queue_depth gauge\nqueue_depth 3\nqueue_depth{q="x"} 1.5' in text
+
+
+def test_timed_records_stage_and_errors():
+    before = STAGE_LATENCY.count(stage='test_stage')
+    errors = ERRORS.value(stage='test_stage')
+
+    with query_timing() as timing:
+        with timed('test_stage'):
+            pass
+        with pytest.raises(ValueError):
+            with timed('test_stage'):
+                raise ValueError
+        record_scores([0.5, 0.25])
+
+    assert STAGE_LATENCY.count(stage='test_stage') == before + 2
+    assert ERRORS.value(stage='test_stage') == errors + 1
+    assert set(timing.stages) == {'test_stage'}
+    assert timing.similarity_scores == [0.5, 0.25]
+    assert timing.end is not None and timing.elapsed >= timing.stages['test_stage']
+
+
+def test_nested_query_timing_is_shared():
+    assert current_timing() is None
+    with query_timing() as outer:
+        with query_timing() as inner:
+            assert inner is outer
+            assert current_timing() is outer
+        assert outer.end is None
+    assert current_timing() is None
+    record_scores([1.0])  # no active timing: ignored
+
+
+def test_record_usage():
+    prompt = OPENAI_TOKENS.value(kind='prompt')
+    completion = OPENAI_TOKENS.value(kind='completion')
+    record_usage(SimpleNamespace(prompt_tokens=12, completion_tokens=None))
+    record_usage(None)
+    assert OPENAI_TOKENS.value(kind='prompt') == prompt + 12
+    assert OPENAI_TOKENS.value(kind='completion') == completion
+
+
+def test_middleware_times_requests_by_route():
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 503})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send(message):
+        pass
+
+    labels = dict(method='GET', route='/things/{id}', status='503')
+    before = REQUEST_LATENCY.count(**labels)
+    errors = ERRORS.value(stage='http')
+    scope = {'type': 'http', 'method': 'GET', 'route': SimpleNamespace(path='/things/{id}')}
+    asyncio.run(MetricsMiddleware(app)(scope, None, send))
+
+    assert REQUEST_LATENCY.count(**labels) == before + 1
+    assert ERRORS.value(stage='http') == errors + 1
+    asyncio.run(MetricsMiddleware(app)({'type': 'http', 'method': 'GET'}, None, send))
+    assert REQUEST_LATENCY.count(method='GET', route='unmatched', status='503') >= 1
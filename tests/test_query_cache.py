@@ -0,0 +1,200 @@
+"""Tests for query_cache"""
+
+from datetime import datetime
+
+from query_cache import CachePrewarmer, LRUCache, cache_key, popular_queries
+from rag_analytics import QueryLog, RAGAnalytics
+
+
+def test_cache_key_normalizes_query_and_orders_params():
+    assert cache_key("How  to use V-BTN", n_results=5, diversity=None) == \
+        cache_key("how to use v-btn", diversity=None, n_results=5)
+    assert cache_key("q", n_results=5) != cache_key("q", n_results=3)
+
+
+def test_lru_eviction_and_recency():
+    cache = LRUCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_version_change_drops_entries():
+    cache = LRUCache()
+    cache.put('a', 1, version=1)
+    assert cache.get('a', version=1) == 1
+    assert cache.get('a', version=2) is None
+    cache.put('b', 2, version=2)
+    assert cache.get('a', version=2) is None
+    assert len(cache) == 1
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = LRUCache(maxsize=0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def log_queries(analytics, queries):
+    today = datetime.now().strftime('%Y-%m-%d')
+    for i, query in enumerate(queries):
+        analytics.log_query(QueryLog(f"{today}T10:00:{i:02d}", query, 'how_to',
+                                     ['v-btn'], 0.1, 3, [0.8]))
+
+
+def test_popular_queries_one_phrasing_per_fingerprint(tmp_path):
+    analytics = RAGAnalytics(str(tmp_path / 'analytics.db'), async_writes=False)
+    log_queries(analytics, ["v-btn colors", "V-BTN  colors", "v-btn colors",
+                            "grid layout", "grid layout", "dialog"])
+
+    queries = popular_queries(analytics, limit=2)
+    assert len(queries) == 2
+    assert queries[0].lower().split() == ["v-btn", "colors"]
+    assert queries[1] == "grid layout"
+    analytics.close()
+
+
+class RecordingRAG:
+    def __init__(self):
+        self.calls = []
+
+    def prewarm(self, queries, responses=0):
+        self.calls.append((list(queries), responses))
+
+
+def test_prewarmer_runs_popular_queries(tmp_path):
+    analytics = RAGAnalytics(str(tmp_path / 'analytics.db'), async_writes=False)
+    rag = RecordingRAG()
+    prewarmer = CachePrewarmer(rag, analytics, limit=10, responses=1)
+
+    assert prewarmer.run()['queries'] == 0
+    assert rag.calls == []
+
+    log_queries(analytics, ["grid layout", "grid layout", "dialog"])
+    result = prewarmer.run()
+    assert rag.calls == [(["grid layout", "dialog"], 1)]
+    assert (result['queries'], result['responses']) == (2, 1)
+    assert prewarmer.last_run is result
+    analytics.close()
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("rate limited")
+        message = type('Message', (), {'content': 'LLM answer'})
+        choice = type('Choice', (), {'message': message})
+        return type('Completion', (), {'choices': [choice], 'usage': None})
+
+
+class FakeBaseRAG:
+    reranker = None
+    cache_generation = 0
+    mmr_fetch_multiplier = 3
+
+    def __init__(self, openai_client=None):
+        self.openai_client = openai_client
+
+    def search(self, query, n_results=5, **kwargs):
+        return [{'content': f"chunk {i}", 'similarity_score': 0.9 - i / 10,
+                 'metadata': {'chunk_id': f"{query}-{i}", 'component': 'v-btn'}}
+                for i in range(n_results)]
+
+    def format_sources(self, results):
+        return [result['metadata'] for result in results]
+
+    def _format_simple_response(self, results):
+        return "simple answer"
+
+
+def test_smart_query_caches_only_llm_responses():
+    from enhanced_query_processor import EnhancedVuetifyRAG
+
+    completions = FakeCompletions()
+    client = type('Client', (), {'chat': type('Chat', (), {'completions': completions})})
+    rag = EnhancedVuetifyRAG(FakeBaseRAG(client))
+
+    completions.fail = True
+    assert rag.smart_query("v-btn colors")['response'] == "simple answer"
+    assert len(rag.response_cache) == 0
+
+    completions.fail = False
+    assert rag.smart_query("v-btn colors")['response'] == "LLM answer"
+    assert rag.smart_query("v-btn colors")['response'] == "LLM answer"
+    assert completions.calls == 2
+
+    rag.base_rag.cache_generation += 1
+    rag.smart_query("v-btn colors")
+    assert completions.calls == 3
+
+
+def test_smart_query_without_llm_is_not_cached():
+    from enhanced_query_processor import EnhancedVuetifyRAG
+
+    rag = EnhancedVuetifyRAG(FakeBaseRAG())
+    assert rag.smart_query("grid")['response'] == "simple answer"
+    assert len(rag.response_cache) == 0
+    assert len(rag.retrieval_cache) == 1
+
+
+class FlakyReranker:
+    """Reranker stub that falls back (vector order) until told to score"""
+
+    overfetch = 2
+
+    def __init__(self):
+        self.scoring = False
+        self.calls = 0
+
+    def rerank(self, query, results, top_k=None, time_budget=None):
+        self.calls += 1
+        results = results[:top_k or len(results)]
+        if not self.scoring:
+            return results, False
+        return list(reversed(results)), True
+
+
+def test_reranker_fallback_is_not_cached(rag_factory):
+    make_rag, _ = rag_factory
+    reranker = FlakyReranker()
+    rag = make_rag(reranker=reranker)
+
+    fallback = rag.search("v-btn color", n_results=3)
+    assert len(rag.retrieval_cache) == 0
+
+    reranker.scoring = True
+    reranked = rag.search("v-btn color", n_results=3)
+    assert reranked == list(reversed(fallback))
+    assert rag.search("v-btn color", n_results=3) == reranked
+    assert reranker.calls == 2
+
+
+def test_enhanced_reranker_fallback_is_not_cached(rag_factory):
+    from enhanced_query_processor import EnhancedVuetifyRAG
+
+    make_rag, _ = rag_factory
+    reranker = FlakyReranker()
+    rag = EnhancedVuetifyRAG(make_rag(reranker=reranker))
+
+    rag.retrieve("v-btn color", 2)
+    rag.retrieve_batch([{'query': "v-card elevation", 'n_results': 2}])
+    assert len(rag.retrieval_cache) == 0
+
+    reranker.scoring = True
+    rag.retrieve("v-btn color", 2)
+    rag.retrieve_batch([{'query': "v-card elevation", 'n_results': 2}])
+    assert len(rag.retrieval_cache) == 2
+    calls = reranker.calls
+    rag.retrieve("v-btn color", 2)
+    assert reranker.calls == calls
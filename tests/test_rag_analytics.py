@@ -0,0 +1,179 @@
+"""Tests for rag_analytics rollups: incremental writes, rebuilds and compaction
+must all agree"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from rag_analytics import RAGAnalytics, QueryLog, fingerprint_query
+
+COMPONENTS = ['v-btn', 'v-card', 'v-dialog', 'v-data-table']
+QUERIES = ['How to use v-btn?', 'how to use V-BTN', 'v-card elevation',
+           'dialog fullscreen', 'data table sorting', 'grid breakpoints']
+
+
+def make_logs(days=10, per_day=12, seed=7):
+    """Logs spread over the last `days` days, shuffled (writes arrive out of order)"""
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    logs = []
+    for day in range(days):
+        for i in range(per_day):
+            timestamp = (now - timedelta(days=day, minutes=7 * i + 1)).isoformat()
+            logs.append(QueryLog(
+                timestamp=timestamp,
+                query=rng.choice(QUERIES),
+                query_type=rng.choice(['how_to', 'api', 'example']),
+                components=rng.sample(COMPONENTS, rng.randint(0, 2)),
+                response_time=round(rng.uniform(0.05, 3.0), 3),
+                num_results=5,
+                similarity_scores=[round(rng.uniform(0.3, 0.9), 3) for _ in range(3)],
+                stage_timings={'embedding': 0.01, 'llm': round(rng.uniform(0.1, 2.0), 3)},
+            ))
+    rng.shuffle(logs)
+    return logs
+
+
+def snapshot(analytics):
+    """Every rollup table, sorted, with float noise rounded away"""
+    conn = analytics._connection()
+    tables = {}
+    for table in RAGAnalytics.ROLLUP_TABLES:
+        rows = conn.execute(f"SELECT * FROM {table}").fetchall()
+        tables[table] = sorted(
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in rows
+        )
+    return tables
+
+
+def write_in_batches(analytics, logs, size=5):
+    for start in range(0, len(logs), size):
+        analytics._write_batch(logs[start:start + size])
+
+
+@pytest.fixture
+def analytics(tmp_path):
+    instance = RAGAnalytics(str(tmp_path / 'analytics.db'), async_writes=False)
+    yield instance
+    instance.close()
+
+
+def test_incremental_rollups_match_rebuild(analytics):
+    write_in_batches(analytics, make_logs())
+    incremental = snapshot(analytics)
+    assert incremental['daily_stats']
+
+    assert analytics.rebuild_aggregates() == 120
+    assert snapshot(analytics) == incremental
+
+
+def test_batching_does_not_change_rollups(tmp_path):
+    logs = make_logs()
+    one = RAGAnalytics(str(tmp_path / 'one.db'), async_writes=False)
+    many = RAGAnalytics(str(tmp_path / 'many.db'), async_writes=False)
+    one._write_batch(logs)
+    for log in logs:
+        many.log_query(log)
+    assert snapshot(one) == snapshot(many)
+    one.close()
+    many.close()
+
+
+def test_async_writer_matches_sync_writes(tmp_path):
+    logs = make_logs(days=3)
+    sync = RAGAnalytics(str(tmp_path / 'sync.db'), async_writes=False)
+    background = RAGAnalytics(str(tmp_path / 'async.db'), async_writes=True,
+                              flush_interval=0.01)
+    for log in logs:
+        sync.log_query(log)
+        background.log_query(log)
+    background.flush()
+    assert snapshot(background) == snapshot(sync)
+    sync.close()
+    background.close()
+
+
+def test_compaction_keeps_rollups_and_survives_rebuild(analytics):
+    write_in_batches(analytics, make_logs())
+    before = snapshot(analytics)
+    summary = analytics.get_performance_summary(30)
+    version = analytics.data_version()
+
+    deleted = analytics.compact(retain_days=5)
+    assert deleted > 0
+    assert analytics.data_version() != version
+    cutoff = (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d')
+    remaining = analytics._connection().execute(
+        "SELECT COUNT(*), MIN(timestamp) FROM query_logs").fetchone()
+    assert remaining[0] == 120 - deleted and remaining[1] >= cutoff
+
+    # Only one-off queries from compacted days leave the rollups
+    compacted = snapshot(analytics)
+    expected = dict(before, daily_query_stats=[
+        row for row in before['daily_query_stats'] if row[0] >= cutoff or row[3] > 1
+    ])
+    assert compacted == expected
+    assert analytics.get_performance_summary(30) == summary
+
+    # A rebuild after compaction recomputes the retained window only
+    assert analytics.rebuild_aggregates() == remaining[0]
+    assert snapshot(analytics) == compacted
+
+
+def test_new_logs_after_compaction_match_rebuild(analytics):
+    logs = make_logs()
+    write_in_batches(analytics, logs[:80])
+    analytics.compact(retain_days=4)
+    write_in_batches(analytics, logs[80:])
+    incremental = snapshot(analytics)
+    analytics.rebuild_aggregates()
+    assert snapshot(analytics) == incremental
+
+
+def test_query_phrasing_follows_latest_timestamp(analytics):
+    today = datetime.now().strftime('%Y-%m-%d')
+
+    def log(time, query):
+        return QueryLog(f"{today}T{time}", query, 'how_to', ['v-btn'], 0.1, 1, [0.5])
+
+    analytics.log_query(log('12:00:00', 'How to use v-btn?'))
+    analytics.log_query(log('09:00:00', 'use v-btn how'))  # late arrival
+    analytics._write_batch([log('13:00:00', 'v-btn: how to use'), log('11:00:00', 'how use v-btn')])
+
+    rows = analytics._connection().execute(
+        "SELECT fingerprint, query, query_count, last_seen FROM daily_query_stats").fetchall()
+    assert rows == [(fingerprint_query('How to use v-btn?'), 'v-btn: how to use', 4,
+                     f"{today}T13:00:00")]
+    trending = analytics.get_trending_queries(5, 1)
+    assert [(entry['query'], entry['frequency']) for entry in trending] == [('v-btn: how to use', 4)]
+
+
+def test_latency_percentiles_from_sketches(analytics):
+    today = datetime.now().strftime('%Y-%m-%d')
+    analytics._write_batch([
+        QueryLog(f"{today}T10:00:{i:02d}", f"q{i}", 'api', ['v-btn'], (i + 1) / 100, 1, [0.5])
+        for i in range(100)
+    ])
+    p = analytics.get_latency_percentiles(1)['']
+    assert p['p50'] == pytest.approx(0.5, rel=0.1)
+    assert p['p99'] == pytest.approx(0.99, rel=0.1)
+    assert analytics.get_latency_percentiles(1, 'component')['v-btn']['p90'] == pytest.approx(0.9, rel=0.1)
+
+
+def test_streamed_readers_share_one_connection(analytics):
+    write_in_batches(analytics, make_logs(days=2))
+    connections = len(analytics._connections)
+    for _ in range(3):
+        list(analytics.iter_query_stats(30, page_size=2))
+        list(analytics.iter_component_stats(30, page_size=2))
+    assert len(analytics._connections) == connections + 1
+
+    queries = analytics.iter_query_stats(30, page_size=1)
+    first = next(queries)
+    days = list(analytics.iter_daily_stats(30, page_size=1))
+    rest = list(queries)
+    assert len(days) == 2
+    assert len(rest) + 1 == len({fingerprint_query(query) for query in QUERIES})
+    assert first['frequency'] >= max(entry['frequency'] for entry in rest)
@@ -0,0 +1,186 @@
+"""Tests for reranking: MMR selection and the time-budgeted cross-encoder"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import reranking
+from reranking import CrossEncoderReranker, mmr_select
+
+
+def test_mmr_pure_relevance_keeps_similarity_order():
+    query = [1.0, 0.0]
+    embeddings = [[0.5, 0.5], [1.0, 0.1], [0.0, 1.0]]
+    assert mmr_select(query, embeddings, 3, diversity=0.0, duplicate_threshold=None) == [1, 0, 2]
+    assert mmr_select(query, embeddings, 1, diversity=0.0) == [1]
+
+
+def test_mmr_diversity_prefers_novel_chunks():
+    query = [1.0, 0.0, 0.0]
+    embeddings = [[1.0, 0.0, 0.0], [0.99, 0.12, 0.0], [0.7, 0.0, 0.7]]
+    assert mmr_select(query, embeddings, 2, diversity=0.0, duplicate_threshold=None) == [0, 1]
+    assert mmr_select(query, embeddings, 2, diversity=0.7, duplicate_threshold=None) == [0, 2]
+
+
+def test_mmr_drops_near_duplicates():
+    query = [1.0, 0.0]
+    embeddings = [[1.0, 0.0], [1.0, 0.001], [0.0, 1.0]]
+    assert mmr_select(query, embeddings, 3, diversity=0.0) == [0, 2]
+    assert mmr_select(query, [], 3) == []
+    assert mmr_select(query, embeddings, 0) == []
+
+
+class StubCrossEncoder:
+    """Scores a pair by document length after an optional delay or gate"""
+
+    delay = 0.0
+    gate = None
+
+    def __init__(self, model_name, max_length=256, device='cpu'):
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        return np.array([len(document) for _, document in pairs], dtype=np.float32)
+
+
+@pytest.fixture
+def make_reranker(monkeypatch):
+    monkeypatch.setattr(reranking, 'CROSS_ENCODER_AVAILABLE', True)
+    monkeypatch.setattr(reranking, 'CrossEncoder', StubCrossEncoder, raising=False)
+    created = []
+
+    def make(delay=0.0, gate=None, **kwargs):
+        reranker = CrossEncoderReranker(**kwargs)
+        reranker.model.delay = delay
+        reranker.model.gate = gate
+        created.append(reranker)
+        return reranker
+
+    yield make
+    for reranker in created:
+        if reranker.model.gate is not None:
+            reranker.model.gate.set()
+        reranker._executor.shutdown(wait=True)
+
+
+def candidates():
+    return [{'content': text} for text in ('a', 'ccc', 'bb')]
+
+
+def drain(reranker):
+    """Wait until every queued scoring job has run"""
+    reranker._executor.submit(lambda: None).result(timeout=5)
+
+
+def test_rerank_orders_by_score(make_reranker):
+    reranker = make_reranker()
+    results, reranked = reranker.rerank('q', candidates(), top_k=2)
+    assert reranked
+    assert [r['content'] for r in results] == ['ccc', 'bb']
+    assert results[0]['rerank_score'] == 3.0
+    assert reranker.reranked_count == 1
+
+    single, reranked = reranker.rerank('q', [{'content': 'x'}])
+    assert reranked and single == [{'content': 'x'}]
+
+
+def test_budget_exceeded_falls_back_to_vector_order(make_reranker):
+    reranker = make_reranker(delay=0.3, time_budget=0.05)
+    start = time.monotonic()
+    results, reranked = reranker.rerank('q', candidates(), top_k=2)
+    assert time.monotonic() - start < 0.25
+    assert not reranked
+    assert [r['content'] for r in results] == ['a', 'ccc']
+    assert reranker.fallback_count == 1
+
+    drain(reranker)
+    assert reranker._pending == 0
+
+
+def test_full_queue_falls_back_immediately(make_reranker):
+    gate = threading.Event()
+    reranker = make_reranker(gate=gate, max_pending=1, time_budget=2.0)
+    holder = threading.Thread(target=reranker.rerank, args=('q', candidates()))
+    holder.start()
+    while reranker._pending == 0:
+        time.sleep(0.001)
+
+    start = time.monotonic()
+    results, reranked = reranker.rerank('q', candidates())
+    assert time.monotonic() - start < 0.5  # well under the 2s budget
+    assert not reranked
+    assert [r['content'] for r in results] == ['a', 'ccc', 'bb']
+    assert reranker._pending == 1
+
+    gate.set()
+    holder.join(5)
+    drain(reranker)
+    assert reranker.model.calls == 1
+    assert reranker._pending == 0
+
+
+def test_timed_out_queued_job_is_never_scored(make_reranker):
+    gate = threading.Event()
+    reranker = make_reranker(gate=gate, max_pending=2, time_budget=0.05)
+    outcomes = []
+
+    def run():
+        outcomes.append(reranker.rerank('q', candidates())[1])
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert outcomes == [False, False]
+    assert reranker.fallback_count == 2
+    # The queued job was cancelled and gave its slot back at once
+    assert reranker._pending == 1
+
+    gate.set()
+    drain(reranker)
+    assert reranker.model.calls == 1
+    assert reranker._pending == 0
+
+
+def test_job_started_past_its_deadline_is_skipped(make_reranker):
+    reranker = make_reranker()
+    assert reranker._score('q', ['a', 'b'], deadline=time.monotonic() - 0.001) is None
+    assert reranker.skipped_count == 1
+    assert reranker.model.calls == 0
+    assert reranker._score('q', ['a', 'b'], deadline=time.monotonic() + 5).tolist() == [1.0, 1.0]
+
+
+def test_pending_jobs_stay_bounded_under_load(make_reranker):
+    reranker = make_reranker(delay=0.02, max_pending=2, time_budget=0.01)
+    peak = 0
+    stop = threading.Event()
+
+    def watch():
+        nonlocal peak
+        while not stop.is_set():
+            peak = max(peak, reranker._pending)
+            time.sleep(0.0005)
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    threads = [threading.Thread(target=reranker.rerank, args=('q', candidates()))
+               for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    drain(reranker)
+    stop.set()
+    watcher.join()
+
+    assert peak <= 2
+    assert reranker.model.calls + reranker.skipped_count <= 16
+    assert reranker.fallback_count + reranker.reranked_count == 16
+    assert reranker._pending == 0
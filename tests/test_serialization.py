@@ -0,0 +1,87 @@
+"""Tests for serialization: fragment cache, payload encoding and
+Accept-Encoding negotiation"""
+
+import gzip
+import json
+
+import pytest
+
+import serialization
+from serialization import (FragmentCache, compress, encode_payload, encode_results,
+                           json_response, negotiate_encoding)
+
+
+def result(chunk_id, content, score=0.5):
+    return {'id': chunk_id, 'content': content, 'metadata': {'component': 'v-btn'},
+            'similarity_score': score}
+
+
+def test_encode_payload_matches_json():
+    cache = FragmentCache()
+    payload = {'query': 'q', 'num_results': 2,
+               'results': [result('a', 'first "quoted"'), result('b', 'second', 0.25)]}
+    for _ in range(2):
+        assert json.loads(encode_payload(payload, 'results', cache, 1)) == payload
+    assert (cache.hits, cache.misses) == (2, 2)
+
+    assert json.loads(encode_payload({'results': []}, 'results', cache, 1)) == {'results': []}
+    assert json.loads(encode_payload({'x': 1}, 'results', cache, 1)) == {'x': 1}
+    assert json.loads(encode_results([result('c', 'no cache')])) == [result('c', 'no cache')]
+
+
+def test_fragments_follow_the_version():
+    cache = FragmentCache()
+    old = json.loads(encode_results([result('a', 'old text')], cache, 1))
+    stale = json.loads(encode_results([result('a', 'new text')], cache, 1))
+    assert old[0]['content'] == stale[0]['content'] == 'old text'
+
+    fresh = json.loads(encode_results([result('a', 'new text')], cache, 2))
+    assert fresh[0]['content'] == 'new text'
+    assert len(cache) == 1
+
+
+def test_results_without_id_are_not_cached():
+    cache = FragmentCache()
+    encode_results([{'content': 'x', 'metadata': {}}], cache, 1)
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('br;q=0.1, gzip', 'gzip'),
+    ('gzip;q=0.5, br;q=0.8', 'br'),
+    ('br, gzip', 'br'),
+    ('gzip, br', 'br'),
+    ('br;q=0, *', 'gzip'),
+    ('*;q=0.5, gzip;q=0', 'br'),
+    ('GZIP;Q=0.7', 'gzip'),
+    ('gzip;q=bogus', None),
+])
+def test_negotiate_encoding_honours_q_values(monkeypatch, header, expected):
+    monkeypatch.setattr(serialization, 'BROTLI_AVAILABLE', True)
+    assert negotiate_encoding(header) == expected
+
+
+def test_negotiate_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(serialization, 'BROTLI_AVAILABLE', False)
+    assert negotiate_encoding('br') is None
+    assert negotiate_encoding('br, gzip;q=0.1') == 'gzip'
+
+
+def test_compress_small_and_large_bodies(monkeypatch):
+    monkeypatch.setattr(serialization, 'BROTLI_AVAILABLE', False)
+    assert compress(b'{}', 'gzip') == (b'{}', None)
+
+    body = json.dumps({'results': ['chunk'] * 500}).encode()
+    content, encoding = compress(body, 'gzip')
+    assert encoding == 'gzip' and gzip.decompress(content) == body
+
+    response = json_response(body, 'gzip', headers={'ETag': '"x"'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert response.headers['etag'] == '"x"'
@@ -0,0 +1,63 @@
+"""Endpoint tests for cursor_api_server against a small in-memory corpus"""
+
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('httpx')
+
+from fastapi.testclient import TestClient
+
+import cursor_api_server as server
+from enhanced_query_processor import EnhancedVuetifyRAG
+
+
+@pytest.fixture
+def client(rag_factory, monkeypatch):
+    make_rag, write_chunks = rag_factory
+    rag = EnhancedVuetifyRAG(make_rag())
+    monkeypatch.setattr(server, 'rag_system', rag)
+    return TestClient(server.app), rag, write_chunks
+
+
+def search_contents(client, query='v-btn color'):
+    response = client.post('/search', json={'query': query, 'n_results': 4})
+    assert response.status_code == 200
+    return {result['id']: result['content'] for result in response.json()['results']}
+
+
+def test_search_serves_new_chunk_text_after_reindex(client):
+    client, rag, write_chunks = client
+    before = search_contents(client)
+    assert before['btn-1'] == 'v-btn color prop sets the button color'
+    version = rag.base_rag.metadata_index.version
+
+    # Same ids and corpus size: the rebuilt index ends at the same version
+    write_chunks([('btn-1', 'v-btn color prop accepts theme colors', 'v-btn', 'api')])
+    rag.refresh_indexes()
+    assert rag.base_rag.metadata_index.version == version
+
+    after = search_contents(client)
+    assert after['btn-1'] == 'v-btn color prop accepts theme colors'
+
+    batch = client.post('/batch/search', json={'requests': [{'query': 'v-btn color'}]})
+    contents = {result['id']: result['content'] for result in batch.json()['results'][0]['results']}
+    assert contents['btn-1'] == 'v-btn color prop accepts theme colors'
+
+
+def test_batch_ask_degrades_to_search_only(client, monkeypatch):
+    client, rag, _ = client
+    monkeypatch.setattr(server.admission, 'should_degrade', lambda: True)
+    monkeypatch.setattr(rag, 'smart_query', lambda *a, **k: pytest.fail('LLM path used'))
+    monkeypatch.setattr(rag.base_rag, 'generate_response', lambda *a, **k: pytest.fail('LLM path used'))
+    degraded_before = server.admission.degraded_count
+
+    response = client.post('/batch/ask', json={'requests': [
+        {'query': 'v-btn color', 'use_enhanced': False},
+        {'query': 'v-card', 'use_enhanced': True},
+    ]})
+    assert response.status_code == 200
+    items = response.json()['results']
+    assert [item['index'] for item in items] == [0, 1]
+    assert all('error' not in item and item['degraded'] for item in items)
+    assert all(item['sources'] for item in items)
+    assert server.admission.degraded_count == degraded_before + 2
@@ -0,0 +1,38 @@
+"""Tests for shared_index's embedding model fallback"""
+
+import pytest
+
+embedding_functions = pytest.importorskip('chromadb.utils.embedding_functions')
+
+import shared_index
+from shared_index import MODEL_DIR, mapped_model_supported, shared_embedding_function
+
+
+def test_installed_chromadb_is_supported():
+    assert mapped_model_supported()
+
+
+def test_export_without_model_uses_default(tmp_path):
+    assert isinstance(shared_embedding_function(str(tmp_path)),
+                      embedding_functions.DefaultEmbeddingFunction)
+
+
+@pytest.mark.parametrize('name', ['DOWNLOAD_PATH', 'EXTRACTED_FOLDER_NAME', 'MODEL_NAME', 'model'])
+def test_missing_class_internals_fall_back(tmp_path, monkeypatch, capsys, name):
+    (tmp_path / MODEL_DIR).mkdir()
+    monkeypatch.delattr(embedding_functions.ONNXMiniLM_L6_V2, name)
+    assert not mapped_model_supported()
+    ef = shared_embedding_function(str(tmp_path))
+    assert not isinstance(ef, shared_index.MappedONNXMiniLM)
+    assert isinstance(ef, embedding_functions.DefaultEmbeddingFunction)
+    assert 'Shared embedding model unavailable' in capsys.readouterr().out
+
+
+def test_missing_instance_internals_fall_back(tmp_path, monkeypatch, capsys):
+    (tmp_path / MODEL_DIR).mkdir()
+    # An __init__ that no longer sets ort/_preferred_providers
+    monkeypatch.setattr(embedding_functions.ONNXMiniLM_L6_V2, '__init__',
+                        lambda self, preferred_providers=None: None)
+    ef = shared_embedding_function(str(tmp_path))
+    assert isinstance(ef, embedding_functions.DefaultEmbeddingFunction)
+    assert 'ort' in capsys.readouterr().out
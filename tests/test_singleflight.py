@@ -0,0 +1,100 @@
+"""Tests for singleflight.SingleFlight"""
+
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  How to   use\tV-BTN ") == "how to use v-btn"
+
+
+def test_concurrent_callers_share_one_computation():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {'answer': 42}
+
+        waiters = [asyncio.ensure_future(flight.do('key', compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.inflight == 1
+        release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert calls == 1
+        assert all(result is results[0] for result in results)
+        assert (flight.started_count, flight.shared_count) == (1, 4)
+        assert flight.inflight == 0
+
+    asyncio.run(main())
+
+
+def test_distinct_keys_and_later_calls_run_again():
+    async def main():
+        flight = SingleFlight()
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key
+
+        assert await asyncio.gather(flight.do('a', lambda: compute('a')),
+                                    flight.do('b', lambda: compute('b'))) == ['a', 'b']
+        assert await flight.do('a', lambda: compute('a')) == 'a'
+        assert calls == ['a', 'b', 'a']
+
+    asyncio.run(main())
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.do('k', fail), flight.do('k', fail),
+                                       return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.inflight == 0
+        assert flight.started_count == 1
+
+        async def succeed():
+            return 'ok'
+
+        assert await flight.do('k', succeed) == 'ok'
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return 'done'
+
+        first = asyncio.ensure_future(flight.do('k', compute))
+        second = asyncio.ensure_future(flight.do('k', compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await second == 'done'
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
@@ -0,0 +1,232 @@
+"""Tests for tracing: head sampling, traceparent propagation and batched
+export, recorded with an in-memory exporter"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import tracing
+from tracing import BatchSpanProcessor, Tracer, TracingMiddleware, parse_traceparent
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+class InMemoryExporter:
+    """Keeps exported batches; export blocks while `gate` is cleared"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.gate = threading.Event()
+        self.gate.set()
+        self.exporting = threading.Event()
+
+    def export(self, spans):
+        self.exporting.set()
+        self.gate.wait()
+        if self.fail:
+            raise RuntimeError('collector down')
+        self.batches.append(list(spans))
+
+    @property
+    def spans(self):
+        return [span for batch in self.batches for span in batch]
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out waiting for export'
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def exporter():
+    return InMemoryExporter()
+
+
+@pytest.fixture
+def make_tracer(exporter):
+    def make(sample_rate=1.0, **kwargs):
+        kwargs.setdefault('flush_interval', 0.02)
+        return Tracer(sample_rate, BatchSpanProcessor(exporter, **kwargs))
+    return make
+
+
+def test_child_spans_join_the_trace_and_are_exported(make_tracer, exporter):
+    tracer = make_tracer()
+    with tracer.span('request', route='/ask') as root:
+        with tracer.span('retrieve') as child:
+            assert tracing.current_span() is child
+        assert tracing.current_span() is root
+        tracer.record('llm', time.time_ns(), root, tokens=12)
+
+    wait_for(lambda: len(exporter.spans) == 3)
+    by_name = {span.name: span for span in exporter.spans}
+    assert by_name['request'] is root and root.parent_id is None
+    assert by_name['retrieve'] is child
+    assert child.trace_id == root.trace_id and child.parent_id == root.span_id
+    assert by_name['llm'].parent_id == root.span_id
+    assert by_name['llm'].attributes == {'tokens': 12}
+    assert root.attributes == {'route': '/ask'}
+    assert root.end >= child.end >= child.start >= root.start
+
+
+def test_errors_are_recorded_on_the_span(make_tracer, exporter):
+    tracer = make_tracer()
+    with pytest.raises(ValueError):
+        with tracer.span('request'):
+            raise ValueError('bad query')
+    wait_for(lambda: exporter.spans)
+    assert exporter.spans[0].error == 'ValueError: bad query'
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(sample_rate=1.0)
+    with tracer.span('request') as root:
+        assert root is None
+    assert not Tracer(0.0, processor=object()).enabled
+
+
+def test_head_sampling_drops_whole_trace(make_tracer, exporter, monkeypatch):
+    tracer = make_tracer(sample_rate=0.5)
+    monkeypatch.setattr(tracing.random, 'random', lambda: 0.9)
+    with tracer.span('request') as root:
+        with tracer.span('retrieve') as child:
+            assert (root, child) == (None, None)
+    tracer.record('llm', time.time_ns(), root)
+
+    monkeypatch.setattr(tracing.random, 'random', lambda: 0.1)
+    with tracer.span('sampled') as root:
+        assert root is not None
+    wait_for(lambda: exporter.spans)
+    time.sleep(0.05)
+    assert [span.name for span in exporter.spans] == ['sampled']
+
+
+def test_upstream_trace_bypasses_sampling(make_tracer, exporter, monkeypatch):
+    tracer = make_tracer(sample_rate=0.01)
+    monkeypatch.setattr(tracing.random, 'random', lambda: 0.99)
+    with tracer.span('request', trace_id=TRACE_ID, parent_id=PARENT_ID) as root:
+        with tracer.span('retrieve') as child:
+            pass
+    assert (root.trace_id, root.parent_id) == (TRACE_ID, PARENT_ID)
+    assert (child.trace_id, child.parent_id) == (TRACE_ID, root.span_id)
+
+
+@pytest.mark.parametrize('header, expected', [
+    (f'00-{TRACE_ID}-{PARENT_ID}-01', (TRACE_ID, PARENT_ID)),
+    (f'00-{TRACE_ID}-{PARENT_ID}-03', (TRACE_ID, PARENT_ID)),
+    (f'00-{TRACE_ID}-{PARENT_ID}-00', (None, None)),  # not sampled upstream
+    (f'00-{TRACE_ID}-{PARENT_ID}-zz', (None, None)),
+    (f'00-{TRACE_ID[:-1]}-{PARENT_ID}-01', (None, None)),
+    ('garbage', (None, None)),
+    ('', (None, None)),
+    (None, (None, None)),
+])
+def test_parse_traceparent(header, expected):
+    assert parse_traceparent(header) == expected
+
+
+def test_batches_respect_batch_size(make_tracer, exporter):
+    tracer = make_tracer(batch_size=4, flush_interval=0.2)
+    exporter.gate.clear()
+    for i in range(10):
+        with tracer.span(f'request-{i}'):
+            pass
+    exporter.gate.set()
+    wait_for(lambda: len(exporter.spans) == 10)
+    assert all(len(batch) <= 4 for batch in exporter.batches)
+    assert [span.name for span in exporter.spans] == [f'request-{i}' for i in range(10)]
+    assert tracer.processor.exported_count == 10
+
+
+def test_full_queue_drops_spans(make_tracer, exporter):
+    tracer = make_tracer(max_queue=1, batch_size=1)
+    exporter.gate.clear()
+    with tracer.span('exporting'):
+        pass
+    assert exporter.exporting.wait(2.0)
+    # One span waits in the queue while the exporter is stuck; the rest drop
+    for name in ('queued', 'dropped-1', 'dropped-2'):
+        with tracer.span(name):
+            pass
+    assert tracer.processor.dropped_count == 2
+
+    exporter.gate.set()
+    wait_for(lambda: len(exporter.spans) == 2)
+    assert [span.name for span in exporter.spans] == ['exporting', 'queued']
+
+
+def test_failed_export_counts_as_dropped(capsys):
+    failing = InMemoryExporter(fail=True)
+    tracer = Tracer(1.0, BatchSpanProcessor(failing, flush_interval=0.02))
+    with tracer.span('request'):
+        pass
+    wait_for(lambda: tracer.processor.dropped_count == 1)
+    assert tracer.processor.exported_count == 0
+    assert 'Span export failed' in capsys.readouterr().out
+
+
+async def echo_app(scope, receive, send):
+    with tracing.span('handler'):
+        tracing.set_attribute('handled', True)
+    await send({'type': 'http.response.start', 'status': 201, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b'ok'})
+
+
+def call(app, headers=()):
+    scope = {'type': 'http', 'method': 'POST', 'path': '/ask',
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return dict(messages[0]['headers'])
+
+
+@pytest.fixture
+def module_tracer(monkeypatch, exporter):
+    monkeypatch.setattr(tracing.tracer, 'sample_rate', 1.0)
+    monkeypatch.setattr(tracing.tracer, 'processor',
+                        BatchSpanProcessor(exporter, flush_interval=0.02))
+    return tracing.tracer
+
+
+def test_middleware_continues_incoming_trace(module_tracer, exporter):
+    headers = call(TracingMiddleware(echo_app),
+                   [('traceparent', f'00-{TRACE_ID}-{PARENT_ID}-01')])
+
+    wait_for(lambda: len(exporter.spans) == 2)
+    by_name = {span.name: span for span in exporter.spans}
+    root, child = by_name['POST /ask'], by_name['handler']
+    assert (root.trace_id, root.parent_id) == (TRACE_ID, PARENT_ID)
+    assert (child.trace_id, child.parent_id) == (TRACE_ID, root.span_id)
+    assert child.attributes == {'handled': True}
+    assert root.attributes == {'http.method': 'POST', 'http.status_code': 201}
+    assert headers[b'traceparent'] == f'00-{TRACE_ID}-{root.span_id}-01'.encode()
+
+
+def test_middleware_starts_new_trace_without_header(module_tracer, exporter):
+    headers = call(TracingMiddleware(echo_app))
+    wait_for(lambda: len(exporter.spans) == 2)
+    root = next(span for span in exporter.spans if span.name == 'POST /ask')
+    assert root.parent_id is None and root.trace_id != TRACE_ID
+    assert headers[b'traceparent'] == f'00-{root.trace_id}-{root.span_id}-01'.encode()
+
+
+def test_middleware_passes_through_unsampled_requests(module_tracer, exporter, monkeypatch):
+    monkeypatch.setattr(module_tracer, 'sample_rate', 0.5)
+    monkeypatch.setattr(tracing.random, 'random', lambda: 0.9)
+    headers = call(TracingMiddleware(echo_app))
+    time.sleep(0.05)
+    assert b'traceparent' not in headers
+    assert exporter.spans == []
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Request tracing for Vuetify RAG
+Span-based tracing across the query pipeline with per-request context
+(contextvars), head sampling, and batched export to a JSONL file or an
+OTLP/HTTP collector
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+SERVICE_NAME = 'vuetify-rag'
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start',
+                 'end', 'attributes', 'error')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        """Attach a key/value to the span"""
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        """Span duration in seconds (0 while still open)"""
+        return (self.end - self.start) / 1e9 if self.end else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start / 1e9,
+            'duration': self.duration,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class JsonlExporter:
+    """Append finished spans to a local JSON Lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + '\n')
+
+
+class OTLPExporter:
+    """Send spans to an OpenTelemetry collector (OTLP/HTTP, JSON encoding)"""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.timeout = timeout
+
+    @staticmethod
+    def _value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+        return {'stringValue': str(value)}
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        encoded = {
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': 1,
+            'startTimeUnixNano': str(span.start),
+            'endTimeUnixNano': str(span.end),
+            'attributes': [{'key': key, 'value': self._value(value)}
+                           for key, value in span.attributes.items()],
+            'status': {'code': 2, 'message': span.error} if span.error else {'code': 1},
+        }
+        if span.parent_id:
+            encoded['parentSpanId'] = span.parent_id
+        return encoded
+
+    def export(self, spans: List[Span]):
+        payload = {
+            'resourceSpans': [{
+                'resource': {'attributes': [
+                    {'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}
+                ]},
+                'scopeSpans': [{
+                    'scope': {'name': SERVICE_NAME},
+                    'spans': [self._span(span) for span in spans],
+                }],
+            }]
+        }
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class BatchSpanProcessor:
+    """Hand finished spans to an exporter from a background thread
+
+    The request path only enqueues; spans are dropped (and counted) when
+    the queue is full rather than slowing requests down.
+    """
+
+    def __init__(self, exporter, max_queue: int = 2048, batch_size: int = 256,
+                 flush_interval: float = 2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped_count = 0
+        self.exported_count = 0
+        self._queue: 'queue.Queue[Span]' = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped_count += 1
+
+    def _run(self):
+        while True:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self.exporter.export(batch)
+                    self.exported_count += len(batch)
+                except Exception as e:
+                    self.dropped_count += len(batch)
+                    print(f"⚠️  Span export failed: {e}")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+# Set when the current request was sampled out, so children skip all work
+_sampled_out: ContextVar[bool] = ContextVar('sampled_out', default=False)
+
+
+class Tracer:
+    """Creates spans, applies the sampling decision and feeds the processor"""
+
+    def __init__(self, sample_rate: float = 0.0, processor: Optional[BatchSpanProcessor] = None):
+        """
+        Args:
+            sample_rate: Fraction of root spans (requests) that are recorded
+            processor: Receives finished spans; tracing is off without one
+        """
+        self.sample_rate = sample_rate
+        self.processor = processor
+
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None and self.sample_rate > 0
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None,
+             parent_id: Optional[str] = None, **attributes: Any):
+        """Record the block as a span, child of the current one if any
+
+        Yields the Span, or None when the trace is not sampled. A root span
+        may continue an upstream trace via trace_id/parent_id.
+        """
+        parent = _current_span.get()
+        if not self.enabled or (parent is None and _sampled_out.get()):
+            yield None
+            return
+
+        if parent is None and trace_id is None and random.random() >= self.sample_rate:
+            token = _sampled_out.set(True)
+            try:
+                yield None
+            finally:
+                _sampled_out.reset(token)
+            return
+
+        if parent is not None:
+            span = Span(name, parent.trace_id, parent.span_id)
+        else:
+            span = Span(name, trace_id or os.urandom(16).hex(), parent_id)
+        span.attributes.update(attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.time_ns()
+            _current_span.reset(token)
+            self.processor.on_end(span)
+
+    def record(self, name: str, start: int, parent: Optional[Span],
+               error: Optional[str] = None, **attributes: Any):
+        """Record an already finished child span (start in time_ns)
+
+        For work that cannot hold the context open, such as a generator
+        consumed from several threads.
+        """
+        if parent is None or not self.enabled:
+            return
+        span = Span(name, parent.trace_id, parent.span_id)
+        span.start = start
+        span.end = time.time_ns()
+        span.error = error
+        span.attributes.update(attributes)
+        self.processor.on_end(span)
+
+
+tracer = Tracer()
+
+
+class _FanOutExporter:
+    """Send each batch to several exporters"""
+
+    def __init__(self, exporters: list):
+        self.exporters = exporters
+
+    def export(self, spans: List[Span]):
+        for exporter in self.exporters:
+            exporter.export(spans)
+
+
+def configure(sample_rate: float, file_path: Optional[str] = None,
+              otlp_endpoint: Optional[str] = None) -> Tracer:
+    """Enable tracing with a file and/or OTLP exporter"""
+    exporters = []
+    if file_path:
+        exporters.append(JsonlExporter(file_path))
+    if otlp_endpoint:
+        exporters.append(OTLPExporter(otlp_endpoint))
+
+    if not exporters:
+        tracer.processor = None
+    elif len(exporters) == 1:
+        tracer.processor = BatchSpanProcessor(exporters[0])
+    else:
+        tracer.processor = BatchSpanProcessor(_FanOutExporter(exporters))
+    tracer.sample_rate = sample_rate
+    return tracer
+
+
+def configure_from_env() -> Tracer:
+    """Configure from RAG_TRACE_SAMPLE, RAG_TRACE_FILE and RAG_TRACE_OTLP_ENDPOINT"""
+    return configure(
+        sample_rate=float(os.getenv('RAG_TRACE_SAMPLE', '0') or 0),
+        file_path=os.getenv('RAG_TRACE_FILE') or None,
+        otlp_endpoint=os.getenv('RAG_TRACE_OTLP_ENDPOINT') or None
+    )
+
+
+def span(name: str, **attributes: Any):
+    """Span on the module tracer (see Tracer.span)"""
+    return tracer.span(name, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    """The span active in this context, if the request is sampled"""
+    return _current_span.get()
+
+
+def set_attribute(key: str, value: Any):
+    """Attach a key/value to the current span (no-op when not sampled)"""
+    active = _current_span.get()
+    if active is not None:
+        active.set_attribute(key, value)
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_id) from a sampled W3C traceparent header"""
+    if not header:
+        return None, None
+    parts = header.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    try:
+        if not int(parts[3], 16) & 1:
+            return None, None
+    except ValueError:
+        return None, None
+    return parts[1], parts[2]
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per HTTP request
+
+    Honors an incoming sampled traceparent header and returns the trace's
+    traceparent on the response so clients can find it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get('headers') or [])
+        trace_id, parent_id = parse_traceparent(
+            headers.get(b'traceparent', b'').decode('latin-1')
+        )
+
+        with tracer.span(f"{scope['method']} {scope['path']}", trace_id=trace_id,
+                         parent_id=parent_id, **{'http.method': scope['method']}) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_trace(message):
+                if message['type'] == 'http.response.start':
+                    root.set_attribute('http.status_code', message['status'])
+                    traceparent = f"00-{root.trace_id}-{root.span_id}-01"
+                    message = {**message, 'headers': list(message.get('headers', [])) + [
+                        (b'traceparent', traceparent.encode('latin-1'))
+                    ]}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+            # Name by route template so spans group across path parameters
+            route = getattr(scope.get('route'), 'path', None)
+            if route:
+                root.name = f"{scope['method']} {route}"